@@ -10,7 +10,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.core.database import Base
-from app.models import users, zones, survey, settings
+from app.models import users, zones, survey, settings, sync, quotas, stats, alerts
 from app.models import dictionary
 
 
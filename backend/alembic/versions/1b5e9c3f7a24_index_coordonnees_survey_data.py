@@ -0,0 +1,28 @@
+"""index (longitude, latitude) sur survey_data pour la carte
+
+Revision ID: 1b5e9c3f7a24
+Revises: f2a8d6c4b019
+Create Date: 2026-02-09 15:48:33.120947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b5e9c3f7a24'
+down_revision: Union[str, Sequence[str], None] = 'f2a8d6c4b019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_survey_data_lon_lat', 'survey_data', ['longitude', 'latitude'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_survey_data_lon_lat', table_name='survey_data')
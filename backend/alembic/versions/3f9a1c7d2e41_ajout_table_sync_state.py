@@ -0,0 +1,38 @@
+"""ajout table sync_state pour la synchro incrementale
+
+Revision ID: 3f9a1c7d2e41
+Revises: a029ced4af64
+Create Date: 2026-01-05 10:12:44.120311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2e41'
+down_revision: Union[str, Sequence[str], None] = 'a029ced4af64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sync_state',
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('watermark', sa.BigInteger(), nullable=False),
+    sa.Column('derniere_maj', sa.DateTime(), nullable=True),
+    sa.Column('debut_dernier_run', sa.DateTime(), nullable=True),
+    sa.Column('fin_dernier_run', sa.DateTime(), nullable=True),
+    sa.Column('dernier_statut', sa.String(), nullable=True),
+    sa.Column('derniere_erreur', sa.Text(), nullable=True),
+    sa.Column('lignes_total', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sync_state')
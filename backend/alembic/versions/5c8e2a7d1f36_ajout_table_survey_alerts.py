@@ -0,0 +1,41 @@
+"""ajout table survey_alerts (alertes precalculees)
+
+Revision ID: 5c8e2a7d1f36
+Revises: 1b5e9c3f7a24
+Create Date: 2026-02-16 10:05:27.663190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e2a7d1f36'
+down_revision: Union[str, Sequence[str], None] = '1b5e9c3f7a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('survey_alerts',
+    sa.Column('survey_id', sa.Integer(), nullable=False),
+    sa.Column('agent_code', sa.String(), nullable=True),
+    sa.Column('regles', sa.Integer(), nullable=False),
+    sa.Column('gravite', sa.SmallInteger(), nullable=False),
+    sa.Column('derniere_maj', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['survey_id'], ['survey_data.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('survey_id')
+    )
+    op.create_index('ix_survey_alerts_agent_code_survey_id', 'survey_alerts', ['agent_code', 'survey_id'], unique=False)
+    op.create_index('ix_survey_alerts_gravite_survey_id', 'survey_alerts', ['gravite', 'survey_id'], unique=False)
+    # Les alertes des questionnaires déjà chargés : python scripts/rebuild_counters.py alertes
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_survey_alerts_gravite_survey_id', table_name='survey_alerts')
+    op.drop_index('ix_survey_alerts_agent_code_survey_id', table_name='survey_alerts')
+    op.drop_table('survey_alerts')
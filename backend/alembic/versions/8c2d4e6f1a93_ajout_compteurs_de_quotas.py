@@ -0,0 +1,43 @@
+"""ajout compteurs de quotas par affectation
+
+Revision ID: 8c2d4e6f1a93
+Revises: 3f9a1c7d2e41
+Create Date: 2026-01-12 09:41:07.538214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2d4e6f1a93'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c7d2e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('quota_counters',
+    sa.Column('affectation_id', sa.Integer(), nullable=False),
+    sa.Column('regle_hash', sa.String(length=16), nullable=False),
+    sa.Column('nombre', sa.Integer(), nullable=False),
+    sa.Column('derniere_maj', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['affectation_id'], ['affectations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('affectation_id', 'regle_hash')
+    )
+    op.add_column('survey_data', sa.Column('affectation_id', sa.Integer(), nullable=True))
+    op.add_column('survey_data', sa.Column('regles_quota', sa.ARRAY(sa.String()), nullable=True))
+    op.create_foreign_key('fk_survey_data_affectation_id', 'survey_data', 'affectations', ['affectation_id'], ['id'], ondelete='SET NULL')
+    op.create_index(op.f('ix_survey_data_affectation_id'), 'survey_data', ['affectation_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_survey_data_affectation_id'), table_name='survey_data')
+    op.drop_constraint('fk_survey_data_affectation_id', 'survey_data', type_='foreignkey')
+    op.drop_column('survey_data', 'regles_quota')
+    op.drop_column('survey_data', 'affectation_id')
+    op.drop_table('quota_counters')
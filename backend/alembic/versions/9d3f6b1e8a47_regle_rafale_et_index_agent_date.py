@@ -0,0 +1,34 @@
+"""règle de rafale (global_settings) et index (agent_code, date_entretien) sur survey_data
+
+Revision ID: 9d3f6b1e8a47
+Revises: 5c8e2a7d1f36
+Create Date: 2026-02-18 11:22:40.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f6b1e8a47'
+down_revision: Union[str, Sequence[str], None] = '5c8e2a7d1f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('global_settings', sa.Column('check_rafale', sa.Boolean(), nullable=True, server_default=sa.false()))
+    op.add_column('global_settings', sa.Column('rafale_nombre', sa.Integer(), nullable=True, server_default='5'))
+    op.add_column('global_settings', sa.Column('rafale_minutes', sa.Integer(), nullable=True, server_default='30'))
+    op.create_index('ix_survey_data_agent_code_date_entretien', 'survey_data', ['agent_code', 'date_entretien'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_survey_data_agent_code_date_entretien', table_name='survey_data')
+    op.drop_column('global_settings', 'rafale_minutes')
+    op.drop_column('global_settings', 'rafale_nombre')
+    op.drop_column('global_settings', 'check_rafale')
@@ -0,0 +1,30 @@
+"""watermark composite (révision, uuid) de sync_state
+
+Revision ID: a4c8e2f6b391
+Revises: f7b2d8e4c615
+Create Date: 2026-03-12 10:17:42.604211
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e2f6b391'
+down_revision: Union[str, Sequence[str], None] = 'f7b2d8e4c615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Les sources existantes reprennent au début de leur révision courante :
+    # '' précède tous les uuid, rien n'est sauté (au pire quelques questionnaires relus)
+    op.add_column('sync_state', sa.Column('watermark_uuid', sa.String(), server_default='', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sync_state', 'watermark_uuid')
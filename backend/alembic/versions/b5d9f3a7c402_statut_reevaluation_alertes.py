@@ -0,0 +1,32 @@
+"""statut de la réévaluation des alertes dans global_settings
+
+Revision ID: b5d9f3a7c402
+Revises: a4c8e2f6b391
+Create Date: 2026-03-13 09:42:18.117305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d9f3a7c402'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e2f6b391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('global_settings', sa.Column('reevaluation_statut', sa.String(), nullable=True))
+    op.add_column('global_settings', sa.Column('reevaluation_erreur', sa.Text(), nullable=True))
+    op.add_column('global_settings', sa.Column('reevaluation_maj', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('global_settings', 'reevaluation_maj')
+    op.drop_column('global_settings', 'reevaluation_erreur')
+    op.drop_column('global_settings', 'reevaluation_statut')
@@ -0,0 +1,35 @@
+"""coordonnées GPS invalides (NaN, infinies, hors bornes) remises à NULL
+
+Revision ID: c7e1a9d4f286
+Revises: b5d9f3a7c402
+Create Date: 2026-03-13 15:08:51.402719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1a9d4f286'
+down_revision: Union[str, Sequence[str], None] = 'b5d9f3a7c402'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Même règle que sync._parse_float ('NaN' > tout nombre pour PostgreSQL : exclu par BETWEEN).
+    # Les alertes hors zone de ces questionnaires partent avec : scripts/rebuild_counters.py alertes analytique
+    op.execute("""
+        UPDATE survey_data
+        SET latitude = NULL, longitude = NULL, distance_zone_metres = NULL, hors_zone = NULL
+        WHERE (latitude IS NOT NULL AND NOT latitude BETWEEN -90 AND 90)
+           OR (longitude IS NOT NULL AND NOT longitude BETWEEN -180 AND 180)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Les valeurs invalides ne sont pas restaurées
+    pass
@@ -0,0 +1,36 @@
+"""ajout controle gps (zone, distance, hors_zone) sur survey_data
+
+Revision ID: d41b7a2c9e58
+Revises: 8c2d4e6f1a93
+Create Date: 2026-01-19 14:03:51.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7a2c9e58'
+down_revision: Union[str, Sequence[str], None] = '8c2d4e6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('survey_data', sa.Column('zone_id', sa.Integer(), nullable=True))
+    op.add_column('survey_data', sa.Column('distance_zone_metres', sa.Float(), nullable=True))
+    op.add_column('survey_data', sa.Column('hors_zone', sa.Boolean(), nullable=True))
+    op.create_foreign_key('fk_survey_data_zone_id', 'survey_data', 'zones', ['zone_id'], ['id'], ondelete='SET NULL')
+    op.create_index(op.f('ix_survey_data_zone_id'), 'survey_data', ['zone_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_survey_data_zone_id'), table_name='survey_data')
+    op.drop_constraint('fk_survey_data_zone_id', 'survey_data', type_='foreignkey')
+    op.drop_column('survey_data', 'hors_zone')
+    op.drop_column('survey_data', 'distance_zone_metres')
+    op.drop_column('survey_data', 'zone_id')
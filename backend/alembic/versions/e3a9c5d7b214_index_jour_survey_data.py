@@ -0,0 +1,32 @@
+"""index sur le jour des questionnaires (survey_data), pour l'export analytique
+
+Revision ID: e3a9c5d7b214
+Revises: 9d3f6b1e8a47
+Create Date: 2026-03-02 10:14:07.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c5d7b214'
+down_revision: Union[str, Sequence[str], None] = '9d3f6b1e8a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Même définition du jour que kpi_daily : l'export analytique relit survey_data jour par jour
+    op.create_index(
+        'ix_survey_data_jour', 'survey_data',
+        [sa.text('CAST(COALESCE(date_entretien, date_synchro) AS date)')], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_survey_data_jour', table_name='survey_data')
@@ -0,0 +1,57 @@
+"""ajout agregats journaliers kpi_daily
+
+Revision ID: e7b3c5a91f20
+Revises: d41b7a2c9e58
+Create Date: 2026-01-26 10:17:42.306518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3c5a91f20'
+down_revision: Union[str, Sequence[str], None] = 'd41b7a2c9e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Les types ENUM existent déjà (créés avec survey_data)
+    surveystatus = postgresql.ENUM('complet', 'partiel', 'refus', name='surveystatus', create_type=False)
+    genderenum = postgresql.ENUM('M', 'F', 'Inconnu', name='genderenum', create_type=False)
+    op.create_table('kpi_daily',
+    sa.Column('jour', sa.Date(), nullable=False),
+    sa.Column('agent_code', sa.String(), nullable=False),
+    sa.Column('zone_id', sa.Integer(), nullable=False),
+    sa.Column('status', surveystatus, nullable=False),
+    sa.Column('sexe', genderenum, nullable=False),
+    sa.Column('nombre', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('jour', 'agent_code', 'zone_id', 'status', 'sexe')
+    )
+    # Filtre par équipe (agent_code = ANY(...)) puis par période
+    op.create_index('ix_kpi_daily_agent_code_jour', 'kpi_daily', ['agent_code', 'jour'], unique=False)
+
+    # Remplissage initial à partir des questionnaires déjà chargés
+    op.execute("""
+        INSERT INTO kpi_daily (jour, agent_code, zone_id, status, sexe, nombre)
+        SELECT CAST(COALESCE(date_entretien, date_synchro) AS date),
+               COALESCE(agent_code, ''),
+               COALESCE(zone_id, 0),
+               COALESCE(status, 'partiel'),
+               COALESCE(respondent_sex, 'Inconnu'),
+               count(*)
+        FROM survey_data
+        WHERE COALESCE(date_entretien, date_synchro) IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_kpi_daily_agent_code_jour', table_name='kpi_daily')
+    op.drop_table('kpi_daily')
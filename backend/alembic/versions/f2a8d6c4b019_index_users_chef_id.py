@@ -0,0 +1,28 @@
+"""index sur users.chef_id (parcours recursif de la hierarchie)
+
+Revision ID: f2a8d6c4b019
+Revises: e7b3c5a91f20
+Create Date: 2026-02-02 11:26:09.471853
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8d6c4b019'
+down_revision: Union[str, Sequence[str], None] = 'e7b3c5a91f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_users_chef_id'), 'users', ['chef_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_chef_id'), table_name='users')
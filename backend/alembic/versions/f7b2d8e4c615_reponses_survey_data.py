@@ -0,0 +1,42 @@
+"""réponses complètes des questionnaires (survey_data.reponses, JSONB + index GIN)
+
+Revision ID: f7b2d8e4c615
+Revises: e3a9c5d7b214
+Create Date: 2026-03-09 15:41:26.318820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b2d8e4c615'
+down_revision: Union[str, Sequence[str], None] = 'e3a9c5d7b214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('survey_data', sa.Column('reponses', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    # ~200 variables = 2 à 3 Ko de JSONB, compressés : chaque test @> les décompresse.
+    # lz4 décompresse bien plus vite que pglz (PostgreSQL 14+ compilé avec lz4, sinon on garde pglz)
+    op.execute("""
+        DO $$ BEGIN
+            ALTER TABLE survey_data ALTER COLUMN reponses SET COMPRESSION lz4;
+        EXCEPTION WHEN feature_not_supported OR syntax_error THEN NULL;
+        END $$
+    """)
+    # jsonb_path_ops : index plus petit que l'opclasse par défaut, limité à l'opérateur @>,
+    # le seul utilisé par les conditions de quota
+    op.create_index('ix_survey_data_reponses', 'survey_data', ['reponses'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'reponses': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_survey_data_reponses', table_name='survey_data')
+    op.drop_column('survey_data', 'reponses')
@@ -1,10 +1,12 @@
 # backend/app/api/deps.py
 
+import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from app.core.cache import TTLCache
 from app.core.database import get_db
 from app.core.security import SECRET_KEY, ALGORITHM
 from app.models.users import User
@@ -13,9 +15,25 @@ from app.schemas.token import TokenData
 # Indique à Swagger où aller chercher le token si on n'est pas connecté
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# Cache des utilisateurs authentifiés, clé = (sub, iat) du token.
+# Les tableaux de bord interrogent plusieurs routes toutes les quelques secondes :
+# sans cache, chaque appel refait le même SELECT sur users.
+# Les routes users.py invalident le cache à chaque modification/suppression. Chaque worker
+# ayant son propre cache, un autre worker peut garder l'ancienne version au plus USER_CACHE_TTL secondes.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL, name="utilisateurs")
+
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+def invalidate_user_cache(username: str) -> None:
+    """Oublie toutes les entrées d'un utilisateur (tous ses tokens), après une modification."""
+    _user_cache.invalidate(lambda key: key[0] == username)
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """
-    Décode le token, vérifie si elle est encore valide et récupère l'utilisateur en BDD.
+    Décode le token, vérifie si elle est encore valide et récupère l'utilisateur en BDD
+    (ou dans le cache s'il a été résolu récemment).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,8 +48,19 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+
+    key = (token_data.username, payload.get("iat"))
+    snapshot = _user_cache.get(key)
+    if snapshot is None:
+        user = db.query(User).filter(User.username == token_data.username).first()
+        if user is None:
+            raise credentials_exception
+        # On garde une copie des colonnes, pas l'objet ORM (lié à la session de cette requête)
+        _user_cache.set(key, {col: getattr(user, col) for col in _USER_COLUMNS})
+        return user
+
+    # On reconstruit l'utilisateur et on le rattache à la session de la requête sans SELECT
+    # (load=False) : les relations (subordonnes, affectations...) restent utilisables.
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
@@ -0,0 +1,91 @@
+# backend/app/api/pagination.py
+
+"""
+Pagination des routes de liste.
+
+1. Par curseur (keyset) : on passe l'id du dernier élément reçu ('after_id') au lieu d'un
+   'skip'. La requête devient "WHERE id > :after_id ORDER BY id LIMIT n" : PostgreSQL
+   descend directement dans l'index de la clé primaire, alors qu'un OFFSET de 50 000 lit
+   (puis jette) 50 000 lignes. L'id à passer pour la page suivante est dans l'en-tête
+   X-Next-Cursor (absent sur la dernière page).
+
+2. En flux NDJSON (?format=ndjson) : une ligne JSON par élément, envoyée au fur et à mesure
+   que les lignes sortent du curseur serveur (yield_per). La réponse n'est jamais construite
+   en entier en mémoire ; 'limit' est ignoré, on reçoit tout (à partir de 'after_id').
+"""
+
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query as OrmQuery, Session
+
+from app.core.database import SessionLocal
+
+LIMITE_DEFAUT = 100
+LIMITE_MAX = 1000
+TAILLE_PAQUET = 500 # Lignes lues à la fois sur le curseur serveur, en mode flux
+
+NDJSON = "application/x-ndjson"
+
+
+class PageParams:
+    """Paramètres communs des routes de liste (à utiliser avec Depends())."""
+    def __init__(
+        self,
+        after_id: Optional[int] = Query(None, description="Curseur : id du dernier élément de la page précédente (en-tête X-Next-Cursor)"),
+        limit: int = Query(LIMITE_DEFAUT, ge=1, le=LIMITE_MAX),
+        format: str = Query("json", pattern="^(json|ndjson)$", description="'ndjson' : tout le résultat en flux, une ligne par élément"),
+    ):
+        self.after_id = after_id
+        self.limit = limit
+        self.stream = format == "ndjson"
+
+
+def keyset(query: OrmQuery, column: Any, page: PageParams) -> OrmQuery:
+    """Applique le curseur et le tri sur 'column' (clé unique et indexée, en général l'id)."""
+    if page.after_id is not None:
+        query = query.filter(column > page.after_id)
+    query = query.order_by(column)
+    return query if page.stream else query.limit(page.limit)
+
+def set_next_cursor(response: Response, rows: Sequence[Any], page: PageParams) -> None:
+    if len(rows) == page.limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+
+
+def ndjson_response(
+    build_query: Callable[[Session], OrmQuery],
+    serialize: Callable[[Session, List[Any]], Iterable[BaseModel]],
+) -> StreamingResponse:
+    """
+    Réponse NDJSON lue sur un curseur serveur.
+
+    La session de la requête (get_db) est fermée dès que la route a rendu sa réponse,
+    avant l'envoi du flux : le générateur ouvre donc sa propre session. 'build_query' ne doit
+    capturer que des valeurs simples (ids, codes), pas d'objets ORM de la session de la route.
+    'serialize' reçoit les lignes par paquets (pour charger en une fois ce qui leur manque).
+    """
+    def lignes() -> Iterator[bytes]:
+        db = SessionLocal()
+        try:
+            paquet: List[Any] = []
+            for row in build_query(db).yield_per(TAILLE_PAQUET):
+                paquet.append(row)
+                if len(paquet) == TAILLE_PAQUET:
+                    yield _encode(serialize(db, paquet))
+                    paquet = []
+            if paquet:
+                yield _encode(serialize(db, paquet))
+        finally:
+            db.close()
+
+    return StreamingResponse(lignes(), media_type=NDJSON)
+
+def _encode(items: Iterable[BaseModel]) -> bytes:
+    return b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+
+def validate_all(schema: type) -> Callable[[Session, List[Any]], List[BaseModel]]:
+    """Sérialiseur simple : chaque ligne passe dans le schéma de sortie de la route."""
+    return lambda db, rows: [schema.model_validate(row) for row in rows]
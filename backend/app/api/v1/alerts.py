@@ -0,0 +1,81 @@
+# backend/app/api/v1/alerts.py
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.database import get_db
+from app.models.alerts import SurveyAlert
+from app.models.survey import SurveyData
+from app.models.users import User
+from app.schemas.alerts import AlertOut
+from app.services.alerts import BITS_PAR_NOM, decode_regles
+from app.services.scoping import get_scope
+
+router = APIRouter()
+
+@router.get("/", response_model=List[AlertOut])
+def read_alerts(
+    response: Response,
+    regle: Optional[str] = Query(None, description=f"Une règle parmi {sorted(BITS_PAR_NOM)}"),
+    gravite_min: int = Query(1, ge=1, le=3),
+    agent_code: Optional[str] = None,
+    after_id: Optional[int] = Query(None, description="Curseur : survey_id de la dernière alerte de la page précédente"),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Questionnaires suspects, les plus récents d'abord (lecture de la table précalculée survey_alerts).
+    - Directeur : toutes les alertes.
+    - Autres : celles de leur équipe.
+    Pagination par curseur : passer l'en-tête X-Next-Cursor de la réponse dans 'after_id'.
+    """
+    query = (
+        select(SurveyAlert, SurveyData)
+        .join(SurveyData, SurveyData.id == SurveyAlert.survey_id)
+        .order_by(SurveyAlert.survey_id.desc())
+        .limit(limit)
+    )
+
+    # 1. Périmètre visible
+    scope = get_scope(db, current_user)
+    if agent_code is not None:
+        if not scope.sees_agent(agent_code):
+            raise HTTPException(status_code=403, detail="Cet agent ne fait pas partie de votre équipe.")
+        query = query.where(SurveyAlert.agent_code == agent_code)
+    elif not scope.illimite:
+        query = query.where(scope.agent_filter(SurveyAlert.agent_code))
+
+    # 2. Filtres
+    if regle is not None:
+        if regle not in BITS_PAR_NOM:
+            raise HTTPException(status_code=400, detail=f"Règle inconnue. Valeurs possibles : {sorted(BITS_PAR_NOM)}")
+        query = query.where(SurveyAlert.regles.op("&")(BITS_PAR_NOM[regle]) != 0)
+    if gravite_min > 1:
+        query = query.where(SurveyAlert.gravite >= gravite_min)
+    if after_id is not None:
+        query = query.where(SurveyAlert.survey_id < after_id)
+
+    rows = db.execute(query).all()
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1][0].survey_id)
+
+    return [
+        AlertOut(
+            survey_id=alert.survey_id,
+            questionnaire_uuid=survey.questionnaire_uuid,
+            agent_code=survey.agent_code,
+            status=survey.status.value if survey.status else None,
+            date_entretien=survey.date_entretien,
+            regles=decode_regles(alert.regles),
+            gravite=alert.gravite,
+            duree_minutes=survey.duree_minutes,
+            distance_zone_metres=survey.distance_zone_metres,
+            latitude=survey.latitude,
+            longitude=survey.longitude,
+        )
+        for alert, survey in rows
+    ]
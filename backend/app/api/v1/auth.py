@@ -4,17 +4,19 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 # imports internes
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.api.deps import invalidate_user_cache
+from app.core.security import verify_and_update, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.models.users import User
 from app.schemas.token import Token
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     # OAuth2PasswordRequestForm injecte automatiquement username/password depuis le formulaire.
     # Dans Swagger, cela correspond au cadenas vert "Authorize".
     form_data: OAuth2PasswordRequestForm = Depends(), 
@@ -22,19 +24,34 @@ def login_for_access_token(
 ):
     """
     Authentifie l'utilisateur et retourne un jeton JWT.
+    Route asynchrone : la requête SQL passe par le pool de threads de FastAPI et bcrypt
+    par le pool de hachage borné (429 si trop de connexions arrivent en même temps).
     """
     
     # 1. Recherche de l'utilisateur
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == form_data.username).first()
+    )
     
     # 2. Vérification (Existence + Mot de passe)
     # On utilise une seule erreur générique pour ne pas aider un attaquant à deviner si le user existe.
-    if not user or not verify_password(form_data.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_and_update(form_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Le hash a été fait avec un ancien coût (BCRYPT_ROUNDS a changé) : on enregistre le nouveau
+    if new_hash:
+        def save_new_hash():
+            user.password_hash = new_hash
+            db.commit()
+        await run_in_threadpool(save_new_hash)
+        invalidate_user_cache(user.username)
     
     # 3. Création du Token
     # Le 'subject' est l'identifiant unique dans le token. Ici on utilise le username.
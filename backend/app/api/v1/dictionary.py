@@ -1,14 +1,20 @@
 # backend/app/api/v1/dictionary.py
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
+from app.api.pagination import NDJSON, PageParams, set_next_cursor
 from app.core.database import get_db
 from app.models.users import User, RoleEnum
 from app.models.dictionary import Variable, Modalite
-from app.schemas.dictionary import VariableCreate, VariableOut
+from app.schemas.dictionary import DictionaryImportReport, VariableCreate, VariableOut
+from app.services.cspro_dcf import parse_dcf
+from app.services.dictionary import (
+    get_snapshot, import_dcf, invalidate_snapshot, publish_dictionary_change, variables_from_dcf,
+)
 
 router = APIRouter()
 
@@ -49,26 +55,75 @@ def create_variable_dictionary(
         )
         db.add(new_mod)
     
+    publish_dictionary_change(db)
     db.commit()
+    invalidate_snapshot()
     db.refresh(new_var) # On rafraîchit pour récupérer les modalités ajoutées
     return new_var
 
+@router.post("/import", response_model=DictionaryImportReport)
+def import_dictionary_dcf(
+    fichier: UploadFile = File(..., description="Dictionnaire CSPro (.dcf)"),
+    dry_run: bool = False,            # Seulement le rapport des différences, sans rien écrire
+    supprimer_absentes: bool = False, # Supprimer les variables qui ne sont plus dans le .dcf
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Importer (ou mettre à jour) tout le dictionnaire à partir du .dcf de l'enquête :
+    variables et modalités (ValueSet), en une transaction. Renvoie les différences avec l'existant.
+    Réservé au Directeur.
+    """
+    if current_user.role != RoleEnum.directeur:
+        raise HTTPException(status_code=403, detail="Seul le Directeur peut modifier le dictionnaire.")
+
+    try:
+        contenu = fichier.file.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Le fichier .dcf doit être encodé en UTF-8.")
+    variables = variables_from_dcf(parse_dcf(contenu.splitlines()))
+    if not variables:
+        raise HTTPException(status_code=400, detail="Aucune variable trouvée : est-ce bien un dictionnaire CSPro (.dcf) ?")
+
+    report = import_dcf(db, variables, supprimer_absentes=supprimer_absentes, dry_run=dry_run)
+    if report.applique:
+        db.commit()
+        invalidate_snapshot()
+    return report
+
 @router.get("/", response_model=List[VariableOut])
 def read_dictionary(
+    response: Response,
     quota_only: bool = False, # Filtre optionnel : voir seulement les variables de quota ?
+    page: PageParams = Depends(),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Lister toutes les variables du dictionnaire.
+    Lister toutes les variables du dictionnaire, par pages (curseur 'after_id', voir X-Next-Cursor).
     Accessible à tout le monde (pour afficher les labels dans le dashboard).
+
+    Servi depuis la photo en mémoire du dictionnaire. L'ETag est la version du dictionnaire :
+    un client qui renvoie If-None-Match reçoit 304 (sans corps) tant que rien n'a changé.
     """
-    query = db.query(Variable)
-    
-    if quota_only:
-        query = query.filter(Variable.est_quota == True)
-        
-    return query.all()
+    snapshot = get_snapshot(db)
+    etag = f'"{snapshot.version}"'
+    if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    variables = [
+        v for v in snapshot.variables
+        if (not quota_only or v.est_quota) and (page.after_id is None or v.id > page.after_id)
+    ]
+    if page.stream:
+        lignes = (v.model_dump_json().encode() + b"\n" for v in variables)
+        return StreamingResponse(lignes, media_type=NDJSON, headers={"ETag": etag})
+
+    variables = variables[:page.limit]
+    response.headers["ETag"] = etag
+    set_next_cursor(response, variables, page)
+    return variables
 
 @router.delete("/{variable_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_variable(
@@ -85,5 +140,7 @@ def delete_variable(
         raise HTTPException(status_code=404, detail="Variable introuvable")
         
     db.delete(var_db)
+    publish_dictionary_change(db)
     db.commit()
+    invalidate_snapshot()
     return None
@@ -0,0 +1,77 @@
+# backend/app/api/v1/live.py
+
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_user
+from app.core.database import SessionLocal
+from app.services.live import LiveSubscriber, hub
+from app.services.scoping import Scope, get_scope
+
+router = APIRouter()
+
+LIVE_PING_S = float(os.getenv("LIVE_PING_S", "15"))            # Commentaire SSE pour garder la connexion (proxies)
+LIVE_MAX_DUREE_S = float(os.getenv("LIVE_MAX_DUREE_S", "1800")) # Puis le navigateur se reconnecte (jeton et périmètre relus)
+
+
+def _load_scope(token: str) -> Scope:
+    # Session courte : le flux peut durer longtemps, il ne doit pas garder une connexion du pool
+    db = SessionLocal()
+    try:
+        user = get_current_user(token=token, db=db)
+        return get_scope(db, user)
+    finally:
+        db.close()
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+@router.get("/")
+async def live_feed(
+    request: Request,
+    token: Optional[str] = Query(None, description="Jeton JWT (EventSource ne peut pas envoyer d'en-tête Authorization)"),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Flux Server-Sent Events des nouveautés de la synchro, au lieu d'interroger les routes en boucle.
+    Un événement 'lot' par lot synchronisé, limité au périmètre de l'utilisateur :
+    questionnaires nouveaux/modifiés par agent et par zone, alertes écrites, écarts des quotas.
+    Un événement 'resync' demande au client de relire les routes (messages perdus). Après un
+    changement de la hiérarchie, le flux s'arrête juste après son 'resync' : à la reconnexion,
+    le périmètre est recalculé.
+    """
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    scope = await run_in_threadpool(_load_scope, token)
+
+    subscriber = LiveSubscriber(scope=scope, loop=asyncio.get_running_loop())
+    hub.add(subscriber)
+
+    async def events():
+        fin = time.monotonic() + LIVE_MAX_DUREE_S
+        try:
+            yield b"retry: 5000\n\n"
+            while time.monotonic() < fin and not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(subscriber.queue.get(), timeout=LIVE_PING_S)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield _sse(event, data)
+                if subscriber.ferme and subscriber.queue.empty():
+                    break
+        finally:
+            hub.remove(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,15 +1,35 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import math
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session, joinedload
 
 from app.api.deps import get_current_user
+from app.api.pagination import PageParams, keyset, ndjson_response, set_next_cursor, validate_all
+from app.core.cache import TTLCache
 from app.core.database import get_db
+from app.models.survey import SurveyStatus
 from app.models.users import User, RoleEnum
 from app.models.zones import Zone, Affectation
 from app.schemas.maps import ZoneCreate, ZoneOut, AffectationCreate, AffectationOut, AffectationUpdate
+from app.services.scoping import get_scope
+from app.services.map_clusters import (
+    MAX_TUILES, ZOOM_POINTS, data_version, points_limit, tile_count, tile_features, tiles_for_bbox,
+)
+from app.services.dictionary import get_snapshot
+from app.services.quotas import load_counters, fill_progress, recount_affectation
 
 router = APIRouter()
 
+# Tuiles déjà calculées, par (zoom, x, y, périmètre, filtre, points par tuile, version des données).
+# Un nouveau lot de synchro change la version : les anciennes tuiles ne sont plus jamais lues
+# et sortent du cache (LRU / TTL). La mémoire est bornée par le nombre total d'entités GeoJSON
+# gardées (une tuile va d'une entité à des milliers), pas seulement par le nombre de tuiles.
+CARTE_CACHE_MAX_ENTITES = int(os.getenv("CARTE_CACHE_MAX_ENTITES", "200000"))
+_tiles_cache = TTLCache(maxsize=20000, ttl=900, name="carte",
+                        weigher=lambda tuile: len(tuile[0]) + 1, maxweight=CARTE_CACHE_MAX_ENTITES)
+
 # Gestion des zones
 @router.post("/zones/", response_model=ZoneOut)
 def create_zone(
@@ -29,12 +49,25 @@ def create_zone(
 
 @router.get("/zones/", response_model=List[ZoneOut])
 def read_zones(
-    skip: int = 0, limit: int = 100, 
+    response: Response,
+    skip: int = 0,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Lister toutes les zones."""
-    return db.query(Zone).offset(skip).limit(limit).all()
+    """
+    Lister toutes les zones, par pages (curseur 'after_id', voir X-Next-Cursor).
+    'skip' reste accepté pour les anciens clients, mais le curseur évite de relire les pages précédentes.
+    """
+    def build(session: Session):
+        query = keyset(session.query(Zone), Zone.id, page)
+        return query.offset(skip) if skip else query
+
+    if page.stream:
+        return ndjson_response(build, validate_all(ZoneOut))
+    zones = build(db).all()
+    set_next_cursor(response, zones, page)
+    return zones
 
 # Gestion des affectations (missions et quotas)
 
@@ -82,28 +115,51 @@ def create_affectation(
 
 @router.get("/affectations/", response_model=List[AffectationOut])
 def read_affectations(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Voir les missions en cours.
+    Voir les missions en cours, par pages (curseur 'after_id', voir X-Next-Cursor).
     - Directeur : Tout voir.
-    - Contrôleur : Voir ses propres missions.
+    - Contrôleur : Voir ses propres missions ; Superviseur : celles des contrôleurs de son équipe.
+    - Agent : celles de son contrôleur.
     """
-    if current_user.role == RoleEnum.directeur:
-        query = db.query(Affectation).all()
-    else:
-        # Si je suis contrôleur, je ne vois que mes zones
-        query = db.query(Affectation).filter(Affectation.controleur_id == current_user.id).all()
+    scope = get_scope(db, current_user)
+
+    def build(session: Session):
+        # Zone et contrôleur chargés dans la même requête (LEFT JOIN), limités aux colonnes
+        # affichées : sans cela, chaque affectation déclenchait deux SELECT (aff.zone, aff.controleur).
+        query = session.query(Affectation).options(
+            joinedload(Affectation.zone).load_only(Zone.nom_zone),
+            joinedload(Affectation.controleur).load_only(User.username),
+        )
+        if scope.controleur_ids is not None:
+            # Sinon, seulement les zones des contrôleurs de mon périmètre
+            query = query.filter(scope.controleur_filter(Affectation.controleur_id))
+        return keyset(query, Affectation.id, page)
+
+    if page.stream:
+        return ndjson_response(build, _affectations_out)
+    affectations = build(db).all()
+    set_next_cursor(response, affectations, page)
+    return _affectations_out(db, affectations)
+
+def _affectations_out(db: Session, affectations: List[Affectation]) -> List[AffectationOut]:
+    # Avancement des quotas : tous les compteurs en une seule requête (table quota_counters)
+    counters = load_counters(db, [aff.id for aff in affectations])
+    dictionnaire = get_snapshot(db) # Libellés des règles (en mémoire, pas de requête)
 
     # On enrichit la réponse avec les noms (pour l'affichage frontend)
     results = []
-    for aff in query:
-        # On injecte les noms manuellement car AffectationOut les attend
+    for aff in affectations:
+        # On injecte les noms manuellement car AffectationOut les attend (déjà chargés, pas de requête)
         aff.nom_zone = aff.zone.nom_zone
         aff.nom_controleur = aff.controleur.username
-        results.append(aff)
-        
+        out = AffectationOut.model_validate(aff)
+        fill_progress(out.objectifs_quota, counters.get(aff.id, {}), dictionnaire)
+        results.append(out)
     return results
 
 @router.put("/affectations/{id}", response_model=AffectationOut)
@@ -126,10 +182,64 @@ def update_affectation(
     if aff_update.date_fin:
         aff.date_fin = aff_update.date_fin
     
-    # Mise à jour des quotas JSON
+    # Mise à jour des quotas JSON : les questionnaires déjà reçus sont recomptés
+    # avec les nouvelles règles, à partir de leurs réponses enregistrées
     if aff_update.objectifs_quota:
         aff.objectifs_quota = aff_update.objectifs_quota.model_dump()
+        recount_affectation(db, aff)
 
     db.commit()
     db.refresh(aff)
     return aff
+
+# Points de la carte
+
+@router.get("/points")
+def read_points(
+    zoom: int = Query(..., ge=0, le=22),
+    bbox: str = Query(..., description="ouest,sud,est,nord (degrés)"),
+    statut: Optional[SurveyStatus] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Questionnaires visibles sur la carte, en GeoJSON, regroupés par tuile selon le zoom.
+    - Directeur : tous les questionnaires.
+    - Autres : ceux de leur équipe (filtre appliqué AVANT le regroupement).
+    """
+    try:
+        ouest, sud, est, nord = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox attendu : ouest,sud,est,nord")
+    if not all(math.isfinite(v) for v in (ouest, sud, est, nord)):
+        raise HTTPException(status_code=400, detail="bbox attendu : ouest,sud,est,nord (valeurs finies)")
+
+    # Le nombre de tuiles est vérifié AVANT de les énumérer (zoom 22 sur le monde = 10^13 tuiles)
+    nombre_tuiles = tile_count(zoom, ouest, sud, est, nord)
+    if nombre_tuiles > MAX_TUILES:
+        raise HTTPException(status_code=400, detail="Zone visible trop grande pour ce niveau de zoom.")
+    tiles = tiles_for_bbox(zoom, ouest, sud, est, nord)
+    # Mode points : budget de points de la requête partagé entre les tuiles
+    limite = points_limit(nombre_tuiles) if zoom >= ZOOM_POINTS else None
+
+    # Périmètre : None (tout) pour le directeur, sinon les codes CSPro de l'équipe (en mémoire)
+    scope = get_scope(db, current_user)
+    version = data_version(db)
+    statut_value = statut.value if statut else None
+
+    features = []
+    tronquees = 0
+    for x, y in tiles:
+        key = (zoom, x, y, scope.agent_codes, statut_value, limite, version)
+        tuile, tronquee = _tiles_cache.get_or_set(
+            key, lambda: tile_features(db, zoom, x, y, scope.codes, statut_value, limite)
+        )
+        features.extend(tuile)
+        tronquees += tronquee
+
+    # Contenu déjà sérialisable : on évite la conversion générique de FastAPI (coûteuse sur de gros volumes)
+    # 'tronquee' : des tuiles avaient plus de points que le budget, le client peut inviter à zoomer
+    return JSONResponse(
+        content={"type": "FeatureCollection", "features": features, "tronquee": tronquees > 0},
+        headers={"X-Data-Version": version or "", "X-Tuiles-Tronquees": str(tronquees)},
+    )
@@ -0,0 +1,28 @@
+# backend/app/api/v1/metrics.py
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.deps import get_current_user
+from app.core.cache import cache_stats
+from app.core.database import engine, async_engine
+from app.core.notifications import listener_stats
+from app.core.security import hash_queue_stats
+from app.services.analytics import snapshot_stats
+from app.services.live import hub
+from app.models.users import User, RoleEnum
+
+router = APIRouter()
+
+@router.get("/")
+def read_metrics(current_user: User = Depends(get_current_user)):
+    """
+    Métriques internes du worker qui répond (chaque worker uvicorn a ses propres caches).
+    Réservé au Directeur.
+    """
+    if current_user.role != RoleEnum.directeur:
+        raise HTTPException(status_code=403, detail="Seul le Directeur peut consulter les métriques.")
+    pool = {"sync": engine.pool.stats() if hasattr(engine.pool, "stats") else engine.pool.status()}
+    if async_engine is not None:
+        pool["async"] = async_engine.pool.status()
+    return {"caches": cache_stats(), "hachage_mots_de_passe": hash_queue_stats(), "pool_connexions": pool,
+            "notifications": listener_stats(), "flux_direct": hub.stats(), "analytique": snapshot_stats()}
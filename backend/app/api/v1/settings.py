@@ -1,48 +1,99 @@
 # backend/app/api/v1/settings.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.models.users import User, RoleEnum
 from app.models.settings import GlobalSettings
 from app.schemas.settings import SettingsUpdate, SettingsOut
+from app.services import analytics
+from app.services.alerts import AlertRules, reevaluate_after_settings_change
+from app.services.settings import get_settings, invalidate_settings, publish_change, record_reevaluation
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _reevaluate_alerts(old: AlertRules, new: AlertRules):
+    """
+    Tâche de fond : réévalue les alertes touchées par le changement (session dédiée), puis
+    réexporte dans le snapshot analytique les jours dont hors_zone a changé (tolérance GPS).
+    Le résultat est enregistré dans global_settings (reevaluation_statut, lu par GET /settings).
+    """
+    db = SessionLocal()
+    jours = set()
+    try:
+        try:
+            # Après un échec (ou un processus arrêté en cours de route), les alertes ne
+            # correspondent plus à aucune règle connue : on reprend tout l'historique
+            complet = db.query(GlobalSettings.reevaluation_statut).scalar() in ("erreur", "en_cours")
+            record_reevaluation(db, "en_cours")
+            db.commit()
+            invalidate_settings()
+            # Peut parcourir tout l'historique : pas de limite DB_STATEMENT_TIMEOUT_MS (faite pour les requêtes de l'API)
+            db.execute(text("SET LOCAL statement_timeout = 0"))
+            ecrites, levees = reevaluate_after_settings_change(db, old, new, jours, complet=complet)
+            record_reevaluation(db, "ok")
+            db.commit()
+            invalidate_settings()
+            logger.info("Alertes réévaluées après changement des paramètres%s : %d écrites, %d levées",
+                        " (reprise complète)" if complet else "", ecrites, levees)
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Échec de la réévaluation des alertes")
+            record_reevaluation(db, "erreur", str(exc))
+            db.commit()
+            invalidate_settings()
+            return
+        if jours and analytics.disponible():
+            try:
+                analytics.refresh_snapshot(db, jours)
+            except Exception:
+                # _etat.json a été retiré : PostgreSQL répond jusqu'à la prochaine reconstruction
+                logger.exception("Export analytique impossible après le changement de tolérance (%d jours)", len(jours))
+    finally:
+        db.close()
+
 @router.get("/", response_model=SettingsOut)
 def read_settings(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Récupère la configuration globale.
+    Récupère la configuration globale (photo en mémoire, voir services/settings.py).
     Si elle n'existe pas encore, on l'initialise.
     """
-    settings = db.query(GlobalSettings).first()
-    if not settings:
+    snapshot = get_settings(db)
+    if snapshot.out is None:
         # Initialisation automatique
-        settings = GlobalSettings()
-        db.add(settings)
+        db.add(GlobalSettings())
+        publish_change(db)
         db.commit()
-        db.refresh(settings)
-    
-    return settings
+        invalidate_settings()
+        snapshot = get_settings(db)
+
+    return snapshot.out
 
 @router.put("/", response_model=SettingsOut)
 def update_settings(
     settings_in: SettingsUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Modifier les critères de validité (Admin seulement).
+    Les alertes concernées sont réévaluées en tâche de fond, après la réponse.
     """
     if current_user.role != RoleEnum.directeur:
         raise HTTPException(status_code=403, detail="Seul le Directeur peut modifier les paramètres globaux.")
 
     settings = db.query(GlobalSettings).first()
+    old_rules = AlertRules.from_settings(settings)
     if not settings:
         settings = GlobalSettings()
         db.add(settings)
@@ -57,6 +108,13 @@ def update_settings(
     for key, value in settings_data.items():
         setattr(settings, key, value)
 
+    # Les autres workers (et la synchro) oublient leur photo des paramètres au commit
+    publish_change(db)
     db.commit()
+    invalidate_settings()
     db.refresh(settings)
+
+    new_rules = AlertRules.from_settings(settings)
+    if new_rules != old_rules:
+        background_tasks.add_task(_reevaluate_alerts, old_rules, new_rules)
     return settings
@@ -0,0 +1,84 @@
+# backend/app/api/v1/stats.py
+
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.cache import TTLCache
+from app.core.database import get_db
+from app.models.users import User
+from app.schemas.stats import CrosstabOut, KpiOut
+from app.services.analytics import DIMENSIONS, crosstab
+from app.services.scoping import get_scope
+from app.services.kpi import compute_kpi
+
+router = APIRouter()
+
+# Les superviseurs rafraîchissent le tableau de bord en continu alors que la synchro
+# ne tourne que toutes les 15 min : quelques secondes de cache absorbent les pics.
+_kpi_cache = TTLCache(maxsize=2048, ttl=10, name="kpi")
+_crosstab_cache = TTLCache(maxsize=512, ttl=10, name="tableaux_croises")
+
+@router.get("/kpi", response_model=KpiOut)
+def read_kpi(
+    debut: Optional[date] = None,
+    fin: Optional[date] = None,
+    zone_id: Optional[int] = None,
+    agent_code: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Indicateurs du tableau de bord, calculés sur les agrégats journaliers (kpi_daily).
+    - Directeur : toute l'enquête.
+    - Autres : leur équipe (directe et indirecte), un agent ne voit que lui-même.
+    """
+    def compute():
+        # 1. Périmètre visible (en mémoire, voir services/scoping.py)
+        scope = get_scope(db, current_user)
+
+        # 2. Filtre sur un agent précis (qui doit être dans le périmètre)
+        if agent_code is not None and not scope.sees_agent(agent_code):
+            raise HTTPException(status_code=403, detail="Cet agent ne fait pas partie de votre équipe.")
+
+        # 3. Sommes sur kpi_daily
+        return compute_kpi(db, scope, agent_code=agent_code, debut=debut, fin=fin, zone_id=zone_id)
+
+    # Le résultat est mis en cache par utilisateur et par filtre (un refus 403 n'est pas mis en cache)
+    return _kpi_cache.get_or_set((current_user.id, debut, fin, zone_id, agent_code), compute)
+
+@router.get("/crosstab", response_model=CrosstabOut)
+def read_crosstab(
+    lignes: str = "zone",
+    colonnes: str = "statut",
+    debut: Optional[date] = None,
+    fin: Optional[date] = None,
+    zone_id: Optional[int] = None,
+    statut: Optional[str] = None,
+    agent_code: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Tableau croisé du nombre de questionnaires, 'lignes' x 'colonnes' parmi :
+    jour, agent, zone, statut, sexe, hors_zone, affectation.
+    Lu dans le snapshot analytique en colonnes (services/analytics.py), à défaut dans PostgreSQL.
+    Même périmètre que /kpi.
+    """
+    for dimension in (lignes, colonnes):
+        if dimension not in DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"Dimension inconnue : '{dimension}'. Valeurs possibles : {', '.join(DIMENSIONS)}.")
+    if lignes == colonnes:
+        raise HTTPException(status_code=400, detail="Les lignes et les colonnes doivent être deux dimensions différentes.")
+
+    def compute():
+        scope = get_scope(db, current_user)
+        if agent_code is not None and not scope.sees_agent(agent_code):
+            raise HTTPException(status_code=403, detail="Cet agent ne fait pas partie de votre équipe.")
+        return crosstab(db, scope, lignes, colonnes, debut=debut, fin=fin, zone_id=zone_id,
+                        statut=statut, agent_code=agent_code)
+
+    cle = (current_user.id, lignes, colonnes, debut, fin, zone_id, statut, agent_code)
+    return _crosstab_cache.get_or_set(cle, compute)
@@ -1,29 +1,21 @@
 # backend/app/api/v1/users.py
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, invalidate_user_cache
+from app.api.pagination import PageParams, keyset, ndjson_response, set_next_cursor, validate_all
 from app.core.database import get_db
 from app.core.security import get_password_hash
 from app.models.users import User, RoleEnum
-from app.schemas.users import UserCreate, UserOut, UserUpdate
+from app.schemas.users import UserCreate, UserImportReport, UserOut, UserUpdate
+from app.services.hierarchy import subordinates_query
+from app.services.provisioning import IMPORT_API_MAX_COMPTES, import_users, read_rows
+from app.services.scoping import get_scope, invalidate_scopes, publish_hierarchy_change
 
 router = APIRouter()
 
-# Cette fonction permet de récupérer toute la descendance (enfants + petits-enfants...)
-def get_all_subordinates_recursive(user: User) -> List[User]:
-    subordinates = []
-    # user.subordonnes fonctionne grâce à la correction dans models.py
-    # (
-    for child in user.subordonnes: 
-        subordinates.append(child)
-        # On appelle la fonction sur l'enfant (récursivité)
-        subordinates.extend(get_all_subordinates_recursive(child))
-    return subordinates
-#
-
 # 1. Voir qui je suis
 @router.get("/me", response_model=UserOut)
 def read_users_me(current_user: User = Depends(get_current_user)):
@@ -32,21 +24,32 @@ def read_users_me(current_user: User = Depends(get_current_user)):
 # Route pour voir mes mes subordonnés (ma team)
 @router.get("/", response_model=List[UserOut])
 def read_my_team(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Retourne la liste des utilisateurs visibles.
+    Retourne la liste des utilisateurs visibles, par pages (curseur 'after_id', voir X-Next-Cursor).
     - Directeur : voit tout le monde.
     - Autres : Voient uniquement leurs subordonnés (directs et indirects).
     """
-    if current_user.role == RoleEnum.directeur:
-        # Le boss voit tout la base
-        return db.query(User).all()
-    
-    # Pour les autres, on lance la recherche dans leur descendance
-    my_team = get_all_subordinates_recursive(current_user)
-    return my_team
+    chef_id = None if current_user.role == RoleEnum.directeur else current_user.id
+
+    def build(session: Session):
+        if chef_id is None:
+            # Le boss voit tout la base
+            query = session.query(User)
+        else:
+            # Pour les autres, toute leur descendance en une requête récursive
+            query = subordinates_query(session, chef_id)
+        return keyset(query, User.id, page)
+
+    if page.stream:
+        return ndjson_response(build, validate_all(UserOut))
+    users = build(db).all()
+    set_next_cursor(response, users, page)
+    return users
 ##
 
 ## Route pour chercher par code
@@ -70,13 +73,8 @@ def read_user_by_code(
         return target_user
 
     # 3. Si je suis le chef, je vérifie si c'est un de mes descendants
-    # On récupère les IDs de toute mon équipe grâce à la fonction récursive
-    my_team_ids = [u.id for u in get_all_subordinates_recursive(current_user)]
-    
-    # On ajoute mon propre ID (si je veux me chercher moi-même)
-    my_team_ids.append(current_user.id)
-
-    if target_user.id not in my_team_ids:
+    # (périmètre en mémoire, voir services/scoping.py). Je peux aussi me chercher moi-même.
+    if target_user.id not in get_scope(db, current_user):
         raise HTTPException(
             status_code=403, 
             detail="Accès refusé : Cet agent ne fait pas partie de votre équipe."
@@ -146,10 +144,51 @@ def create_user_shell(
         chef_id=user_in.chef_id
     )
     db.add(new_user)
+    # Le nouveau venu entre dans le périmètre de tous ses chefs
+    publish_hierarchy_change(db)
     db.commit()
+    invalidate_scopes()
     db.refresh(new_user)
     return new_user
 
+# 2 bis. Créer tous les comptes de la campagne d'un coup (tableur CSV ou JSON)
+@router.post("/import", response_model=UserImportReport)
+def import_users_file(
+    fichier: UploadFile = File(..., description="CSV (username;password;role;cspro_code;chef) ou JSON"),
+    dry_run: bool = False, # Seulement vérifier le fichier
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Le Directeur crée toute l'équipe en une fois. 'chef' = nom d'utilisateur ou code CSPro
+    du chef, déjà en base ou présent dans le fichier.
+    Tout ou rien : si une ligne est en erreur, aucun compte n'est créé et le rapport
+    donne les erreurs ligne par ligne.
+    """
+    if current_user.role != RoleEnum.directeur:
+        raise HTTPException(status_code=403, detail="Seul le Directeur peut créer des comptes.")
+
+    try:
+        rows, premiere_ligne = read_rows(fichier.file.read(), fichier.filename or "")
+    except (UnicodeDecodeError, ValueError) as exc: # json.JSONDecodeError hérite de ValueError
+        raise HTTPException(status_code=400, detail=f"Fichier illisible : {exc}")
+    if not rows:
+        raise HTTPException(status_code=400, detail="Le fichier ne contient aucun compte.")
+    # Les mots de passe sont hachés dans cette requête : les gros fichiers passent par le script
+    if not dry_run and len(rows) > IMPORT_API_MAX_COMPTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Plus de {IMPORT_API_MAX_COMPTES} comptes : vérifier le fichier avec dry_run, "
+                   f"puis l'importer avec scripts/import_users.py.",
+        )
+
+    report = import_users(db, rows, premiere_ligne=premiere_ligne, dry_run=dry_run)
+    if report.applique:
+        publish_hierarchy_change(db)
+        db.commit()
+        invalidate_scopes()
+    return report
+
 # 3. ASSIGNATION : Activer/Modifier un compte (Hiérarchique)
 @router.put("/{user_id}", response_model=UserOut)
 def update_user_assignment(
@@ -178,6 +217,7 @@ def update_user_assignment(
         )
 
     # Mise à jour
+    ancien_nom = user_db.username
     if user_update.username:
         user_db.username = user_update.username
     if user_update.password:
@@ -202,8 +242,14 @@ def update_user_assignment(
 
         # Si tout est bon, on applique la mutation ou l'affectation
         user_db.chef_id = user_update.chef_id
+        publish_hierarchy_change(db)
 
     db.commit()
+    invalidate_scopes()
+    # Après le commit : une requête concurrente ne peut plus remettre l'ancienne ligne en cache.
+    # Ancien et nouveau nom : aucune entrée ne doit survivre au renommage, sous un nom ou l'autre
+    invalidate_user_cache(ancien_nom)
+    invalidate_user_cache(user_db.username)
     db.refresh(user_db)
     return user_db
 
@@ -233,5 +279,9 @@ def delete_user(
         )
 
     db.delete(user_db)
+    publish_hierarchy_change(db)
     db.commit()
+    invalidate_scopes()
+    # Ses tokens encore valides ne doivent plus passer par le cache
+    invalidate_user_cache(user_db.username)
     return None # 204 No Content
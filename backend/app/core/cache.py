@@ -0,0 +1,119 @@
+# backend/app/core/cache.py
+
+"""
+Petit cache mémoire à durée de vie limitée (TTL), borné en taille.
+
+Chaque worker uvicorn a son propre cache : une donnée peut donc rester "vieille"
+au plus 'ttl' secondes dans un autre worker. On ne l'utilise que pour des lectures
+qui tolèrent ce léger décalage (tableaux de bord rafraîchis toutes les quelques secondes).
+
+Chaque invalidation (clear, invalidate) fait avancer une génération. get_or_set ne garde
+pas une valeur calculée pendant qu'une invalidation passait : elle a pu être lue avant le
+commit qui a déclenché l'invalidation (NOTIFY), et resterait sinon 'ttl' secondes.
+
+Pour des valeurs de tailles très différentes (tuiles de la carte : de 1 à des milliers
+d'entités), 'weigher' donne le poids d'une valeur et 'maxweight' borne le total : le nombre
+d'entrées seul ne borne pas la mémoire.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Caches nommés, exposés par GET /api/v1/metrics
+_registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0, name: Optional[str] = None,
+                 weigher: Optional[Callable[[Any], int]] = None, maxweight: Optional[int] = None):
+        self.name = name
+        if name:
+            _registry[name] = self
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigher = weigher
+        self.maxweight = maxweight
+        self.weight = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock() # Les routes "def" tournent dans plusieurs threads
+        self.generation = 0 # Avance à chaque invalidation
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key) # Le plus récemment utilisé passe en fin de file
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        # Appelé verrou pris
+        weight = self.weigher(value) if self.weigher else 0
+        if key in self._data:
+            self._remove(key)
+        if self.maxweight is not None and weight > self.maxweight:
+            return # Plus lourde que tout le cache : servie sans être gardée
+        self._data[key] = (time.monotonic() + self.ttl, value, weight)
+        self.weight += weight
+        while len(self._data) > self.maxsize or (self.maxweight is not None and self.weight > self.maxweight):
+            self._remove(next(iter(self._data))) # On jette le moins récemment utilisé
+
+    def _remove(self, key: Hashable) -> None:
+        # Appelé verrou pris
+        self.weight -= self._data.pop(key)[2]
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            generation = self.generation
+            value = factory()
+            with self._lock:
+                if generation == self.generation: # Sinon invalidé pendant le calcul : servie une fois, pas gardée
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Supprime les entrées dont la clé vérifie 'predicate'. Renvoie le nombre d'entrées supprimées."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                self._remove(k)
+            self.generation += 1
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        stats = {
+            "taille": len(self._data),
+            "taille_max": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "taux_hit": round(self.hits / total, 3) if total else None,
+        }
+        if self.maxweight is not None:
+            stats.update({"poids": self.weight, "poids_max": self.maxweight})
+        return stats
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistiques de tous les caches nommés du processus."""
+    return {name: cache.stats() for name, cache in sorted(_registry.items())}
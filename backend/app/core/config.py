@@ -0,0 +1,51 @@
+# backend/app/core/config.py
+
+"""
+Configuration de l'accès à la base, lue depuis les variables d'environnement (ou le .env).
+
+Exemple de .env pour la production :
+    DATABASE_URL=postgresql://dashboard:***@db/dashboard_db
+    DB_POOL_SIZE=20
+    DB_MAX_OVERFLOW=20
+    DB_STATEMENT_TIMEOUT_MS=15000
+"""
+
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# backend/.env, quel que soit le répertoire de lancement (CRON, systemd...).
+# Chargé aussi dans os.environ : les modules qui lisent os.getenv à l'import le voient.
+ENV_FILE = Path(__file__).resolve().parents[2] / ".env"
+load_dotenv(ENV_FILE)
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=ENV_FILE, extra="ignore")
+
+    database_url: Optional[str] = None
+
+    # Pool de connexions (par worker uvicorn !) : prévoir
+    # workers x (pool_size + max_overflow) <= max_connections de PostgreSQL.
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0     # Attente max d'une connexion libre (secondes)
+    db_pool_recycle: int = 1800       # Renouvelle les connexions de plus de 30 min (pare-feu, PgBouncer)
+    db_pool_pre_ping: bool = True     # Vérifie la connexion avant de la prêter (redémarrage de PostgreSQL)
+
+    # Coupe les requêtes trop longues côté PostgreSQL (0 = pas de limite).
+    # Les scripts de fond (synchro, reconstructions) la désactivent pour leur processus.
+    db_statement_timeout_ms: int = 30000
+
+    # Moteur asynchrone (optionnel, nécessite le paquet asyncpg).
+    # Préparation seulement : aucune route n'utilise encore get_async_db, donc le
+    # moteur n'est pas créé par défaut (il ouvrirait un second pool pour rien).
+    # DB_ASYNC_ENABLED=true l'active, par exemple pour porter une route "async def".
+    # Par défaut on dérive l'URL de DATABASE_URL (postgresql+asyncpg://...).
+    async_database_url: Optional[str] = None
+    db_async_enabled: bool = False
+
+
+config = Settings()
@@ -1,39 +1,76 @@
 # backend/app/core/database.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
 
-# 1. Charger les secrets
-# Le code va lire le fichier .env pour trouver le mot de passe de la BDD.
-# C'est une sécurité : on n'écrit pas de mot de passe en clair dans du code.
-load_dotenv()
+from app.core.config import config
+from app.core.pool import InstrumentedQueuePool
 
-# 2. L'URL de connexion
+# Le moteur asynchrone est optionnel : sans asyncpg, seules les routes synchrones existent.
+try:
+    import asyncpg  # noqa: F401
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+except ImportError:
+    asyncpg = None
+
+# 1. L'URL de connexion (le .env est chargé par app.core.config)
 # C'est l'adresse exacte de la base de données.
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+SQLALCHEMY_DATABASE_URL = config.database_url
+
+# Options communes aux deux moteurs
+_pool_options = dict(
+    pool_size=config.db_pool_size,
+    max_overflow=config.db_max_overflow,
+    pool_timeout=config.db_pool_timeout,
+    pool_recycle=config.db_pool_recycle,
+    pool_pre_ping=config.db_pool_pre_ping,
+)
 
-# 3. Le Moteur (Engine)
+# 2. Le Moteur (Engine)
 # C'est le câble physique branché à la base de données. 
 # Il gère la connexion réseau brute avec PostgreSQL.
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Le pool est instrumenté (temps d'attente d'une connexion, saturation) : voir GET /metrics.
+connect_args = {}
+if config.db_statement_timeout_ms:
+    connect_args["options"] = f"-c statement_timeout={config.db_statement_timeout_ms}"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    connect_args=connect_args,
+    **_pool_options,
+)
 
-# 4. La SessionLocal 
+# 3. La SessionLocal 
 # autocommit=False : Sécurité. On oblige le développeur à dire explicitement "Sauvegarde !"
 # autoflush=False : On attend la fin pour tout envoyer d'un coup.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# 5. La classe Base
+# 3 bis. Le moteur asynchrone (asyncpg)
+# Pour les routes de lecture très sollicitées : pendant l'attente de PostgreSQL,
+# la boucle d'événements sert d'autres requêtes au lieu de bloquer un thread du pool de FastAPI.
+async_engine = None
+AsyncSessionLocal = None
+if asyncpg is not None and config.db_async_enabled and SQLALCHEMY_DATABASE_URL:
+    async_url = config.async_database_url or make_url(SQLALCHEMY_DATABASE_URL).set(drivername="postgresql+asyncpg")
+    async_connect_args = {}
+    if config.db_statement_timeout_ms:
+        async_connect_args["server_settings"] = {"statement_timeout": str(config.db_statement_timeout_ms)}
+    async_engine = create_async_engine(async_url, connect_args=async_connect_args, **_pool_options)
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+# 4. La classe Base
 # Quand on crée "class User(Base)", on dit à SQLAlchemy : 
 # "Cette classe User correspond à une table dans la base de données".
 # Si une classe n'hérite pas de Base, SQLAlchemy l'ignore.
 Base = declarative_base()
 
-# 6. La fonction get_db (Injection de Dépendance)
+# 5. La fonction get_db (Injection de Dépendance)
 def get_db():
     db = SessionLocal() # -> On ouvre une nouvelle connexion dédiée pour cette requête.
+    # (En réalité, la connexion n'est prise dans le pool qu'à la première requête SQL :
+    # une route servie depuis un cache ne consomme donc aucune connexion.)
     try:
         yield db # -> On "prête" cette connexion à la route pour qu'elle fasse son travail (lire/écrire).
     finally:
@@ -42,3 +79,9 @@ def get_db():
 # POURQUOI ? Pour ne jamais laisser une connexion ouverte inutilement ("Connection Leak"),
 # ce qui ferait planter le serveur au bout de quelques heures.
 
+# 6. La version asynchrone de get_db, pour les routes "async def"
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Moteur asynchrone indisponible : installer asyncpg (pip install asyncpg).")
+    async with AsyncSessionLocal() as db:
+        yield db
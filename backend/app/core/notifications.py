@@ -0,0 +1,133 @@
+# backend/app/core/notifications.py
+
+"""
+Messages entre processus (workers uvicorn, synchro) par PostgreSQL LISTEN / NOTIFY.
+
+Chaque worker a ses propres caches mémoire : quand un worker modifie une donnée mise en
+cache (paramètres globaux...), les autres doivent l'apprendre sans interroger la base à
+chaque requête. Le worker qui écrit appelle notify(db, canal) dans sa transaction :
+PostgreSQL ne diffuse le message qu'au COMMIT (jamais pour une transaction annulée).
+
+Dans chaque processus, un thread d'écoute (start_listener) garde une connexion dédiée,
+hors du pool, en LISTEN sur les canaux abonnés (subscribe) et appelle leurs fonctions.
+À chaque (re)connexion, il appelle toutes les fonctions avec un message vide : des
+notifications ont pu être manquées avant le LISTEN ou pendant une coupure, il faut tout relire.
+Sans écouteur (script ponctuel, tests), les caches se rafraîchissent par leur TTL.
+"""
+
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_RECONNECT_S = float(os.getenv("NOTIFY_RECONNECT_S", "5"))
+
+_handlers: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_stats = {"connecte": False, "recues": 0, "reconnexions": 0}
+
+
+def subscribe(channel: str, handler: Callable[[str], None]) -> None:
+    """'handler(payload)' sera appelé dans le thread d'écoute à chaque NOTIFY sur 'channel'."""
+    with _lock:
+        _handlers[channel].append(handler)
+
+def notify(db: Session, channel: str, payload: str = "") -> None:
+    """Envoyé aux autres processus au commit de la transaction de 'db'."""
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+def _dispatch(channel: str, payload: str) -> None:
+    with _lock:
+        handlers = list(_handlers.get(channel, ()))
+    for handler in handlers:
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("Erreur dans le traitement d'une notification '%s'", channel)
+
+def _connect():
+    # Connexion DBAPI directe (psycopg2) : elle reste ouverte en permanence, elle ne doit pas
+    # occuper une place du pool des requêtes
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    conn = engine.dialect.dbapi.connect(*cargs, **cparams)
+    conn.autocommit = True
+    return conn
+
+def _listen(conn, channels: set) -> None:
+    with conn.cursor() as cur:
+        for channel in channels:
+            cur.execute(f'LISTEN "{channel}"')
+
+def _run() -> None:
+    premiere = True
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = _connect()
+            with _lock:
+                ecoutes = set(_handlers)
+            _listen(conn, ecoutes)
+            _stats["connecte"] = True
+            # Messages peut-être manqués avant le LISTEN (ou pendant une coupure) : tout le monde relit
+            for channel in ecoutes:
+                _dispatch(channel, "")
+            if not premiere:
+                _stats["reconnexions"] += 1
+            premiere = False
+
+            while not _stop.is_set():
+                # Canaux abonnés après le démarrage
+                with _lock:
+                    nouveaux = set(_handlers) - ecoutes
+                if nouveaux:
+                    _listen(conn, nouveaux)
+                    ecoutes |= nouveaux
+                if select.select([conn], [], [], 1.0)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        message = conn.notifies.pop(0)
+                        _stats["recues"] += 1
+                        _dispatch(message.channel, message.payload)
+        except Exception:
+            logger.exception("Écoute des notifications PostgreSQL interrompue, reconnexion dans %ss", NOTIFY_RECONNECT_S)
+        finally:
+            _stats["connecte"] = False
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        _stop.wait(NOTIFY_RECONNECT_S)
+
+def start_listener() -> None:
+    """Démarre le thread d'écoute (une fois par processus, au démarrage de l'application)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="pg-listen", daemon=True)
+    _thread.start()
+
+def stop_listener() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+    _thread = None
+
+def listener_stats() -> dict:
+    with _lock:
+        canaux = sorted(_handlers)
+    return {**_stats, "canaux": canaux, "actif": _thread is not None and _thread.is_alive()}
@@ -0,0 +1,65 @@
+# backend/app/core/pool.py
+
+"""
+Pool de connexions instrumenté : combien de temps les requêtes attendent une connexion
+libre, et à quel point le pool est saturé. Si le p95 d'attente monte, c'est qu'il faut
+plus de connexions (DB_POOL_SIZE / DB_MAX_OVERFLOW) ou des requêtes plus courtes.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._attentes = deque(maxlen=1000) # Dernières attentes (secondes), pour les percentiles
+        self.checkouts = 0
+        self.timeouts = 0
+        self.attente_max = 0.0
+
+    def _do_get(self):
+        # Temps pour obtenir une connexion : attente dans la file + ouverture éventuelle
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        attente = time.perf_counter() - t0
+        with self._lock:
+            self.checkouts += 1
+            self._attentes.append(attente)
+            self.attente_max = max(self.attente_max, attente)
+        return conn
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            attentes = sorted(self._attentes)
+        capacite = self.size() + max(self._max_overflow, 0)
+        en_cours = self.checkedout()
+
+        def percentile_ms(p: float):
+            if not attentes:
+                return None
+            return round(1000 * attentes[min(len(attentes) - 1, int(p / 100 * len(attentes)))], 2)
+
+        return {
+            "taille": self.size(),
+            "debordement_max": self._max_overflow,
+            "connexions_pretees": en_cours,
+            "connexions_libres": self.checkedin(),
+            "saturation": round(en_cours / capacite, 3) if capacite > 0 else None,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "attente_p50_ms": percentile_ms(50),
+            "attente_p95_ms": percentile_ms(95),
+            "attente_max_ms": round(1000 * self.attente_max, 2),
+        }
@@ -1,15 +1,63 @@
 # backend/app/core/security.py
 
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union, Optional
+from typing import Any, Callable, List, Tuple, Union, Optional
 from jose import jwt
 from passlib.context import CryptContext
 import os
 
+# Coût de bcrypt (2^rounds itérations). 12 ~ 250 ms par vérification sur un petit serveur.
+# Si on change la valeur, les anciens hash restent valides et sont refaits à la connexion
+# suivante de chaque utilisateur (voir verify_and_update).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 # Puisqu'on ne chiffre pas un mot de passe ( ça serait reversible ), on le hash
 # et avec Bcrypt on ajoute un peu d'aléatoire pour que deux mots de passe identiques 
 # "admin123" n'aient jamais le même hash en base.
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Pool dédié au hachage : en début de journée, des centaines d'agents se connectent en
+# même temps et chaque vérification bcrypt consomme ~250 ms de CPU. On borne le nombre
+# de calculs simultanés (PASSWORD_HASH_WORKERS) et la file d'attente (PASSWORD_HASH_QUEUE) :
+# au-delà, on refuse tout de suite (429) au lieu d'affamer les autres requêtes du worker.
+# bcrypt libère le GIL pendant le calcul : des threads suffisent.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0 # Calculs en cours + en attente
+_hash_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """Levée quand la file de hachage est pleine (transformée en 429 par main.py)."""
+
+
+def _submit(fn: Callable, *args) -> Future:
+    """Soumet un calcul au pool de hachage, ou lève PasswordHasherBusy si la file est pleine."""
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE:
+            raise PasswordHasherBusy("File de hachage des mots de passe pleine")
+        _hash_pending += 1
+
+    def _done(_):
+        global _hash_pending
+        with _hash_lock:
+            _hash_pending -= 1
+
+    future = _hash_pool.submit(fn, *args)
+    future.add_done_callback(_done)
+    return future
+
+# Hachage en masse (import de comptes en début de campagne) : pool à part, sur tous les cœurs,
+# pour ne pas occuper la file des connexions pendant plusieurs secondes.
+PASSWORD_BULK_WORKERS = int(os.getenv("PASSWORD_BULK_WORKERS", str(os.cpu_count() or 1)))
+
+def hash_queue_stats() -> dict:
+    return {"workers": PASSWORD_HASH_WORKERS, "file_max": PASSWORD_HASH_QUEUE, "en_cours": _hash_pending}
 
 # Si la variable d'environnement n'existe pas, le code plante ou utilise une clé faible.
 # En production, il est important que SECRET_KEY soit chargé depuis le .env.
@@ -23,14 +71,35 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Compare un mot de passe brut (saisi par l'utilisateur) avec le hash stocké.
     Passlib s'occupe de la complexité (extraire l'aléat, re-hacher, comparer).
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _submit(pwd_context.verify, plain_password, hashed_password).result()
 
 def get_password_hash(password: str) -> str:
     """
     Génère le hash sécurisé à stocker en base de données.
     Exemple de sortie : $2b$12$EixZaYVK1...
     """
-    return pwd_context.hash(password)
+    return _submit(pwd_context.hash, password).result()
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hash de toute une liste de mots de passe, en parallèle (PASSWORD_BULK_WORKERS threads :
+    bcrypt libère le GIL, chaque thread occupe un cœur). Même ordre que 'passwords'.
+    """
+    if not passwords:
+        return []
+    workers = max(1, min(PASSWORD_BULK_WORKERS, len(passwords)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt-masse") as pool:
+        return list(pool.map(pwd_context.hash, passwords))
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Version asynchrone pour la connexion : la boucle d'événements n'attend pas bcrypt.
+    Renvoie (mot de passe correct ?, nouveau hash ou None).
+    Un nouveau hash est fourni quand l'ancien n'a plus le coût voulu (BCRYPT_ROUNDS) :
+    il suffit de l'enregistrer pour migrer l'utilisateur sans qu'il s'en rende compte.
+    """
+    future = _submit(pwd_context.verify_and_update, plain_password, hashed_password)
+    return await asyncio.wrap_future(future)
 
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -43,7 +112,8 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     # "sub" (Subject) est un champ standard JWT pour dire "à qui appartient ce token"
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # "iat" (Issued At) : date d'émission, sert aussi de clé au cache des utilisateurs (voir deps.py)
+    to_encode = {"exp": expire, "iat": datetime.now(timezone.utc), "sub": str(subject)}
     
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -1,15 +1,31 @@
 # backend/app/main.py
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.core.notifications import start_listener, stop_listener
+from app.core.security import PasswordHasherBusy
 from app.api.v1 import auth
 from app.models import users, zones, survey, settings
-from app.api.v1 import auth, users, maps, settings, dictionary
+from app.api.v1 import auth, users, maps, settings, dictionary, stats, metrics, alerts, live
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Écoute des NOTIFY PostgreSQL : invalidation des caches mémoire de ce worker
+    # quand un autre worker modifie les paramètres, flux en direct de la synchro
+    # (voir core/notifications.py)
+    start_listener()
+    yield
+    stop_listener()
 
 
 app = FastAPI(
     title="Open Survey Monitor API",
     description="Backend pour le suivi d'enquêtes terrain CSPro",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # On inclut nos routes
@@ -18,6 +34,20 @@ app.include_router(users.router, prefix="/api/v1/users", tags=["Utilisateurs"])
 app.include_router(maps.router, prefix="/api/v1/maps", tags=["Maps & Quotas"])
 app.include_router(settings.router, prefix="/api/v1/settings", tags=["Global Settings"])
 app.include_router(dictionary.router, prefix="/api/v1/dictionary", tags=["Dictionary"]) 
+app.include_router(stats.router, prefix="/api/v1/stats", tags=["Statistiques"])
+app.include_router(alerts.router, prefix="/api/v1/alerts", tags=["Alertes"])
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["Métriques"])
+app.include_router(live.router, prefix="/api/v1/live", tags=["Temps réel"])
+
+
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    # Trop de mots de passe à vérifier en même temps : le client réessaie un peu plus tard
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Trop de connexions simultanées, réessayez dans quelques secondes."},
+        headers={"Retry-After": "2"},
+    )
 
 
 @app.get("/")
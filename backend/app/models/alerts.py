@@ -0,0 +1,29 @@
+# backend/app/models/alerts.py
+
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime, ForeignKey, Index
+from app.core.database import Base
+
+class SurveyAlert(Base):
+    """
+    Alertes qualité / fraude précalculées par la synchro (voir services/alerts.py).
+
+    Une ligne par questionnaire suspect, et seulement pour eux (table compacte).
+    'regles' est un masque de bits : plusieurs règles peuvent être enfreintes à la fois.
+    Ex: regles = 1 | 2 = 3 -> hors zone ET durée trop courte.
+    """
+    __tablename__ = "survey_alerts"
+
+    survey_id = Column(Integer, ForeignKey("survey_data.id", ondelete="CASCADE"), primary_key=True)
+
+    # Recopié de survey_data pour filtrer par équipe sans jointure
+    agent_code = Column(String, nullable=True)
+
+    regles = Column(Integer, nullable=False)      # Masque de bits (HORS_ZONE=1, DUREE=2, ...)
+    gravite = Column(SmallInteger, nullable=False) # 1 = faible, 2 = moyenne, 3 = forte
+    derniere_maj = Column(DateTime, nullable=True)
+
+    # Lecture paginée (les plus récentes d'abord), par équipe ou par gravité
+    __table_args__ = (
+        Index("ix_survey_alerts_agent_code_survey_id", "agent_code", "survey_id"),
+        Index("ix_survey_alerts_gravite_survey_id", "gravite", "survey_id"),
+    )
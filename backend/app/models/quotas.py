@@ -0,0 +1,27 @@
+# backend/app/models/quotas.py
+
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from app.core.database import Base
+
+class QuotaCounter(Base):
+    """
+    Compteurs de quotas précalculés (un par règle et par affectation).
+
+    Plutôt que de recompter survey_data à chaque affichage (une requête par règle
+    et par affectation), le script de synchro incrémente ces compteurs dans la
+    MÊME transaction que l'insertion des questionnaires.
+    L'affichage des quotas coûte alors une seule lecture de cette petite table.
+
+    La règle est identifiée par l'empreinte (hash) de ses conditions,
+    ex: {"SEXE": "F", "ETHNIE": "NOIR"} -> "3f1c9a0b5d2e7f41".
+    L'empreinte des conditions vides {} correspond au quota global de l'affectation.
+    """
+    __tablename__ = "quota_counters"
+
+    affectation_id = Column(Integer, ForeignKey("affectations.id", ondelete="CASCADE"), primary_key=True)
+    regle_hash = Column(String(16), primary_key=True)
+
+    # Nombre de questionnaires complets qui remplissent la règle
+    nombre = Column(Integer, nullable=False, default=0)
+
+    derniere_maj = Column(DateTime, nullable=True)
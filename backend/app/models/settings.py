@@ -1,6 +1,6 @@
 # backend/app/models/settings.py
 
-from sqlalchemy import Column, Integer, String, Time, Text, Boolean
+from sqlalchemy import Column, DateTime, Integer, String, Time, Text, Boolean
 from app.core.database import Base
 
 class GlobalSettings(Base):
@@ -73,9 +73,23 @@ class GlobalSettings(Base):
     # Au-delà, c'est supposé humainement impossible, donc c'est une alerte fraude.
     max_enquetes_par_jour = Column(Integer, default=20) 
 
+    # Rafales : N enquêtes en moins de M minutes (ex: 5 en 30 min), même sous le maximum journalier.
+    # Une interview réelle prend du temps : des fiches rapprochées à ce point sont suspectes.
+    check_rafale = Column(Boolean, default=False)
+    rafale_nombre = Column(Integer, default=5)
+    rafale_minutes = Column(Integer, default=30)
+
     # 6. COMMUNICATION
     
     # Message affiché en haut du tableau de bord de tous les utilisateurs.
     # Utile pour les annonces urgentes (ex: "Synchronisez vos tablettes avant 18h ce soir !")
     # Type Text : permet d'écrire un message long contrairement à String qui est souvent limité.
     message_du_jour = Column(Text, nullable=True)
+
+    # 7. SUIVI DE LA RÉÉVALUATION DES ALERTES
+    # Après un changement de règles, les alertes sont réévaluées en tâche de fond (api/v1/settings.py).
+    # Statut : "en_cours", "ok" ou "erreur". Après une erreur, la réévaluation suivante reprend tout
+    # l'historique (scripts/rebuild_counters.py alertes remet aussi le statut à "ok").
+    reevaluation_statut = Column(String, nullable=True)
+    reevaluation_erreur = Column(Text, nullable=True)
+    reevaluation_maj = Column(DateTime, nullable=True)
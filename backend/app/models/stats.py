@@ -0,0 +1,30 @@
+# backend/app/models/stats.py
+
+from sqlalchemy import Column, Integer, String, Date, Enum, Index
+from app.core.database import Base
+from app.models.survey import SurveyStatus, GenderEnum
+
+class KpiDaily(Base):
+    """
+    Agrégats journaliers (rollup) pour le tableau de bord des KPI.
+
+    Une ligne = le nombre de questionnaires pour un jour, un agent, une zone,
+    un statut et un sexe. Quelques milliers de lignes par jour au lieu de
+    relire des centaines de milliers de questionnaires à chaque rafraîchissement.
+    La synchro met ces compteurs à jour dans la même transaction que les questionnaires.
+
+    Les clés ne peuvent pas être NULL (clé primaire) : agent_code = "" et zone_id = 0
+    signifient "inconnu".
+    """
+    __tablename__ = "kpi_daily"
+
+    jour = Column(Date, primary_key=True)
+    agent_code = Column(String, primary_key=True)
+    zone_id = Column(Integer, primary_key=True)
+    status = Column(Enum(SurveyStatus), primary_key=True)
+    sexe = Column(Enum(GenderEnum), primary_key=True)
+
+    nombre = Column(Integer, nullable=False, default=0)
+
+    # Filtre par équipe (agent_code = ANY(...)) puis par période
+    __table_args__ = (Index("ix_kpi_daily_agent_code_jour", "agent_code", "jour"),)
@@ -1,6 +1,7 @@
 # backend/app/models/survey.py
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Enum, ForeignKey, ARRAY, Boolean, Index, cast, func
+from sqlalchemy.dialects.postgresql import JSONB
 from app.core.database import Base
 import enum
 
@@ -26,8 +27,9 @@ class SurveyData(Base):
     
     # IMPORTANT : UUID venant de CSPro. 
     # C'est ce qui empêche d'avoir des doublons si on relance le script de synchro 10 fois.
-    # Comment ça marche ? : Les questionnaires ont un identifiant unique, on vérifie à chaque 
-    # fois si cet UUID unique est déjà présent dans la base de données, si non, on peut.
+    # Comment ça marche ? : Les questionnaires ont un identifiant unique. Le script de synchro
+    # écrit par lots avec INSERT ... ON CONFLICT (questionnaire_uuid) DO UPDATE : c'est cet
+    # index unique qui détecte les doublons, sans SELECT préalable par questionnaire.
     questionnaire_uuid = Column(String, unique=True, index=True, nullable=False)
     
     # On stocke le code textuel (ex: "AG045") pour un couplage "lâche" avec la table User.
@@ -41,8 +43,16 @@ class SurveyData(Base):
     respondent_sex = Column(Enum(GenderEnum), default=GenderEnum.Inconnu)
     
     # Géolocalisation réelle (Où l'enquête a vraiment eu lieu)
+    # Index (longitude, latitude) : la carte lit les points tuile par tuile (voir services/map_clusters.py)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+
+    # Contrôle GPS, calculé par la synchro (index spatial des zones, voir services/geo.py)
+    # zone_id : zone de l'affectation, ou à défaut la zone trouvée autour du point GPS
+    zone_id = Column(Integer, ForeignKey("zones.id", ondelete="SET NULL"), nullable=True, index=True)
+    distance_zone_metres = Column(Float, nullable=True)
+    # None = pas de GPS, donc impossible de conclure
+    hors_zone = Column(Boolean, nullable=True)
     
     # Horodatage
     date_entretien = Column(DateTime, nullable=True) # Date déclarée dans la tablette
@@ -50,3 +60,24 @@ class SurveyData(Base):
     
     # Contrôle Qualité
     duree_minutes = Column(Integer, nullable=True)
+
+    # Quotas
+    # Affectation (mission contrôleur + zone) à laquelle le questionnaire est rattaché par la synchro
+    affectation_id = Column(Integer, ForeignKey("affectations.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    # Empreintes des règles de quota comptées pour ce questionnaire (voir QuotaCounter).
+    # On les garde pour pouvoir "décompter" proprement si le questionnaire revient modifié de CSPro.
+    regles_quota = Column(ARRAY(String), nullable=True)
+
+    # Toutes les réponses du questionnaire, {variable CSPro: code} (texte, listes pour les
+    # enregistrements répétés). Index GIN (jsonb_path_ops) : les conditions de quota sur
+    # n'importe quelle variable du dictionnaire (ETHNIE...) se comptent en SQL avec @>.
+    reponses = Column(JSONB, nullable=True)
+
+    __table_args__ = (
+        Index("ix_survey_data_lon_lat", "longitude", "latitude"),
+        Index("ix_survey_data_agent_code_date_entretien", "agent_code", "date_entretien"),
+        # Jour du questionnaire (même règle que kpi_daily) : l'export analytique relit un jour à la fois
+        Index("ix_survey_data_jour", cast(func.coalesce(date_entretien, date_synchro), Date)),
+        Index("ix_survey_data_reponses", "reponses", postgresql_using="gin", postgresql_ops={"reponses": "jsonb_path_ops"}),
+    )
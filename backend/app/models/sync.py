@@ -0,0 +1,38 @@
+# backend/app/models/sync.py
+
+from sqlalchemy import Column, String, BigInteger, DateTime, Text
+from app.core.database import Base
+
+class SyncState(Base):
+    """
+    État persistant du script de synchronisation CSPro -> Dashboard.
+    Une ligne par source CSPro (ex: "cspro").
+
+    Le "watermark" (ou marque de niveau haut) est la dernière révision CSPro
+    chargée avec succès. Il est mis à jour dans la MÊME transaction que le lot
+    d'enquêtes : si le script plante au milieu, on reprend exactement au dernier
+    lot validé, sans rien perdre et sans rien recharger deux fois.
+    """
+    __tablename__ = "sync_state"
+
+    # Nom logique de la source (une par serveur CSPro)
+    source = Column(String, primary_key=True)
+
+    # Dernière révision CSPro chargée (colonne 'revision' côté MySQL)
+    watermark = Column(BigInteger, nullable=False, default=0)
+
+    # uuid du dernier questionnaire chargé DANS cette révision : plusieurs questionnaires
+    # partagent une révision, la reprise se fait après le couple (watermark, watermark_uuid)
+    watermark_uuid = Column(String, nullable=False, default="", server_default="")
+
+    # Date du dernier lot validé (sert aussi à mesurer la fraîcheur des données)
+    derniere_maj = Column(DateTime, nullable=True)
+
+    # Suivi des exécutions (utile pour le CRON toutes les 15 min)
+    debut_dernier_run = Column(DateTime, nullable=True)
+    fin_dernier_run = Column(DateTime, nullable=True)
+    dernier_statut = Column(String, nullable=True) # "en_cours", "ok", "erreur"
+    derniere_erreur = Column(Text, nullable=True)
+
+    # Compteur cumulé des questionnaires chargés depuis cette source
+    lignes_total = Column(BigInteger, nullable=False, default=0)
@@ -35,7 +35,7 @@ class User(Base):
     # Le concept ici est Auto-jointure.
     # Un utilisateur pointe vers un autre utilisateur de la même table.
     # Exemple : L'Agent A (id=5) a pour chef le Contrôleur B (chef_id=2).
-    chef_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    chef_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True) # Indexé : parcours récursif des équipes
     
     # 'remote_side' est nécessaire pour dire à SQLAlchemy que c'est une boucle sur la même table.
     # subordonnes = relationship("User", backref="chef", remote_side=[id])
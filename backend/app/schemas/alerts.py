@@ -0,0 +1,20 @@
+# backend/app/schemas/alerts.py
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class AlertOut(BaseModel):
+    survey_id: int
+    questionnaire_uuid: str
+    agent_code: Optional[str] = None
+    status: Optional[str] = None
+    date_entretien: Optional[datetime] = None
+    regles: List[str]   # Ex: ["hors_zone", "duree"]
+    gravite: int        # 1 = faible, 2 = moyenne, 3 = forte
+
+    # Détails utiles pour juger l'alerte sans rouvrir le questionnaire
+    duree_minutes: Optional[int] = None
+    distance_zone_metres: Optional[float] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
@@ -38,3 +38,18 @@ class VariableOut(VariableBase):
     
     class Config:
         from_attributes = True
+
+# IMPORT D'UN DICTIONNAIRE CSPRO (.dcf)
+
+class DictionaryImportReport(BaseModel):
+    """Différences entre le .dcf et le dictionnaire existant (appliquées si applique=True)."""
+    variables_ajoutees: List[str] = []
+    variables_modifiees: List[str] = []   # Libellé ou type changé
+    variables_absentes: List[str] = []    # En base mais pas dans le .dcf
+    variables_supprimees: List[str] = []  # Absentes supprimées (option supprimer_absentes)
+    variables_inchangees: int = 0
+    modalites_ajoutees: int = 0
+    modalites_modifiees: int = 0
+    modalites_supprimees: int = 0
+    applique: bool = False
+    duree_ms: float = 0.0
@@ -14,7 +14,7 @@ class QuotaRule(BaseModel):
     description: Optional[str] = None # Ex: "Femmes Noires" (pour l'affichage)
     conditions: Dict[str, Any] # Le dictionnaire des critères (ex: SEXE: F)
     cible: int # Combien on en veut
-    actuel: int = 0 # Compteur temps réel
+    actuel: int = 0 # Compteur temps réel (rempli à la lecture depuis la table quota_counters)
 
 class QuotaConfig(BaseModel):
     """
@@ -22,6 +22,7 @@ class QuotaConfig(BaseModel):
     """
     type: str = "global" # "global" ou "croise"
     cible_globale: Optional[int] = None # Utilisé si type = "global"
+    actuel_global: int = 0 # Compteur temps réel de tous les questionnaires complets
     regles: List[QuotaRule] = [] # Utilisé si type = "croise"
 
 # Zones
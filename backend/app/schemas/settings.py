@@ -2,7 +2,7 @@
 
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
-from datetime import time
+from datetime import datetime, time
 
 class SettingsBase(BaseModel):
     check_gps: bool = True
@@ -21,6 +21,10 @@ class SettingsBase(BaseModel):
     check_vitesse: bool = True
     max_enquetes_par_jour: int = 20
 
+    check_rafale: bool = False
+    rafale_nombre: int = 5      # Ex: 5 enquêtes...
+    rafale_minutes: int = 30    # ... en moins de 30 minutes
+
     message_du_jour: Optional[str] = None
 
 class SettingsUpdate(SettingsBase):
@@ -28,6 +32,10 @@ class SettingsUpdate(SettingsBase):
 
 class SettingsOut(SettingsBase):
     id: int
+    # Dernière réévaluation des alertes après un changement de règles (lecture seule)
+    reevaluation_statut: Optional[str] = None
+    reevaluation_erreur: Optional[str] = None
+    reevaluation_maj: Optional[datetime] = None
     @field_validator('jours_interdits', mode='before')
     @classmethod
     def parse_jours_interdits(cls, v):
@@ -0,0 +1,44 @@
+# backend/app/schemas/stats.py
+
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from datetime import date
+
+class KpiSexe(BaseModel):
+    sexe: str
+    total: int
+    complets: int
+    taux_completion: Optional[float] = None # En %, None si aucun questionnaire
+
+class KpiJour(BaseModel):
+    jour: date
+    total: int
+    complets: int
+    partiels: int
+    refus: int
+    taux_completion: Optional[float] = None
+
+class KpiOut(BaseModel):
+    total: int
+    complets: int
+    partiels: int
+    refus: int
+    taux_completion: Optional[float] = None # complets / total
+
+    # Objectif = somme des quotas des affectations actives du périmètre
+    objectif: int
+    reste_a_faire: int
+    taux_realisation: Optional[float] = None # complets / objectif
+
+    par_sexe: List[KpiSexe] = []
+    par_jour: List[KpiJour] = []
+
+class CrosstabOut(BaseModel):
+    lignes: str   # Dimension en lignes (jour, agent, zone, statut, sexe, hors_zone, affectation)
+    colonnes: str # Dimension en colonnes
+    valeurs_lignes: List[Any] = []
+    valeurs_colonnes: List[Any] = []
+    cellules: List[List[int]] = [] # cellules[i][j] = questionnaires (valeurs_lignes[i], valeurs_colonnes[j])
+    total: int
+    source: str # "snapshot" (Parquet) ou "postgres"
+    snapshot_maj: Optional[str] = None # Dernier export du snapshot utilisé
@@ -1,7 +1,7 @@
 # backend/app/schemas/users.py
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from app.models.users import RoleEnum
 
 # SCHEMAS UTILISATEURS (DTO - Data Transfer Objects)
@@ -49,3 +49,27 @@ class UserUpdate(BaseModel):
     username: Optional[str] = None # Pour mettre le vrai nom (ex: "Kouadio")
     password: Optional[str] = None # Pour définir le mot de passe personnel
     chef_id: Optional[int] = None  # pour permettre de changer de chef après
+
+
+# 5. IMPORT EN MASSE (tableur de début de campagne)
+class UserImportRow(UserCreate):
+    """
+    Une ligne du fichier d'import. Le chef est désigné par son nom d'utilisateur ou son
+    code CSPro ('chef'), qu'il soit déjà en base ou créé plus haut dans le même fichier ;
+    'chef_id' reste accepté pour un chef existant.
+    """
+    chef: Optional[str] = None
+
+class UserImportError(BaseModel):
+    ligne: int # Numéro de ligne dans le fichier (en-tête compris pour un CSV)
+    username: Optional[str] = None
+    erreurs: List[str]
+
+class UserImportReport(BaseModel):
+    lignes: int = 0
+    crees: int = 0
+    par_role: Dict[str, int] = {}
+    erreurs: List[UserImportError] = []
+    applique: bool = False # False si erreurs (rien n'est créé) ou dry_run
+    duree_ms: float = 0.0
+    hachage_ms: float = 0.0 # Dont le calcul des hash bcrypt
@@ -0,0 +1,378 @@
+# backend/app/services/alerts.py
+
+"""
+Alertes qualité / fraude, précalculées.
+
+Les règles du Directeur (GlobalSettings) sont évaluées :
+- par la synchro, pour chaque lot (questionnaires du lot + journées des agents concernés,
+  car les règles de vitesse et de rafale dépendent des autres questionnaires de la journée) ;
+- après une modification des paramètres, uniquement sur les questionnaires que le
+  changement peut faire basculer (ex: durée minimale 10 -> 15 : ceux de moins de 15 min).
+
+L'évaluation se fait en SQL, en une requête, et écrit survey_alerts :
+INSERT ... ON CONFLICT pour les questionnaires suspects, DELETE pour ceux qui ne le sont plus.
+GET /alerts n'a plus qu'à lire cette table par son index.
+"""
+
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.settings import GlobalSettings
+from app.services.analytics import JOUR_SQL
+
+# Bits du masque survey_alerts.regles
+HORS_ZONE = 1
+DUREE = 2
+HEURE = 4
+JOUR = 8
+VITESSE = 16
+RAFALE = 32 # Ex: 5 questionnaires en moins de 30 minutes
+
+NOMS_REGLES = {
+    HORS_ZONE: "hors_zone",
+    DUREE: "duree",
+    HEURE: "heure",
+    JOUR: "jour",
+    VITESSE: "vitesse",
+    RAFALE: "rafale",
+}
+BITS_PAR_NOM = {nom: bit for bit, nom in NOMS_REGLES.items()}
+
+# Gravité d'une alerte = celle de la règle la plus grave enfreinte
+GRAVITE_FORTE = HORS_ZONE | VITESSE | RAFALE # Soupçon de fraude
+GRAVITE_MOYENNE = DUREE              # Questionnaire bâclé
+GRAVITE_SQL = f"CASE WHEN regles & {GRAVITE_FORTE} <> 0 THEN 3 WHEN regles & {GRAVITE_MOYENNE} <> 0 THEN 2 ELSE 1 END"
+
+# Jours interdits (texte saisi par le Directeur) -> jour ISO (lundi = 1 ... dimanche = 7)
+JOURS_ISO = {"lundi": 1, "mardi": 2, "mercredi": 3, "jeudi": 4, "vendredi": 5, "samedi": 6, "dimanche": 7}
+
+
+def decode_regles(masque: int) -> List[str]:
+    return [nom for bit, nom in NOMS_REGLES.items() if masque & bit]
+
+def _normalise(jour: str) -> str:
+    sans_accents = unicodedata.normalize("NFKD", jour).encode("ascii", "ignore").decode()
+    return sans_accents.strip().lower()
+
+def parse_jours(valeur: Optional[str]) -> FrozenSet[int]:
+    """"Samedi,Dimanche" -> {6, 7}. Les noms inconnus sont ignorés."""
+    jours = (valeur or "").split(",")
+    return frozenset(JOURS_ISO[_normalise(j)] for j in jours if _normalise(j) in JOURS_ISO)
+
+
+@dataclass(frozen=True)
+class AlertRules:
+    """Photo des règles actives (seuls les champs utiles à l'évaluation)."""
+    check_gps: bool = True
+    tolerance_gps_metres: int = 500
+    check_duree: bool = True
+    min_duree_minutes: int = 10
+    check_heure: bool = False
+    heure_debut: Optional[time] = None
+    heure_fin: Optional[time] = None
+    check_jours: bool = False
+    jours_interdits: FrozenSet[int] = frozenset()
+    check_vitesse: bool = True
+    max_enquetes_par_jour: int = 20
+    check_rafale: bool = False
+    rafale_nombre: int = 5
+    rafale_minutes: int = 30
+
+    @classmethod
+    def from_settings(cls, settings: Optional[GlobalSettings]) -> "AlertRules":
+        if settings is None:
+            return cls(jours_interdits=parse_jours("Dimanche"))
+        return cls(
+            check_gps=bool(settings.check_gps),
+            tolerance_gps_metres=settings.tolerance_gps_metres or 500,
+            check_duree=bool(settings.check_duree),
+            min_duree_minutes=settings.min_duree_minutes or 0,
+            check_heure=bool(settings.check_heure),
+            heure_debut=settings.heure_debut_travail,
+            heure_fin=settings.heure_fin_travail,
+            check_jours=bool(settings.check_jours),
+            jours_interdits=parse_jours(settings.jours_interdits),
+            check_vitesse=bool(settings.check_vitesse),
+            max_enquetes_par_jour=settings.max_enquetes_par_jour or 0,
+            check_rafale=bool(settings.check_rafale),
+            rafale_nombre=settings.rafale_nombre or 0,
+            rafale_minutes=settings.rafale_minutes or 0,
+        )
+
+    @property
+    def par_journee(self) -> bool:
+        """Une règle dépend-elle des autres questionnaires de la journée de l'agent ?"""
+        return self.check_vitesse or self.rafale_active
+
+    @property
+    def rafale_active(self) -> bool:
+        return self.check_rafale and self.rafale_nombre > 1 and self.rafale_minutes > 0
+
+    @classmethod
+    def load(cls, db: Session) -> "AlertRules":
+        return cls.from_settings(db.query(GlobalSettings).first())
+
+    def mask_sql(self, params: Dict[str, Any]) -> str:
+        """
+        Expression SQL du masque pour un questionnaire 's' de survey_data.
+        Une règle désactivée ne coûte rien : elle n'apparaît pas dans l'expression.
+        """
+        parts = []
+        if self.check_gps:
+            parts.append(f"CASE WHEN s.hors_zone THEN {HORS_ZONE} ELSE 0 END")
+        if self.check_duree:
+            params["min_duree"] = self.min_duree_minutes
+            parts.append(f"CASE WHEN s.duree_minutes < :min_duree THEN {DUREE} ELSE 0 END")
+        if self.check_heure and (self.heure_debut or self.heure_fin):
+            # Heure 00:00:00 pile = heure de début absente dans CSPro : on ne conclut pas
+            hors_horaires = []
+            if self.heure_debut:
+                params["heure_debut"] = self.heure_debut
+                hors_horaires.append("CAST(s.date_entretien AS time) < :heure_debut")
+            if self.heure_fin:
+                params["heure_fin"] = self.heure_fin
+                hors_horaires.append("CAST(s.date_entretien AS time) > :heure_fin")
+            parts.append(
+                f"CASE WHEN CAST(s.date_entretien AS time) <> '00:00' AND ({' OR '.join(hors_horaires)}) "
+                f"THEN {HEURE} ELSE 0 END"
+            )
+        if self.check_jours and self.jours_interdits:
+            params["jours_interdits"] = sorted(self.jours_interdits)
+            parts.append(f"CASE WHEN CAST(EXTRACT(ISODOW FROM s.date_entretien) AS int) = ANY(:jours_interdits) THEN {JOUR} ELSE 0 END")
+        if self.check_vitesse:
+            # Nombre de questionnaires de l'agent ce jour-là : lu dans les agrégats kpi_daily
+            params["max_jour"] = self.max_enquetes_par_jour
+            parts.append(f"""CASE WHEN s.agent_code IS NOT NULL AND s.date_entretien IS NOT NULL AND (
+                SELECT sum(k.nombre) FROM kpi_daily k
+                WHERE k.agent_code = s.agent_code AND k.jour = CAST(s.date_entretien AS date)
+            ) > :max_jour THEN {VITESSE} ELSE 0 END""")
+        if self.rafale_active:
+            parts.append(f"CASE WHEN r.en_rafale THEN {RAFALE} ELSE 0 END")
+        return " | ".join(parts) if parts else "0"
+
+    def burst_sql(self, params: Dict[str, Any]) -> str:
+        """
+        CTE 'rafales' : questionnaires faisant partie d'une rafale, i.e. d'une fenêtre de
+        rafale_minutes contenant au moins rafale_nombre questionnaires du même agent.
+
+        On ne lit que les journées des agents ciblés (± la fenêtre, pour les rafales à cheval
+        sur minuit), via l'index (agent_code, date_entretien) : le coût dépend du nombre de
+        journées touchées, pas de la taille de l'historique. Deux fonctions de fenêtre :
+        1. 'debut' : la fenêtre qui commence à ce questionnaire contient assez de questionnaires ;
+        2. 'en_rafale' : un début de rafale se trouve dans les rafale_minutes précédentes.
+        """
+        params["rafale_nombre"] = self.rafale_nombre
+        params["rafale_fenetre"] = timedelta(minutes=self.rafale_minutes)
+        return """,
+        journees AS (
+            SELECT DISTINCT s.agent_code, CAST(s.date_entretien AS date) AS jour
+            FROM survey_data s JOIN cibles c ON c.id = s.id
+            WHERE s.agent_code IS NOT NULL AND s.date_entretien IS NOT NULL
+        ),
+        contexte AS (
+            SELECT DISTINCT s.id, j.agent_code, s.date_entretien
+            FROM journees j CROSS JOIN LATERAL (
+                SELECT id, date_entretien FROM survey_data
+                WHERE agent_code = j.agent_code
+                  AND date_entretien >= j.jour - CAST(:rafale_fenetre AS interval)
+                  AND date_entretien < j.jour + 1 + CAST(:rafale_fenetre AS interval)
+                OFFSET 0
+            ) s
+        ),
+        debuts AS (
+            SELECT id, agent_code, date_entretien,
+                   count(*) OVER (PARTITION BY agent_code ORDER BY date_entretien
+                                  RANGE BETWEEN CURRENT ROW AND CAST(:rafale_fenetre AS interval) FOLLOWING) >= :rafale_nombre AS debut
+            FROM contexte
+        ),
+        rafales AS (
+            SELECT id,
+                   bool_or(debut) OVER (PARTITION BY agent_code ORDER BY date_entretien
+                                        RANGE BETWEEN CAST(:rafale_fenetre AS interval) PRECEDING AND CURRENT ROW) AS en_rafale
+            FROM debuts
+        )"""
+
+
+# ÉVALUATION
+
+def evaluate(db: Session, rules: AlertRules, cibles_sql: str, params: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Évalue les règles pour les questionnaires dont les ids sont renvoyés par 'cibles_sql'
+    et met survey_alerts à jour en une requête. Renvoie (alertes écrites, alertes levées).
+    """
+    params = dict(params)
+    masque = rules.mask_sql(params)
+    rafales, jointure = "", ""
+    if rules.rafale_active:
+        rafales = rules.burst_sql(params)
+        jointure = "LEFT JOIN rafales r ON r.id = s.id"
+    row = db.execute(text(f"""
+        WITH cibles AS ({cibles_sql}){rafales},
+        calc AS (
+            SELECT s.id, s.agent_code, ({masque}) AS regles
+            FROM survey_data s JOIN cibles c ON c.id = s.id {jointure}
+        ),
+        ecrites AS (
+            INSERT INTO survey_alerts (survey_id, agent_code, regles, gravite, derniere_maj)
+            SELECT id, agent_code, regles, {GRAVITE_SQL}, now() FROM calc WHERE regles <> 0
+            ON CONFLICT (survey_id) DO UPDATE
+            SET agent_code = EXCLUDED.agent_code, regles = EXCLUDED.regles,
+                gravite = EXCLUDED.gravite, derniere_maj = EXCLUDED.derniere_maj
+            WHERE survey_alerts.regles <> EXCLUDED.regles
+               OR survey_alerts.agent_code IS DISTINCT FROM EXCLUDED.agent_code
+            RETURNING 1
+        ),
+        levees AS (
+            DELETE FROM survey_alerts a USING calc
+            WHERE a.survey_id = calc.id AND calc.regles = 0
+            RETURNING 1
+        )
+        SELECT (SELECT count(*) FROM ecrites), (SELECT count(*) FROM levees)
+    """), params).one()
+    return int(row[0]), int(row[1])
+
+def evaluate_batch(db: Session, rules: AlertRules, uuids: List[str], agent_days: Iterable[Tuple[str, date]]) -> Tuple[int, int]:
+    """
+    Étape de la synchro : questionnaires du lot, plus (si une règle "à la journée" est active)
+    tous ceux des journées d'agents touchées par le lot, dont le compte du jour a pu changer.
+    """
+    if not uuids:
+        return 0, 0
+    params: Dict[str, Any] = {"uuids": uuids}
+    cibles = "SELECT id FROM survey_data WHERE questionnaire_uuid = ANY(:uuids)"
+    agent_days = sorted(set(agent_days))
+    if rules.par_journee and agent_days:
+        params["agents"] = [agent for agent, _ in agent_days]
+        params["jours"] = [jour for _, jour in agent_days]
+        # LATERAL (OFFSET 0 : non aplatie) : une lecture de l'index (agent_code, date_entretien)
+        # par journée. En jointure simple, PostgreSQL surestime les lignes par journée et
+        # parcourt toute la table.
+        cibles += """
+            UNION
+            SELECT s.id
+            FROM unnest(CAST(:agents AS varchar[]), CAST(:jours AS date[])) AS j(agent, jour)
+            CROSS JOIN LATERAL (
+                SELECT id FROM survey_data
+                WHERE agent_code = j.agent AND date_entretien >= j.jour AND date_entretien < j.jour + 1
+                OFFSET 0
+            ) s
+        """
+    return evaluate(db, rules, cibles, params)
+
+def agent_days(rows: Iterable[Dict[str, Any]]) -> Set[Tuple[str, date]]:
+    """Journées (agent, jour) des questionnaires, pour les règles de vitesse et de rafale."""
+    jours = set()
+    for row in rows:
+        if row.get("agent_code") and row.get("date_entretien"):
+            jours.add((row["agent_code"], row["date_entretien"].date()))
+    return jours
+
+def rebuild_alerts(db: Session) -> int:
+    """Réévaluation complète (après un rattrapage de données). Renvoie le nombre d'alertes."""
+    db.execute(text("DELETE FROM survey_alerts"))
+    ecrites, _ = evaluate(db, AlertRules.load(db), "SELECT id FROM survey_data", {})
+    return ecrites
+
+
+# CHANGEMENT DES PARAMÈTRES
+
+def _changed(old: AlertRules, new: AlertRules, check: str, *fields: str) -> bool:
+    """La règle change-t-elle d'effet ? (deux règles désactivées sont équivalentes)"""
+    if not getattr(old, check) and not getattr(new, check):
+        return False
+    return any(getattr(old, f) != getattr(new, f) for f in (check,) + fields)
+
+def reevaluate_after_settings_change(db: Session, old: AlertRules, new: AlertRules,
+                                     jours: Optional[Set[date]] = None, complet: bool = False) -> Tuple[int, int]:
+    """
+    Réévalue uniquement les questionnaires que le changement peut faire basculer,
+    plus ceux qui portent déjà une alerte pour une règle modifiée.
+    'jours' (si fourni) reçoit les jours dont hors_zone a été réécrit, à réexporter
+    dans le snapshot analytique après le commit (services/analytics.py).
+    complet=True (la réévaluation précédente a échoué) : hors_zone et toutes les alertes
+    sont recalculés avec les nouvelles règles.
+    """
+    cibles: List[str] = []
+    params: Dict[str, Any] = {}
+    bits_modifies = 0
+
+    if complet or old.tolerance_gps_metres != new.tolerance_gps_metres:
+        # La tolérance globale sert de rayon aux zones sans rayon propre : on recalcule hors_zone.
+        # Même règle que ZoneIndex.from_zones (services/geo.py) : un rayon à 0 vaut "pas de rayon".
+        params["tolerance"] = new.tolerance_gps_metres
+        modifies = db.execute(text(f"""
+            UPDATE survey_data s SET hors_zone = s.distance_zone_metres > :tolerance
+            FROM zones z
+            WHERE z.id = s.zone_id AND COALESCE(z.rayon_tolerance_metres, 0) = 0 AND s.distance_zone_metres IS NOT NULL
+              AND s.hors_zone IS DISTINCT FROM (s.distance_zone_metres > :tolerance)
+            RETURNING {JOUR_SQL}
+        """), params).scalars()
+        if jours is not None:
+            jours.update(j for j in modifies if j is not None)
+        cibles.append("""
+            SELECT s.id FROM survey_data s JOIN zones z ON z.id = s.zone_id
+            WHERE COALESCE(z.rayon_tolerance_metres, 0) = 0 AND s.distance_zone_metres IS NOT NULL
+        """)
+    if _changed(old, new, "check_gps", "tolerance_gps_metres"):
+        bits_modifies |= HORS_ZONE
+        cibles.append("SELECT id FROM survey_data WHERE hors_zone")
+
+    if _changed(old, new, "check_duree", "min_duree_minutes"):
+        bits_modifies |= DUREE
+        params["duree_seuil"] = max(old.min_duree_minutes, new.min_duree_minutes)
+        cibles.append("SELECT id FROM survey_data WHERE duree_minutes < :duree_seuil")
+
+    if _changed(old, new, "check_heure", "heure_debut", "heure_fin"):
+        bits_modifies |= HEURE
+        debuts = [h for h in (old.heure_debut, new.heure_debut) if h]
+        fins = [h for h in (old.heure_fin, new.heure_fin) if h]
+        bornes = []
+        if debuts:
+            params["heure_debut_max"] = max(debuts)
+            bornes.append("CAST(date_entretien AS time) < :heure_debut_max")
+        if fins:
+            params["heure_fin_min"] = min(fins)
+            bornes.append("CAST(date_entretien AS time) > :heure_fin_min")
+        if bornes:
+            cibles.append(f"SELECT id FROM survey_data WHERE {' OR '.join(bornes)}")
+
+    if _changed(old, new, "check_jours", "jours_interdits"):
+        bits_modifies |= JOUR
+        params["jours_touches"] = sorted(old.jours_interdits | new.jours_interdits)
+        cibles.append("SELECT id FROM survey_data WHERE CAST(EXTRACT(ISODOW FROM date_entretien) AS int) = ANY(:jours_touches)")
+
+    if _changed(old, new, "check_vitesse", "max_enquetes_par_jour"):
+        bits_modifies |= VITESSE
+        params["vitesse_seuil"] = min(old.max_enquetes_par_jour, new.max_enquetes_par_jour)
+        cibles.append("""
+            SELECT s.id FROM survey_data s
+            JOIN (
+                SELECT agent_code, jour FROM kpi_daily GROUP BY agent_code, jour HAVING sum(nombre) > :vitesse_seuil
+            ) d ON s.agent_code = d.agent_code AND s.date_entretien >= d.jour AND s.date_entretien < d.jour + 1
+        """)
+
+    if _changed(old, new, "check_rafale", "rafale_nombre", "rafale_minutes"):
+        bits_modifies |= RAFALE
+        # Une rafale suppose au moins rafale_nombre questionnaires dans la journée
+        # (à une rafale à cheval sur minuit près, rattrapée au lot suivant de l'agent)
+        params["rafale_seuil"] = min(old.rafale_nombre, new.rafale_nombre)
+        cibles.append("""
+            SELECT s.id FROM survey_data s
+            JOIN (
+                SELECT agent_code, jour FROM kpi_daily GROUP BY agent_code, jour HAVING sum(nombre) >= :rafale_seuil
+            ) d ON s.agent_code = d.agent_code AND s.date_entretien >= d.jour AND s.date_entretien < d.jour + 1
+        """)
+
+    if complet:
+        return rebuild_alerts(db), 0
+    if not bits_modifies and not cibles:
+        return 0, 0
+    if bits_modifies:
+        params["bits_modifies"] = bits_modifies
+        cibles.append("SELECT survey_id FROM survey_alerts WHERE regles & :bits_modifies <> 0")
+    return evaluate(db, new, " UNION ".join(cibles), params)
@@ -0,0 +1,282 @@
+# backend/app/services/analytics.py
+
+"""
+Photo (snapshot) analytique de survey_data, en colonnes (Parquet), pour les tableaux croisés.
+
+Les croisements à la demande (jour x statut, agent x sexe, zone x hors zone...) ne peuvent
+pas tous être précalculés comme kpi_daily, et un GROUP BY sur des millions de lignes de
+survey_data (stockage en lignes) lit toute la table à chaque appel. On tient donc à côté une
+copie en colonnes, compressée (zstd), découpée par jour :
+
+    ANALYTICS_DIR/jour=2026-03-01/part-0.parquet
+    ANALYTICS_DIR/_etat.json                      (version, dates des dernières mises à jour)
+
+1. EXPORT : à la fin de chaque run de synchro, seuls les jours touchés par le run (jour
+   actuel ET ancien jour des questionnaires modifiés) sont réécrits : une requête COPY par
+   jour (index ix_survey_data_jour), fichier écrit à côté puis renommé (les lecteurs ne voient
+   jamais un fichier à moitié écrit). Sans _etat.json (premier export, changement de format),
+   tout est reconstruit. Reconstruction manuelle : scripts/rebuild_counters.py analytique.
+2. LECTURE : crosstab() ne lit que les colonnes utiles, et les filtres sont poussés au
+   lecteur Parquet : les bornes de dates écartent des dossiers entiers (partitions), les
+   filtres agent / zone / statut s'appliquent pendant la lecture, sur des fichiers triés par agent.
+   Sans snapshot (pyarrow absent, ANALYTICS_DIR non défini, photo pas encore faite), ou pour
+   un petit périmètre (un agent, une équipe), le même tableau est calculé par PostgreSQL.
+
+Le snapshot a le retard de la dernière synchro (au plus SYNC_INTERVAL_MINUTES), comme kpi_daily.
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import Date, String, cast, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.survey import SurveyData
+from app.services.scoping import Scope
+
+# Le format colonnes est optionnel : sans pyarrow, les tableaux croisés passent par PostgreSQL.
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR") # Ex: /var/lib/osm/analytique (non défini = pas de snapshot)
+VERSION = 1 # À incrémenter si les colonnes changent : le prochain export reconstruit tout
+ETAT = "_etat.json" # Préfixe "_" : ignoré par le lecteur Parquet
+# Périmètre de moins de N agents : l'index agent_code de PostgreSQL est plus rapide que la
+# lecture de toutes les partitions (scripts/bench_crosstab.py)
+ANALYTICS_AGENTS_POSTGRES = int(os.getenv("ANALYTICS_AGENTS_POSTGRES", "50"))
+
+# Jour d'un questionnaire : celui de l'entretien, à défaut celui de la réception (comme kpi_daily)
+JOUR_SQL = "CAST(COALESCE(date_entretien, date_synchro) AS date)"
+_jour = cast(func.coalesce(SurveyData.date_entretien, SurveyData.date_synchro), Date)
+
+# Dimensions des tableaux croisés : colonne du snapshot, expression PostgreSQL équivalente
+DIMENSIONS = {
+    "jour": ("jour", _jour),
+    "agent": ("agent_code", SurveyData.agent_code),
+    "zone": ("zone_id", SurveyData.zone_id),
+    "statut": ("statut", cast(SurveyData.status, String)),
+    "sexe": ("sexe", cast(SurveyData.respondent_sex, String)),
+    "hors_zone": ("hors_zone", SurveyData.hors_zone),
+    "affectation": ("affectation_id", SurveyData.affectation_id),
+}
+
+_COLONNES_SQL = f"""
+    SELECT id, agent_code, zone_id, CAST(status AS text) AS statut, CAST(respondent_sex AS text) AS sexe,
+           hors_zone, duree_minutes, date_entretien, affectation_id
+    FROM survey_data
+    WHERE {JOUR_SQL} = %s
+    ORDER BY agent_code, zone_id
+"""
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ("id", pa.int64()),
+        ("agent_code", pa.string()),
+        ("zone_id", pa.int32()),
+        ("statut", pa.string()),
+        ("sexe", pa.string()),
+        ("hors_zone", pa.bool_()),
+        ("duree_minutes", pa.int32()),
+        ("date_entretien", pa.timestamp("us")),
+        ("affectation_id", pa.int32()),
+    ])
+    _CSV_OPTIONS = pa_csv.ConvertOptions(
+        column_types=SCHEMA, true_values=["t"], false_values=["f"],
+        strings_can_be_null=True, quoted_strings_can_be_null=False, # NULL = vide, '' = ""
+    )
+    _PARTITIONS = ds.partitioning(pa.schema([("jour", pa.date32())]), flavor="hive")
+
+
+def disponible() -> bool:
+    return pa is not None and bool(ANALYTICS_DIR)
+
+def jours_touches(rows: Iterable[Dict[str, Any]]) -> Set[date]:
+    """Jours (règle de JOUR_SQL) des questionnaires d'un lot, ou de leur état précédent."""
+    jours = set()
+    for row in rows:
+        value = row.get("date_entretien") or row.get("date_synchro")
+        if isinstance(value, datetime):
+            jours.add(value.date())
+        elif isinstance(value, date):
+            jours.add(value)
+    return jours
+
+
+# 1. EXPORT
+
+def _lire_etat() -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(ANALYTICS_DIR, ETAT)) as f:
+            etat = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return etat if etat.get("version") == VERSION else None
+
+def _ecrire_etat(etat: Dict[str, Any]) -> None:
+    chemin = os.path.join(ANALYTICS_DIR, ETAT)
+    with open(chemin + ".tmp", "w") as f:
+        json.dump(etat, f)
+    os.replace(chemin + ".tmp", chemin)
+
+def _export_day(db: Session, jour: date) -> int:
+    """Réécrit la partition d'un jour à partir de survey_data. Renvoie son nombre de lignes."""
+    dossier = os.path.join(ANALYTICS_DIR, f"jour={jour.isoformat()}")
+    buf = io.BytesIO()
+    with db.connection().connection.cursor() as cur:
+        cur.copy_expert(cur.mogrify(f"COPY ({_COLONNES_SQL}) TO STDOUT WITH (FORMAT csv, HEADER)", (jour,)).decode(), buf)
+    buf.seek(0)
+    table = pa_csv.read_csv(buf, convert_options=_CSV_OPTIONS)
+    if table.num_rows == 0:
+        # Plus aucun questionnaire ce jour-là (date d'entretien corrigée)
+        shutil.rmtree(dossier, ignore_errors=True)
+        return 0
+    os.makedirs(dossier, exist_ok=True)
+    tmp = os.path.join(dossier, ".part-0.parquet.tmp") # Préfixe "." : ignoré par le lecteur
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, os.path.join(dossier, "part-0.parquet"))
+    return table.num_rows
+
+def refresh_snapshot(db: Session, jours: Optional[Iterable[date]] = None) -> int:
+    """
+    Réécrit les partitions des 'jours' donnés, ou tout le snapshot (jours=None, ou pas encore
+    de snapshot valide). Renvoie le nombre de lignes exportées.
+    """
+    if not disponible():
+        raise RuntimeError("Snapshot analytique indisponible : installer pyarrow et définir ANALYTICS_DIR.")
+    os.makedirs(ANALYTICS_DIR, exist_ok=True)
+
+    # Deux synchros (sources différentes) peuvent finir en même temps : une seule écrit,
+    # sinon la plus lente pourrait remettre un jour plus ancien. Libéré au commit ci-dessous.
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('osm_analytique'))"))
+    try:
+        etat = _lire_etat()
+        complet = jours is None or etat is None
+        if complet:
+            jours = set(db.execute(text(f"SELECT DISTINCT {JOUR_SQL} FROM survey_data WHERE {JOUR_SQL} IS NOT NULL")).scalars())
+            # Partitions de jours qui n'existent plus
+            for nom in os.listdir(ANALYTICS_DIR):
+                if nom.startswith("jour=") and date.fromisoformat(nom[5:]) not in jours:
+                    shutil.rmtree(os.path.join(ANALYTICS_DIR, nom), ignore_errors=True)
+
+        lignes = sum(_export_day(db, jour) for jour in sorted(jours))
+
+        maintenant = datetime.now().isoformat(timespec="seconds")
+        etat = etat or {"version": VERSION}
+        etat["maj"] = maintenant
+        if complet:
+            etat["reconstruction"] = maintenant
+        _ecrire_etat(etat)
+    except Exception:
+        db.rollback()
+        # Des jours n'ont pas été réécrits : plus de snapshot (PostgreSQL répond) jusqu'à la
+        # reconstruction complète, faite par le prochain export
+        try:
+            os.remove(os.path.join(ANALYTICS_DIR, ETAT))
+        except OSError:
+            pass
+        raise
+    db.commit()
+    logger.info("Snapshot analytique : %d jour(s), %d lignes exportées%s",
+                len(jours), lignes, " (reconstruction complète)" if complet else "")
+    return lignes
+
+def snapshot_stats() -> dict:
+    etat = _lire_etat() if disponible() else None
+    return {"actif": etat is not None, "maj": etat.get("maj") if etat else None,
+            "reconstruction": etat.get("reconstruction") if etat else None}
+
+
+# 2. LECTURE (API)
+
+def _crosstab_snapshot(lignes: str, colonnes: str, scope: Scope, filtres: Dict[str, Any]) -> Dict[tuple, int]:
+    cles = [DIMENSIONS[lignes][0], DIMENSIONS[colonnes][0]]
+    conditions = []
+    if filtres.get("debut") is not None:
+        conditions.append(pc.field("jour") >= filtres["debut"])
+    if filtres.get("fin") is not None:
+        conditions.append(pc.field("jour") <= filtres["fin"])
+    if filtres.get("zone_id") is not None:
+        conditions.append(pc.field("zone_id") == filtres["zone_id"])
+    if filtres.get("statut") is not None:
+        conditions.append(pc.field("statut") == filtres["statut"])
+    if filtres.get("agent_code") is not None:
+        conditions.append(pc.field("agent_code") == filtres["agent_code"])
+    elif not scope.illimite:
+        conditions.append(pc.field("agent_code").isin(list(scope.codes)))
+    filtre = None
+    for condition in conditions:
+        filtre = condition if filtre is None else filtre & condition
+
+    dataset = ds.dataset(ANALYTICS_DIR, format="parquet", partitioning=_PARTITIONS)
+    table = dataset.to_table(columns=sorted(set(cles)), filter=filtre)
+    compte = table.group_by(cles).aggregate([([], "count_all")])
+    return {(r[cles[0]], r[cles[1]]): r["count_all"] for r in compte.to_pylist()}
+
+def _crosstab_postgres(db: Session, lignes: str, colonnes: str, scope: Scope, filtres: Dict[str, Any]) -> Dict[tuple, int]:
+    ligne, colonne = DIMENSIONS[lignes][1], DIMENSIONS[colonnes][1]
+    query = select(ligne, colonne, func.count()).where(_jour.isnot(None)).group_by(ligne, colonne)
+    if filtres.get("debut") is not None:
+        query = query.where(_jour >= filtres["debut"])
+    if filtres.get("fin") is not None:
+        query = query.where(_jour <= filtres["fin"])
+    if filtres.get("zone_id") is not None:
+        query = query.where(SurveyData.zone_id == filtres["zone_id"])
+    if filtres.get("statut") is not None:
+        query = query.where(cast(SurveyData.status, String) == filtres["statut"])
+    if filtres.get("agent_code") is not None:
+        query = query.where(SurveyData.agent_code == filtres["agent_code"])
+    elif not scope.illimite:
+        query = query.where(scope.agent_filter(SurveyData.agent_code))
+    return {(l, c): n for l, c, n in db.execute(query).all()}
+
+def _ordre(valeur):
+    return (valeur is None, valeur)
+
+def crosstab(db: Session, scope: Scope, lignes: str, colonnes: str, source: Optional[str] = None,
+             **filtres) -> Dict[str, Any]:
+    """
+    Tableau croisé (nombre de questionnaires) 'lignes' x 'colonnes' (clés de DIMENSIONS),
+    limité au périmètre. source : "snapshot", "postgres" ou None (choix selon le périmètre).
+    Les filtres (debut, fin, zone_id, statut, agent_code) sont les mêmes pour les deux moteurs.
+    """
+    if source is None:
+        petit = filtres.get("agent_code") is not None or (
+            not scope.illimite and len(scope.codes) < ANALYTICS_AGENTS_POSTGRES)
+        source = "postgres" if petit else "snapshot"
+    comptes = None
+    etat = _lire_etat() if disponible() else None
+    if source != "postgres" and etat is not None:
+        try:
+            comptes = _crosstab_snapshot(lignes, colonnes, scope, filtres)
+        except (pa.ArrowException, OSError):
+            # Partition remplacée pendant la lecture... : PostgreSQL répond cette fois-ci
+            logger.warning("Lecture du snapshot analytique impossible, calcul par PostgreSQL", exc_info=True)
+    if comptes is None:
+        comptes = _crosstab_postgres(db, lignes, colonnes, scope, filtres)
+        source = "postgres"
+
+    valeurs_lignes = sorted({l for l, _ in comptes}, key=_ordre)
+    valeurs_colonnes = sorted({c for _, c in comptes}, key=_ordre)
+    return {
+        "lignes": lignes,
+        "colonnes": colonnes,
+        "valeurs_lignes": valeurs_lignes,
+        "valeurs_colonnes": valeurs_colonnes,
+        "cellules": [[comptes.get((l, c), 0) for c in valeurs_colonnes] for l in valeurs_lignes],
+        "total": sum(comptes.values()),
+        "source": source,
+        "snapshot_maj": etat["maj"] if source == "snapshot" else None,
+    }
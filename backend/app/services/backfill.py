@@ -0,0 +1,283 @@
+# backend/app/services/backfill.py
+
+"""
+Rattrapage massif (backfill) : chargement de l'historique d'une source CSPro, par exemple
+quand une campagne déjà commencée rejoint le dashboard (des centaines de milliers de
+questionnaires d'un coup).
+
+La synchro incrémentale (services/sync.py) écrit lot par lot et met à jour au passage les
+compteurs, les KPI, les alertes et le flux en direct : c'est fait pour quelques centaines
+de questionnaires toutes les 15 minutes, pas pour l'historique complet. Ici :
+
+1. Les lots sont préparés comme par la synchro (transformation, quotas, contrôle GPS), puis
+   envoyés par COPY au format binaire dans une table temporaire (jamais écrite dans le WAL,
+   supprimée au commit) : ni SQL à analyser, ni texte à reconvertir côté serveur.
+2. Un SEUL INSERT ... SELECT ... ON CONFLICT fusionne la table temporaire dans survey_data
+   (la révision la plus récente gagne quand un questionnaire apparaît plusieurs fois).
+3. En option (drop_indexes), les index secondaires de survey_data sont supprimés avant la
+   fusion puis reconstruits en une passe (plus rapide que de les tenir à jour ligne à ligne).
+   L'index unique sur questionnaire_uuid reste : c'est lui qui détecte les doublons.
+   Attention : la table est verrouillée pour tous (y compris l'API) jusqu'au commit.
+4. Les compteurs (quotas, KPI, alertes) sont recalculés en entier, puis le watermark avance :
+   tout est dans la même transaction, un rattrapage interrompu ne laisse rien à moitié.
+   De la fusion au commit, le verrou des compteurs est pris en exclusif (quotas.lock_counters) :
+   les lots des autres sources attendent, sinon leurs écarts seraient perdus ou comptés deux fois.
+
+    python scripts/sync_cspro.py --fichier historique.json --backfill [--sans-index]
+"""
+
+import enum
+import io
+import json
+import logging
+import os
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import ARRAY, Boolean, DateTime, Enum, Float, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.models.survey import SurveyData
+from app.services import analytics
+from app.services.alerts import rebuild_alerts
+from app.services.kpi import rebuild_kpi
+from app.services.quotas import lock_counters, rebuild_counters
+from app.services.sync import (
+    UPSERT_COLUMNS, SyncContext, SyncReport,
+    _clean, _prepare_batch, get_sync_state, source_lock,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pas de limite de paramètres avec COPY : des lots plus gros que la synchro (moins d'allers-retours)
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "10000"))
+# Mémoire de tri pour la reconstruction des index (SET LOCAL, le temps du rattrapage)
+BACKFILL_MAINTENANCE_WORK_MEM = os.getenv("BACKFILL_MAINTENANCE_WORK_MEM", "512MB")
+
+STAGING_TABLE = "survey_backfill"
+STAGING_COLUMNS = ["questionnaire_uuid", *UPSERT_COLUMNS]
+
+
+# 1. FORMAT BINAIRE DE COPY
+# Chaque ligne : nombre de colonnes (int16), puis pour chaque valeur sa longueur (int32,
+# -1 pour NULL) et sa représentation binaire PostgreSQL (entiers et flottants big-endian...).
+
+_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_TRAILER = struct.pack("!h", -1)
+_NULL = struct.pack("!i", -1)
+_EPOCH = datetime(2000, 1, 1) # Origine des dates binaires de PostgreSQL
+_VARCHAR_OID = 1043
+
+def _text(value) -> bytes:
+    # Les enums SQLAlchemy sont stockés sous leur nom (comme le fait l'ORM)
+    data = (value.name if isinstance(value, enum.Enum) else str(value)).encode()
+    return struct.pack("!i", len(data)) + data
+
+def _int4(value) -> bytes:
+    return struct.pack("!ii", 4, value)
+
+def _int8(value) -> bytes:
+    return struct.pack("!iq", 8, value)
+
+def _float8(value) -> bytes:
+    return struct.pack("!id", 8, value)
+
+def _bool(value) -> bytes:
+    return struct.pack("!i?", 1, value)
+
+def _timestamp(value) -> bytes:
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return struct.pack("!iq", 8, (value - _EPOCH) // timedelta(microseconds=1))
+
+def _jsonb(value) -> bytes:
+    data = b"\x01" + json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode() # Version 1 = texte
+    return struct.pack("!i", len(data)) + data
+
+def _varchar_array(value) -> bytes:
+    items = [str(v).encode() for v in value]
+    if not items:
+        body = struct.pack("!iii", 0, 0, _VARCHAR_OID)
+    else:
+        body = struct.pack("!iiiii", 1, 0, _VARCHAR_OID, len(items), 1)
+        body += b"".join(struct.pack("!i", len(item)) + item for item in items)
+    return struct.pack("!i", len(body)) + body
+
+# Encodeur d'après le type de la colonne dans le modèle (Enum avant String : c'en est une sous-classe)
+_ENCODERS = [
+    (JSONB, _jsonb), (ARRAY, _varchar_array), (Enum, _text), (String, _text),
+    (Boolean, _bool), (Integer, _int4), (Float, _float8), (DateTime, _timestamp),
+]
+
+def _encoder(column: str):
+    col_type = SurveyData.__table__.c[column].type
+    for type_cls, encode in _ENCODERS:
+        if isinstance(col_type, type_cls):
+            return encode
+    raise TypeError(f"Type non géré pour COPY binaire : {column} ({col_type})")
+
+_STAGING_ENCODERS = [_encoder(column) for column in STAGING_COLUMNS]
+
+def encode_rows(rows: List[Dict[str, Any]]) -> bytes:
+    """Lignes survey_data (+ 'revision') au format binaire de COPY, colonnes STAGING_COLUMNS + revision."""
+    parts = [_HEADER]
+    nb_colonnes = struct.pack("!h", len(STAGING_COLUMNS) + 1)
+    for row in rows:
+        parts.append(nb_colonnes)
+        for column, encode in zip(STAGING_COLUMNS, _STAGING_ENCODERS):
+            value = row.get(column)
+            parts.append(_NULL if value is None else encode(value))
+        parts.append(_NULL if row.get("revision") is None else _int8(row["revision"]))
+    parts.append(_TRAILER)
+    return b"".join(parts)
+
+
+# 2. TABLE TEMPORAIRE ET FUSION
+
+def create_staging(db: Session) -> None:
+    """Table temporaire aux types de survey_data (sans contraintes ni index), supprimée au commit."""
+    colonnes = ", ".join(STAGING_COLUMNS)
+    db.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+    db.execute(text(
+        f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS SELECT {colonnes} FROM survey_data WITH NO DATA"
+    ))
+    db.execute(text(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN revision bigint"))
+
+def stage_rows(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Un COPY binaire des lignes dans la table temporaire, sur la connexion de la session."""
+    if not rows:
+        return 0
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}, revision) FROM STDIN WITH (FORMAT binary)",
+            io.BytesIO(encode_rows(rows)),
+        )
+    finally:
+        cursor.close()
+    return len(rows)
+
+def merge_staging(db: Session) -> int:
+    """
+    Fusion de la table temporaire dans survey_data en un seul ordre. Un questionnaire présent
+    plusieurs fois garde sa dernière révision ; les lignes arrivent triées par uuid
+    (l'index unique est rempli dans l'ordre). Comme upsert_surveys, une version plus ancienne
+    que celle déjà en base (autre source) ne l'écrase pas.
+    """
+    colonnes = ", ".join(STAGING_COLUMNS)
+    maj = ", ".join(f"{col} = EXCLUDED.{col}" for col in UPSERT_COLUMNS)
+    result = db.execute(text(f"""
+        INSERT INTO survey_data ({colonnes})
+        SELECT DISTINCT ON (questionnaire_uuid) {colonnes} FROM {STAGING_TABLE}
+        ORDER BY questionnaire_uuid, revision DESC NULLS LAST
+        ON CONFLICT (questionnaire_uuid) DO UPDATE SET {maj}
+        WHERE survey_data.date_synchro IS NULL OR EXCLUDED.date_synchro IS NULL
+           OR survey_data.date_synchro <= EXCLUDED.date_synchro
+    """))
+    return result.rowcount
+
+def drop_secondary_indexes(db: Session) -> List[str]:
+    """
+    Supprime les index non uniques de survey_data et renvoie leurs définitions (pour
+    rebuild_indexes). Les index uniques restent (clé primaire, questionnaire_uuid).
+    """
+    index = db.execute(text("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = 'survey_data'::regclass AND NOT i.indisunique AND NOT i.indisprimary
+        ORDER BY 1
+    """)).all()
+    for nom, _ in index:
+        db.execute(text(f"DROP INDEX {nom}"))
+    return [definition for _, definition in index]
+
+def rebuild_indexes(db: Session, definitions: List[str]) -> None:
+    db.execute(text("SELECT set_config('maintenance_work_mem', :mem, true)"), {"mem": BACKFILL_MAINTENANCE_WORK_MEM})
+    for definition in definitions:
+        db.execute(text(definition))
+
+
+# 3. RATTRAPAGE
+
+def run_backfill(db: Session, source, batch_size: int = BACKFILL_BATCH_SIZE, drop_indexes: bool = False,
+                 max_batches: Optional[int] = None) -> SyncReport:
+    """
+    Charge tout ce que la source a après son watermark, en une transaction (voir l'en-tête).
+    Même verrou que la synchro incrémentale : les deux ne tournent jamais ensemble sur une source.
+    """
+    with source_lock(db, source.name):
+        state = get_sync_state(db, source.name)
+        state.debut_dernier_run = datetime.now()
+        state.dernier_statut = "en_cours"
+        db.commit()
+
+        report = SyncReport(source=source.name, watermark_debut=state.watermark, watermark_fin=state.watermark)
+        ctx = SyncContext.load(db)
+        start = time.perf_counter()
+        try:
+            create_staging(db)
+            chargees = 0
+            dernier_uuid = state.watermark_uuid or ""
+            for records in source.fetch_since(state.watermark, batch_size, dernier_uuid):
+                rows = _prepare_batch(records, ctx, report)
+                # Révision de chaque questionnaire : départage les doublons d'un lot à l'autre
+                revisions = {_clean(record.get("uuid")): record.get("revision") for record in records}
+                for row in rows:
+                    row["revision"] = revisions.get(row["questionnaire_uuid"])
+                chargees += stage_rows(db, rows)
+                report.lots += 1
+                report.plus_gros_lot = max(report.plus_gros_lot, len(records))
+                report.watermark_fin = records[-1]["revision"]
+                dernier_uuid = records[-1]["uuid"]
+                logger.info("[%s] backfill lot %d : %d lignes en table temporaire", source.name, report.lots, chargees)
+                if max_batches and report.lots >= max_batches:
+                    break
+            t_copy = time.perf_counter()
+
+            # Jusqu'au commit : aucun lot de synchro (autre source) n'écrit ni ne compte
+            lock_counters(db, exclusive=True)
+            definitions = drop_secondary_indexes(db) if drop_indexes else []
+            report.lignes = merge_staging(db)
+            t_merge = time.perf_counter()
+            rebuild_indexes(db, definitions)
+            t_index = time.perf_counter()
+
+            # Compteurs précalculés : un recalcul complet coûte moins que des écarts par lot
+            for rebuild in (rebuild_counters, rebuild_kpi, rebuild_alerts): # Alertes après kpi (règle de vitesse)
+                rebuild(db)
+            t_compteurs = time.perf_counter()
+
+            state.watermark = report.watermark_fin
+            state.watermark_uuid = dernier_uuid
+            state.derniere_maj = datetime.now()
+            state.lignes_total = (state.lignes_total or 0) + report.lignes
+            state.dernier_statut = "ok"
+            state.derniere_erreur = None
+            state.fin_dernier_run = datetime.now()
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            state.dernier_statut = "erreur"
+            state.derniere_erreur = str(exc)[:2000]
+            state.fin_dernier_run = datetime.now()
+            db.commit()
+            raise
+
+        report.duree_s = time.perf_counter() - start
+        logger.info(
+            "[%s] backfill : lecture + COPY %.1fs (%d lignes), fusion %.1fs, index %.1fs (%d), compteurs %.1fs",
+            source.name, t_copy - start, chargees, t_merge - t_copy, t_index - t_merge, len(definitions),
+            t_compteurs - t_index,
+        )
+        if analytics.disponible():
+            try:
+                analytics.refresh_snapshot(db) # Reconstruction complète : tous les jours ont pu changer
+            except Exception:
+                logger.exception("[%s] Export analytique impossible après le backfill", source.name)
+        logger.info(report.resume())
+        return report
@@ -0,0 +1,176 @@
+# backend/app/services/cspro_dcf.py
+
+"""
+Lecture des dictionnaires CSPro (.dcf, format texte "à la INI").
+
+Le dictionnaire donne la position de chaque variable dans les fichiers de données
+à largeur fixe (Start / Len), ce qui permet au lecteur (cspro_reader.py)
+de découper chaque ligne sans rien deviner.
+
+Extrait d'un .dcf :
+    [Dictionary]
+    RecordTypeStart=1
+    RecordTypeLen=1
+    [IdItems]
+    [Item]
+    Name=QUEST_ID
+    Start=2
+    Len=6
+    [Record]
+    Name=MENAGE
+    RecordTypeValue='1'
+    [Item]
+    Name=SEXE
+    Start=8
+    Len=1
+    [ValueSet]
+    Name=SEXE_VS1
+    Value=1;Masculin
+    Value=2;Féminin
+
+Le premier ValueSet qui suit un item donne ses modalités (code, libellé) pour le dictionnaire
+du dashboard ; les intervalles (Value=15:98;Âge) ne sont pas des modalités et sont ignorés.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import os
+
+
+@dataclass
+class DcfItem:
+    name: str
+    label: str
+    start: int                  # Position de départ (commence à 1 dans CSPro)
+    length: int
+    numeric: bool = True        # DataType=Alpha -> False
+    decimals: int = 0
+    decimal_char: bool = False  # Le point décimal est-il écrit dans le fichier ?
+    occurrences: int = 1        # Variable répétée (ex: 5 téléphones à la suite)
+    value_set: List[Tuple[str, str]] = field(default_factory=list) # [(code, libellé), ...]
+
+
+@dataclass
+class DcfRecord:
+    name: str
+    label: str
+    type_value: str             # Valeur du "type d'enregistrement" en début de ligne
+    items: List[DcfItem] = field(default_factory=list)
+
+
+@dataclass
+class DcfDictionary:
+    name: str
+    label: str
+    record_type_start: int = 0
+    record_type_len: int = 0
+    id_items: List[DcfItem] = field(default_factory=list)
+    records: List[DcfRecord] = field(default_factory=list)
+
+    def record_by_type(self) -> Dict[str, DcfRecord]:
+        return {record.type_value: record for record in self.records}
+
+    def all_items(self) -> List[DcfItem]:
+        items = list(self.id_items)
+        for record in self.records:
+            items.extend(record.items)
+        return items
+
+
+def _iter_sections(lines: Iterable[str]):
+    """Découpe le fichier en sections : ("Item", {"Name": "SEXE", ...})."""
+    section, values = None, {}
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            if section is not None:
+                yield section, values
+            section, values = line[1:-1], {}
+            continue
+        if "=" in line and section is not None:
+            key, _, value = line.partition("=")
+            # Certaines clés se répètent (ex: Value= dans les ValueSet) : on garde une liste
+            values.setdefault(key.strip(), []).append(value.strip())
+    if section is not None:
+        yield section, values
+
+
+def _first(values: Dict[str, List[str]], key: str, default: str = "") -> str:
+    return values.get(key, [default])[0]
+
+
+def _make_item(values: Dict[str, List[str]]) -> DcfItem:
+    return DcfItem(
+        name=_first(values, "Name"),
+        label=_first(values, "Label"),
+        start=int(_first(values, "Start", "0")),
+        length=int(_first(values, "Len", "0")),
+        numeric=_first(values, "DataType", "Numeric").lower() != "alpha",
+        decimals=int(_first(values, "Decimal", "0")),
+        decimal_char=_first(values, "DecimalChar", "No").lower() == "yes",
+        occurrences=int(_first(values, "Occurrences", "1")),
+    )
+
+
+def _parse_values(values: List[str]) -> List[Tuple[str, str]]:
+    """["1;Masculin", "2;Féminin", "15:98;Âge"] -> [("1", "Masculin"), ("2", "Féminin")]"""
+    modalites = []
+    for value in values:
+        code, _, label = value.partition(";")
+        code = code.strip().strip("'\"")
+        if not code or ":" in code:
+            continue
+        modalites.append((code, label.strip() or code))
+    return modalites
+
+
+def read_dcf(path: Union[str, os.PathLike]) -> DcfDictionary:
+    """Lit et parse un fichier .dcf (FileNotFoundError si le chemin n'existe pas)."""
+    with open(path, encoding="utf-8-sig") as fh:
+        return parse_dcf(fh.readlines())
+
+
+def parse_dcf(source: Union[str, Iterable[str]]) -> DcfDictionary:
+    """
+    Parse un dictionnaire CSPro à partir de son texte ou de ses lignes
+    (pour un fichier, voir read_dcf : un chemin n'est jamais pris pour du texte).
+    Les sous-items (SubItem) sont ignorés : ils chevauchent leur item parent.
+    """
+    if isinstance(source, str):
+        source = source.splitlines()
+
+    dcf = DcfDictionary(name="", label="")
+    current_record: Optional[DcfRecord] = None
+    last_item: Optional[DcfItem] = None # Item auquel se rattache le prochain ValueSet
+    in_ids = False
+
+    for section, values in _iter_sections(source):
+        if section == "Dictionary":
+            dcf.name = _first(values, "Name")
+            dcf.label = _first(values, "Label")
+            dcf.record_type_start = int(_first(values, "RecordTypeStart", "0"))
+            dcf.record_type_len = int(_first(values, "RecordTypeLen", "0"))
+        elif section == "IdItems":
+            in_ids, current_record, last_item = True, None, None
+        elif section == "Record":
+            in_ids, last_item = False, None
+            current_record = DcfRecord(
+                name=_first(values, "Name"),
+                label=_first(values, "Label"),
+                type_value=_first(values, "RecordTypeValue").strip("'"),
+            )
+            dcf.records.append(current_record)
+        elif section == "Item" and _first(values, "ItemType") == "SubItem":
+            last_item = None
+        elif section == "Item":
+            item = last_item = _make_item(values)
+            if in_ids:
+                dcf.id_items.append(item)
+            elif current_record is not None:
+                current_record.items.append(item)
+        elif section == "ValueSet" and last_item is not None and not last_item.value_set:
+            last_item.value_set = _parse_values(values.get("Value", []))
+
+    return dcf
@@ -0,0 +1,444 @@
+# backend/app/services/cspro_reader.py
+
+"""
+Lecteur en flux (streaming) des exports de données CSPro.
+
+En fin de campagne, les exports des tablettes font plusieurs Go et la machine
+de synchro est une petite VM : on ne charge JAMAIS un fichier entier en mémoire.
+Tout est fait avec des générateurs (yield) : on lit une ligne, on la découpe,
+et on rend le questionnaire dès qu'il est complet. La mémoire utilisée est
+celle d'un seul questionnaire (+ le lot en cours de chargement).
+
+Deux formats sont gérés :
+- Largeur fixe (.dat) : découpé grâce aux positions du dictionnaire (.dcf).
+- JSON : un tableau de questionnaires [{...}, {...}] ou un questionnaire par ligne (JSON Lines).
+
+Chaque questionnaire est rendu sous forme de dict {nom de la Variable: valeur typée},
+le même format que les lignes lues dans MySQL par le moteur de synchro.
+"""
+
+import codecs
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.models.dictionary import VariableType
+from app.services.cspro_dcf import DcfDictionary, DcfItem
+
+# Taille des blocs lus dans les fichiers JSON (la mémoire reste bornée à ~ un bloc + un questionnaire)
+JSON_CHUNK_SIZE = 1024 * 1024
+# Taille maximale d'un questionnaire JSON : au-delà, l'objet est considéré comme illisible
+JSON_MAX_OBJET = 4 * JSON_CHUNK_SIZE
+# Frontière entre deux questionnaires d'un tableau : "}, {" (blancs et retours à la ligne compris)
+_FRONTIERE = re.compile(r"\}\s*,\s*\{")
+_JETONS = re.compile(r'[\\"{}]')
+
+
+@dataclass
+class ReaderStats:
+    """Compteurs de débit, mis à jour au fil de la lecture."""
+    octets: int = 0
+    lignes: int = 0
+    cas: int = 0
+    erreurs: int = 0
+    debut: float = field(default_factory=time.perf_counter)
+
+    @property
+    def duree_s(self) -> float:
+        return time.perf_counter() - self.debut
+
+    @property
+    def cas_par_seconde(self) -> float:
+        duree = self.duree_s
+        return self.cas / duree if duree > 0 else 0.0
+
+    @property
+    def mo_par_seconde(self) -> float:
+        duree = self.duree_s
+        return self.octets / 1_048_576 / duree if duree > 0 else 0.0
+
+    def resume(self) -> str:
+        return (
+            f"{self.cas} questionnaires, {self.lignes} lignes, {self.octets / 1_048_576:.1f} Mo "
+            f"en {self.duree_s:.1f}s ({self.cas_par_seconde:.0f} cas/s, {self.mo_par_seconde:.1f} Mo/s), "
+            f"{self.erreurs} erreurs"
+        )
+
+
+# TYPAGE
+
+def _to_int(raw: str) -> Optional[int]:
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+def _to_str(raw: str) -> Optional[str]:
+    raw = raw.strip()
+    return raw or None
+
+def _item_converter(item: DcfItem, types: Optional[Dict[str, VariableType]]) -> Callable[[str], Any]:
+    """
+    Choisit la fonction de conversion d'une variable.
+    Priorité au type déclaré dans le dictionnaire du dashboard (table variables),
+    sinon on se fie au .dcf (numérique / alpha).
+    """
+    declared = types.get(item.name) if types else None
+    if declared is not None:
+        return _to_int if declared == VariableType.entier else _to_str
+    if not item.numeric:
+        return _to_str
+    if item.decimals and not item.decimal_char:
+        # Décimales implicites : "01234" avec Decimal=2 -> 12.34
+        factor = 10 ** item.decimals
+        return lambda raw: (v / factor) if (v := _to_int(raw)) is not None else None
+    if item.decimals:
+        return lambda raw: float(raw) if raw.strip() else None
+    return _to_int
+
+def types_from_variables(variables: Iterable[Any]) -> Dict[str, VariableType]:
+    """{Variable.name: Variable.type} à partir des lignes de la table variables."""
+    return {v.name: v.type for v in variables}
+
+
+# FORMAT LARGEUR FIXE
+
+# (nom, début, fin, conversion) : on précalcule les découpes une fois pour toutes
+_Slice = Tuple[str, int, int, Callable[[str], Any]]
+
+def _compile_items(items: List[DcfItem], types, keep: Optional[Set[str]]) -> List[_Slice]:
+    slices = []
+    for item in items:
+        if keep is not None and item.name not in keep:
+            continue
+        convert = _item_converter(item, types)
+        for occ in range(item.occurrences):
+            start = item.start - 1 + occ * item.length
+            name = item.name if item.occurrences == 1 else f"{item.name}({occ + 1})"
+            slices.append((name, start, start + item.length, convert))
+    return slices
+
+def case_key(case: Dict[str, Any], dcf: DcfDictionary) -> str:
+    """
+    Les fichiers .dat n'ont pas d'UUID : l'identifiant du questionnaire est
+    la concaténation de ses variables d'identification (IdItems).
+    """
+    return "-".join(str(case.get(item.name, "")) for item in dcf.id_items)
+
+def iter_fixed_width_cases(
+    fh: IO[bytes],
+    dcf: DcfDictionary,
+    types: Optional[Dict[str, VariableType]] = None,
+    keep: Optional[Set[str]] = None,
+    stats: Optional[ReaderStats] = None,
+    encoding: str = "utf-8",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lit un fichier de données CSPro à largeur fixe (ouvert en binaire) questionnaire par questionnaire.
+    Un questionnaire = les lignes consécutives qui partagent les mêmes IdItems.
+    Si un enregistrement se répète (ex: plusieurs membres du ménage), ses variables deviennent des listes.
+    'keep' permet de ne découper que les variables utiles (projection).
+    """
+    stats = stats if stats is not None else ReaderStats()
+    id_slices = [(i.name, i.start - 1, i.start - 1 + i.length) for i in dcf.id_items]
+    # Identifiants gardés en texte, zéros compris : QUEST_ID "000000001" ne doit pas devenir 1
+    # (deux questionnaires distincts pourraient sinon avoir la même clé, et la clé changerait de forme)
+    id_convert = [(i.name, i.start - 1, i.start - 1 + i.length, _to_str) for i in dcf.id_items]
+    rt_start = dcf.record_type_start - 1
+    rt_end = rt_start + dcf.record_type_len
+    records = {
+        type_value: (record.name, _compile_items(record.items, types, keep))
+        for type_value, record in dcf.record_by_type().items()
+    }
+
+    current_key = None
+    case: Dict[str, Any] = {}
+    seen_records: Set[str] = set()
+
+    for raw in fh:
+        stats.octets += len(raw)
+        stats.lignes += 1
+        line = raw.decode(encoding, errors="replace").rstrip("\r\n")
+        if not line.strip():
+            continue
+
+        key = tuple(line[start:end] for _, start, end in id_slices)
+        if key != current_key:
+            if case:
+                stats.cas += 1
+                yield case
+            current_key = key
+            case = {name: convert(line[start:end]) for name, start, end, convert in id_convert}
+            seen_records = set()
+
+        type_value = line[rt_start:rt_end] if dcf.record_type_len else ""
+        record = records.get(type_value)
+        if record is None:
+            stats.erreurs += 1
+            continue
+
+        record_name, slices = record
+        repeated = record_name in seen_records
+        seen_records.add(record_name)
+        for name, start, end, convert in slices:
+            value = convert(line[start:end])
+            if repeated:
+                previous = case.get(name)
+                if isinstance(previous, list):
+                    previous.append(value)
+                else:
+                    case[name] = [previous, value]
+            else:
+                case[name] = value
+
+    if case:
+        stats.cas += 1
+        yield case
+
+
+# FORMAT JSON
+
+def _flatten(obj: Dict[str, Any], out: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplatit un questionnaire JSON {"MENAGE": {"SEXE": 1}, "MEMBRES": [{...}, {...}]}
+    en {"SEXE": 1, ...}. Les enregistrements répétés donnent des listes.
+    """
+    for key, value in obj.items():
+        if isinstance(value, dict):
+            _flatten(value, out)
+        elif isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+            rows = [_flatten(v, {}) for v in value]
+            for name in rows[0]:
+                out[name] = [row.get(name) for row in rows] if len(rows) > 1 else rows[0][name]
+        else:
+            out[key] = value
+    return out
+
+def _iter_json_array(fh: IO[bytes], stats: ReaderStats, encoding: str) -> Iterator[Any]:
+    """
+    Parcourt un tableau JSON [ {...}, {...} ] élément par élément, sans json.load() du fichier entier.
+    On garde un tampon texte (un bloc) et on décode un objet à la fois avec raw_decode.
+    Un objet illisible est compté dans stats.erreurs et sauté : on reprend au "}, {" suivant.
+    """
+    decoder = json.JSONDecoder()
+    # Décodeur incrémental : un caractère accentué coupé entre deux blocs reste correct
+    text_decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buffer, pos, eof = "", 0, False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = fh.read(JSON_CHUNK_SIZE)
+        stats.octets += len(chunk)
+        eof = not chunk
+        # On jette ce qui a déjà été consommé avant d'ajouter le nouveau bloc
+        buffer, pos = buffer[pos:] + text_decoder.decode(chunk, final=eof), 0
+
+    while True:
+        # 1. On saute les séparateurs ('[', ',' et blancs) jusqu'au prochain objet
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,[":
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            read_more()
+        if pos >= len(buffer) or buffer[pos] == "]":
+            return
+
+        # 2. On décode un objet ; s'il est coupé à la frontière d'un bloc, on lit la suite
+        # (sans dépasser JSON_MAX_OBJET : sinon un objet mal formé ferait lire tout le fichier)
+        lisible = True
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError as exc:
+                coupe = exc.pos >= len(buffer) - 16 or exc.msg.startswith("Unterminated string")
+                if not coupe or eof or len(buffer) - pos >= JSON_MAX_OBJET:
+                    lisible = False
+                    break
+                read_more()
+        if lisible:
+            pos = end
+            yield obj
+            continue
+
+        # 3. Objet illisible : on le compte et on saute jusqu'à l'accolade qui le ferme
+        # (accolades comptées hors chaînes : une virgule en trop ne gêne pas ce comptage)
+        stats.erreurs += 1
+        profondeur, dans_chaine, i, fin = 0, False, pos, None
+        while fin is None:
+            jeton = _JETONS.search(buffer, i)
+            if jeton is None:
+                if eof or len(buffer) - pos >= JSON_MAX_OBJET:
+                    break # Accolades déséquilibrées : on cherche la frontière suivante (4.)
+                i -= pos
+                read_more()
+                i += pos
+                continue
+            c, i = jeton.group(), jeton.end()
+            if dans_chaine:
+                if c == "\\":
+                    i += 1 # Caractère échappé (au besoin lu avec le bloc suivant)
+                elif c == '"':
+                    dans_chaine = False
+            elif c == '"':
+                dans_chaine = True
+            elif c == "{":
+                profondeur += 1
+            elif c == "}":
+                profondeur -= 1
+                if profondeur == 0:
+                    fin = i
+        if fin is not None:
+            pos = fin
+            continue
+
+        # 4. Objet sans fin repérable : on reprend au "}, {" suivant
+        pos += 1
+        while True:
+            frontiere = _FRONTIERE.search(buffer, pos)
+            if frontiere:
+                pos = frontiere.start() + 1
+                break
+            if eof:
+                return
+            pos = max(pos, len(buffer) - 64) # Une frontière peut être coupée entre deux blocs
+            read_more()
+
+def _iter_json_lines(fh: IO[bytes], stats: ReaderStats, encoding: str) -> Iterator[Any]:
+    for raw in fh:
+        stats.octets += len(raw)
+        stats.lignes += 1
+        line = raw.decode(encoding, errors="replace").strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            stats.erreurs += 1
+
+def iter_json_cases(
+    fh: IO[bytes],
+    types: Optional[Dict[str, VariableType]] = None,
+    keep: Optional[Set[str]] = None,
+    stats: Optional[ReaderStats] = None,
+    encoding: str = "utf-8",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lit un export JSON CSPro (tableau ou JSON Lines, détecté au premier caractère).
+    L'identifiant du questionnaire est pris dans "uuid", sinon "id" ou "key".
+    """
+    stats = stats if stats is not None else ReaderStats()
+    head = fh.read(1)
+    while head and head in b" \t\r\n\xef\xbb\xbf":
+        head = fh.read(1)
+    if not head:
+        return
+    # On "remet" le premier caractère devant le flux
+    fh = _Prepend(head, fh)
+    objects = _iter_json_array(fh, stats, encoding) if head == b"[" else _iter_json_lines(fh, stats, encoding)
+
+    for obj in objects:
+        if not isinstance(obj, dict):
+            stats.erreurs += 1
+            continue
+        case = _flatten(obj, {})
+        uuid = case.get("uuid") or case.get("id") or case.get("key")
+        if keep is not None:
+            case = {k: v for k, v in case.items() if k in keep}
+        if types:
+            for name, var_type in types.items():
+                if name in case and case[name] is not None and not isinstance(case[name], list):
+                    case[name] = _to_int(str(case[name])) if var_type == VariableType.entier else str(case[name])
+        case["uuid"] = uuid
+        stats.cas += 1
+        yield case
+
+class _Prepend:
+    """Petit adaptateur : un flux binaire précédé de quelques octets déjà lus."""
+
+    def __init__(self, head: bytes, fh: IO[bytes]):
+        self.head, self.fh = head, fh
+
+    def read(self, size: int = -1) -> bytes:
+        head, self.head = self.head, b""
+        return head + self.fh.read(size if size < 0 else max(0, size - len(head)))
+
+    def __iter__(self):
+        head, self.head = self.head, b""
+        first = True
+        for line in self.fh:
+            if first:
+                line, first = head + line, False
+            yield line
+        if first and head:
+            yield head
+
+
+# PASSAGE DE RELAIS AU CHARGEUR
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Regroupe un flux en lots de 'size' éléments (le dernier peut être plus petit)."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class FileCaseSource:
+    """
+    Source "fichier" pour le moteur de synchro (même interface que MySQLCaseSource).
+    La "révision" d'un questionnaire est son rang dans le fichier : le watermark
+    permet donc aussi de reprendre un gros import interrompu.
+
+    Ce rang n'a de sens que pour CE fichier : le nom de la source (clé du watermark)
+    contient la taille et la date de modification. Un nouvel export sous le même nom est
+    une nouvelle source, relue en entier (l'upsert par uuid met à jour les questionnaires connus).
+    """
+
+    def __init__(self, path: str, dcf: Optional[DcfDictionary] = None,
+                 types: Optional[Dict[str, VariableType]] = None, keep: Optional[Set[str]] = None):
+        self.path = path
+        self.dcf = dcf
+        self.types = types
+        self.keep = keep
+        st = os.stat(path)
+        self.name = f"fichier:{os.path.basename(path)}:{st.st_size}-{st.st_mtime_ns}"
+        self.stats = ReaderStats()
+
+    def iter_cases(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "rb") as fh:
+            if self.dcf is None:
+                cases = iter_json_cases(fh, self.types, self.keep, self.stats)
+                yield from cases
+                return
+            for case in iter_fixed_width_cases(fh, self.dcf, self.types, self.keep, self.stats):
+                case["uuid"] = case_key(case, self.dcf)
+                yield case
+
+    def fetch_since(self, watermark: int, batch_size: int, after_uuid: str = "") -> Iterator[List[Dict[str, Any]]]:
+        # Une révision par questionnaire (son rang) : after_uuid n'a pas d'effet ici
+        self.stats = ReaderStats()
+
+        def numbered():
+            for revision, case in enumerate(self.iter_cases(), start=1):
+                if revision <= watermark:
+                    continue
+                case["revision"] = revision
+                yield case
+
+        yield from chunked(numbered(), batch_size)
+
+    def max_revision(self) -> Optional[int]:
+        # Inconnu sans relire tout le fichier : le retard n'a pas de sens pour un fichier
+        return None
@@ -0,0 +1,242 @@
+# backend/app/services/dictionary.py
+
+"""
+Photo (snapshot) en mémoire du dictionnaire des variables.
+
+Le dictionnaire change au plus quelques fois par campagne, mais il est lu à chaque
+chargement du tableau de bord (libellés) et par la synchro (quotas, types).
+On le charge donc une fois (2 requêtes : variables + modalités) et on garde :
+- la liste des variables, déjà au format de sortie de l'API ;
+- les tables de correspondance nom -> variable et (variable, code) -> libellé ;
+- une version (empreinte du contenu) qui sert d'ETag à GET /dictionary.
+
+Mise à jour (comme services/settings.py) : tout ce qui modifie le dictionnaire (routes,
+scripts/import_dcf.py) appelle publish_dictionary_change(db) avant son commit : NOTIFY sur
+CANAL_DICTIONNAIRE, que l'écouteur de chaque processus transforme en invalidate_snapshot().
+Filet de sécurité sans écouteur : DICTIONNAIRE_CACHE_TTL secondes.
+
+import_dcf : import en masse d'un dictionnaire CSPro (.dcf), en une transaction.
+"""
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.cache import TTLCache
+from app.core.notifications import notify, subscribe
+from app.models.dictionary import Modalite, Variable, VariableType
+from app.schemas.dictionary import DictionaryImportReport, ModaliteCreate, VariableCreate, VariableOut
+from app.services.cspro_dcf import DcfDictionary, DcfItem
+
+DICTIONNAIRE_CACHE_TTL = float(os.getenv("DICTIONNAIRE_CACHE_TTL", "300"))
+CANAL_DICTIONNAIRE = "osm_dictionnaire"
+_snapshot_cache = TTLCache(maxsize=1, ttl=DICTIONNAIRE_CACHE_TTL, name="dictionnaire")
+
+
+@dataclass(frozen=True)
+class DictionarySnapshot:
+    version: str
+    variables: Tuple[VariableOut, ...] # Triées par id (pagination par curseur)
+    par_nom: Dict[str, VariableOut] = field(repr=False)
+    libelles: Dict[Tuple[str, str], str] = field(repr=False) # (variable, code) -> libellé
+    codes: Dict[Tuple[str, str], str] = field(repr=False)    # (variable, libellé en minuscules) -> code
+
+    @classmethod
+    def build(cls, variables: List[VariableOut]) -> "DictionarySnapshot":
+        variables = sorted(variables, key=lambda v: v.id)
+        contenu = "\n".join(v.model_dump_json() for v in variables)
+        libelles, codes = {}, {}
+        for var in variables:
+            for mod in var.modalites:
+                libelles[(var.name, mod.code)] = mod.label
+                codes.setdefault((var.name, mod.label.strip().lower()), mod.code)
+        return cls(
+            version=hashlib.sha1(contenu.encode("utf-8")).hexdigest()[:16],
+            variables=tuple(variables),
+            par_nom={v.name: v for v in variables},
+            libelles=libelles,
+            codes=codes,
+        )
+
+    # LIBELLÉS
+
+    def label(self, variable: str, code: Any, default: Optional[str] = None) -> Optional[str]:
+        """Libellé d'une modalité : label("SEXE", 2) -> "Féminin"."""
+        return self.libelles.get((variable, str(code)), default)
+
+    def variable_label(self, variable: str) -> str:
+        var = self.par_nom.get(variable)
+        return var.label if var else variable
+
+    def describe(self, conditions: Dict[str, Any]) -> str:
+        """Texte d'une règle de quota : {"SEXE": "2", "ETHNIE": ["1", "3"]} -> "Sexe : Féminin, Ethnie : A ou C"."""
+        parts = []
+        for variable, attendu in sorted(conditions.items()):
+            valeurs = attendu if isinstance(attendu, list) else [attendu]
+            parts.append(f"{self.variable_label(variable)} : {' ou '.join(self.label(variable, v, str(v)) for v in valeurs)}")
+        return ", ".join(parts)
+
+    # CODES
+
+    def normalize_conditions(self, conditions: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Conditions de quota avec des codes CSPro uniquement : le Directeur peut écrire
+        {"SEXE": "Féminin"} au lieu de {"SEXE": "2"}. Les valeurs qui sont déjà des codes
+        (ou inconnues du dictionnaire) sont gardées telles quelles.
+        """
+        def code(variable: str, valeur: Any) -> Any:
+            if (variable, str(valeur)) in self.libelles:
+                return valeur
+            return self.codes.get((variable, str(valeur).strip().lower()), valeur)
+
+        return {
+            variable: [code(variable, v) for v in attendu] if isinstance(attendu, list) else code(variable, attendu)
+            for variable, attendu in conditions.items()
+        }
+
+    def types(self) -> Dict[str, VariableType]:
+        """{nom: type déclaré}, pour typer les valeurs lues dans les exports CSPro."""
+        return {v.name: v.type for v in self.variables}
+
+
+def _load(db: Session) -> DictionarySnapshot:
+    rows = db.query(Variable).options(selectinload(Variable.modalites)).all()
+    return DictionarySnapshot.build([VariableOut.model_validate(v) for v in rows])
+
+def get_snapshot(db: Session) -> DictionarySnapshot:
+    return _snapshot_cache.get_or_set("dictionnaire", lambda: _load(db))
+
+def invalidate_snapshot(_payload: str = "") -> None:
+    """Vide la photo de ce processus (les autres sont prévenus par publish_dictionary_change)."""
+    _snapshot_cache.clear()
+
+def publish_dictionary_change(db: Session) -> None:
+    """À appeler dans la transaction qui modifie variables / modalites : tous les processus oublient la photo au commit."""
+    notify(db, CANAL_DICTIONNAIRE)
+
+
+subscribe(CANAL_DICTIONNAIRE, invalidate_snapshot)
+
+
+# IMPORT D'UN .DCF
+
+def _variable_type(item: DcfItem) -> VariableType:
+    if item.value_set:
+        return VariableType.choix_unique
+    if item.numeric and not item.decimals:
+        return VariableType.entier
+    # Alpha, ou numérique à décimales : pas de type "décimal", le lecteur garde alors le texte
+    return VariableType.texte
+
+def variables_from_dcf(dcf: DcfDictionary) -> List[VariableCreate]:
+    """Une variable par item du .dcf (identifiants compris), avec les modalités de son ValueSet."""
+    variables: Dict[str, VariableCreate] = {}
+    for item in dcf.all_items():
+        if item.name in variables:
+            continue
+        modalites: Dict[str, ModaliteCreate] = {}
+        for code, label in item.value_set:
+            modalites.setdefault(code, ModaliteCreate(code=code, label=label))
+        variables[item.name] = VariableCreate(
+            name=item.name,
+            label=item.label or item.name,
+            type=_variable_type(item),
+            modalites=list(modalites.values()),
+        )
+    return list(variables.values())
+
+def import_dcf(db: Session, variables: List[VariableCreate], supprimer_absentes: bool = False,
+               dry_run: bool = False) -> DictionaryImportReport:
+    """
+    Met le dictionnaire en conformité avec 'variables' (issues d'un .dcf), dans la transaction en cours.
+
+    1. L'existant est chargé en 2 requêtes et comparé en mémoire : on n'écrit que les différences.
+    2. Écritures groupées : un INSERT multi-lignes (RETURNING id) pour les nouvelles variables,
+       puis un pour toutes les nouvelles modalités ; les mises à jour et suppressions par lots.
+    'est_quota' n'est jamais modifié : c'est un choix du Directeur, pas une info du .dcf.
+    Le commit reste à la charge de l'appelant ; les autres processus sont prévenus à ce commit
+    (publish_dictionary_change), celui de l'appelant appelle invalidate_snapshot().
+    """
+    t0 = time.perf_counter()
+    report = DictionaryImportReport()
+
+    existantes = {v.name: v for v in db.execute(select(Variable.id, Variable.name, Variable.label, Variable.type)).all()}
+    modalites_existantes: Dict[int, Dict[str, Tuple[int, str]]] = {}
+    for mod_id, var_id, code, label in db.execute(select(Modalite.id, Modalite.variable_id, Modalite.code, Modalite.label)):
+        modalites_existantes.setdefault(var_id, {})[code] = (mod_id, label)
+
+    # 1. Variables
+    nouvelles, maj_variables = [], []
+    for var in variables:
+        ancienne = existantes.get(var.name)
+        if ancienne is None:
+            nouvelles.append(var)
+            report.variables_ajoutees.append(var.name)
+        elif ancienne.label != var.label or ancienne.type != var.type:
+            maj_variables.append({"id": ancienne.id, "label": var.label, "type": var.type})
+            report.variables_modifiees.append(var.name)
+        else:
+            report.variables_inchangees += 1
+    noms = {var.name for var in variables}
+    report.variables_absentes = sorted(name for name in existantes if name not in noms)
+
+    # 2. Modalités (pour les variables déjà en base ; celles des nouvelles sont toutes à créer)
+    nouvelles_modalites, maj_modalites, modalites_a_supprimer = [], [], []
+    for var in variables:
+        ancienne = existantes.get(var.name)
+        if ancienne is None:
+            continue
+        avant = modalites_existantes.get(ancienne.id, {})
+        apres = {mod.code: mod.label for mod in var.modalites}
+        for code, label in apres.items():
+            if code not in avant:
+                nouvelles_modalites.append({"variable_id": ancienne.id, "code": code, "label": label})
+            elif avant[code][1] != label:
+                maj_modalites.append({"id": avant[code][0], "label": label})
+        modalites_a_supprimer.extend(mod_id for code, (mod_id, _) in avant.items() if code not in apres)
+    report.modalites_ajoutees = len(nouvelles_modalites) + sum(len(var.modalites) for var in nouvelles)
+    report.modalites_modifiees = len(maj_modalites)
+    report.modalites_supprimees = len(modalites_a_supprimer)
+
+    variables_a_supprimer = []
+    if supprimer_absentes:
+        variables_a_supprimer = [existantes[name].id for name in report.variables_absentes]
+        report.variables_supprimees = list(report.variables_absentes)
+        report.modalites_supprimees += sum(len(modalites_existantes.get(i, {})) for i in variables_a_supprimer)
+
+    if dry_run:
+        report.duree_ms = round((time.perf_counter() - t0) * 1000, 1)
+        return report
+
+    # 3. Écritures
+    if nouvelles:
+        ids = db.execute(
+            insert(Variable).returning(Variable.id, Variable.name, sort_by_parameter_order=True),
+            [{"name": v.name, "label": v.label, "type": v.type, "est_quota": False} for v in nouvelles],
+        ).all()
+        par_nom = {var.name: var for var in nouvelles}
+        for var_id, name in ids:
+            nouvelles_modalites.extend(
+                {"variable_id": var_id, "code": mod.code, "label": mod.label} for mod in par_nom[name].modalites
+            )
+    if maj_variables:
+        db.execute(update(Variable), maj_variables)
+    if nouvelles_modalites:
+        db.execute(insert(Modalite), nouvelles_modalites)
+    if maj_modalites:
+        db.execute(update(Modalite), maj_modalites)
+    if modalites_a_supprimer:
+        db.execute(delete(Modalite).where(Modalite.id.in_(modalites_a_supprimer)))
+    if variables_a_supprimer:
+        db.execute(delete(Modalite).where(Modalite.variable_id.in_(variables_a_supprimer)))
+        db.execute(delete(Variable).where(Variable.id.in_(variables_a_supprimer)))
+
+    publish_dictionary_change(db)
+    report.applique = True
+    report.duree_ms = round((time.perf_counter() - t0) * 1000, 1)
+    return report
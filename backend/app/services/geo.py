@@ -0,0 +1,173 @@
+# backend/app/services/geo.py
+
+"""
+Outils géographiques (distances GPS, index spatial des zones).
+"""
+
+import math
+from typing import Iterable
+
+import numpy as np
+
+# Rayon moyen de la Terre en mètres
+RAYON_TERRE_M = 6_371_008.8
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distance "à vol d'oiseau" en mètres entre deux points GPS (formule de haversine)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAYON_TERRE_M * math.asin(math.sqrt(a))
+
+
+# VERSION VECTORISÉE (NumPy) : des milliers de distances d'un coup
+
+def haversine_m_vec(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Même formule que haversine_m, appliquée à des tableaux NumPy (élément par élément)."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * RAYON_TERRE_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class ZoneIndex:
+    """
+    Index spatial des centroïdes de zones, pour classer un lot de points GPS
+    "dans la zone" / "hors zone" en quelques millisecondes.
+
+    Comparer chaque questionnaire à chaque zone (1 million x milliers de zones) est hors de portée.
+    On découpe donc la carte en cases (grille) dont le côté est au moins égal au plus grand rayon
+    de tolérance : une zone qui peut contenir un point est forcément dans la case du point
+    ou dans l'une des 8 cases voisines. On ne calcule la distance qu'avec ces quelques zones.
+    """
+
+    def __init__(self, zone_ids, latitudes, longitudes, rayons_m):
+        self.zone_ids = np.asarray(zone_ids, dtype=np.int64)
+        self.lat = np.asarray(latitudes, dtype=float)
+        self.lon = np.asarray(longitudes, dtype=float)
+        self.rayons = np.asarray(rayons_m, dtype=float)
+        self.position = {int(z): i for i, z in enumerate(self.zone_ids)}
+
+        if len(self.zone_ids) == 0:
+            self.cell_lat = self.cell_lon = 1.0
+            self.keys = np.empty(0, dtype=np.int64)
+            self.order = np.empty(0, dtype=np.int64)
+            return
+
+        # Taille des cases en degrés, calculée pour le plus grand rayon.
+        # Un degré de longitude rétrécit vers les pôles : on prend la latitude la plus éloignée de l'équateur.
+        rayon_max = max(float(self.rayons.max()), 1.0)
+        cos_min = max(np.cos(np.radians(np.abs(self.lat).max())), 0.01)
+        self.cell_lat = rayon_max / 111_000.0
+        self.cell_lon = rayon_max / (111_000.0 * cos_min)
+
+        keys = self._keys(self.lat, self.lon)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    @classmethod
+    def from_zones(cls, zones: Iterable, tolerance_defaut_m: float) -> "ZoneIndex":
+        """
+        Construit l'index à partir des lignes Zone (rayon de la zone, sinon tolérance GPS globale).
+        Un rayon NULL ou à 0 prend la tolérance globale : services/alerts.py applique la même
+        règle quand la tolérance change.
+        """
+        zones = list(zones)
+        return cls(
+            [z.id for z in zones],
+            [z.latitude_centrale for z in zones],
+            [z.longitude_centrale for z in zones],
+            [z.rayon_tolerance_metres or tolerance_defaut_m for z in zones],
+        )
+
+    def _cells(self, lat, lon):
+        return np.floor(lat / self.cell_lat).astype(np.int64), np.floor(lon / self.cell_lon).astype(np.int64)
+
+    @staticmethod
+    def _key(cy, cx):
+        # On range (ligne, colonne) dans un seul entier pour pouvoir trier et chercher (searchsorted)
+        return (cy + (1 << 30)) * (1 << 32) + (cx + (1 << 30))
+
+    def _keys(self, lat, lon):
+        cy, cx = self._cells(lat, lon)
+        return self._key(cy, cx)
+
+    def nearest(self, lat, lon):
+        """
+        Zone de chaque point, parmi celles des 9 cases voisines.
+        Renvoie (position de la zone ou -1, distance en mètres ou inf).
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        n = len(lat)
+        best_pos = np.full(n, -1, dtype=np.int64)
+        best_dist = np.full(n, np.inf)
+        if n == 0 or len(self.keys) == 0:
+            return best_pos, best_dist
+
+        cy, cx = self._cells(lat, lon)
+        points, zones = [], []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                key = self._key(cy + dy, cx + dx)
+                debut = np.searchsorted(self.keys, key, side="left")
+                fin = np.searchsorted(self.keys, key, side="right")
+                nb = fin - debut
+                if not nb.any():
+                    continue
+                # Une paire (point, zone candidate) par zone présente dans la case voisine
+                p = np.repeat(np.arange(n), nb)
+                decalage = np.arange(nb.sum()) - np.repeat(np.cumsum(nb) - nb, nb)
+                points.append(p)
+                zones.append(self.order[np.repeat(debut, nb) + decalage])
+
+        if not points:
+            return best_pos, best_dist
+        p = np.concatenate(points)
+        z = np.concatenate(zones)
+        d = haversine_m_vec(lat[p], lon[p], self.lat[z], self.lon[z])
+
+        # Pour chaque point, on garde la zone dont il est le plus "à l'intérieur"
+        # (distance moins rayon) : un grand village voisin l'emporte sur un petit hameau plus proche.
+        tri = np.lexsort((d - self.rayons[z], p))
+        p, z, d = p[tri], z[tri], d[tri]
+        premier = np.ones(len(p), dtype=bool)
+        premier[1:] = p[1:] != p[:-1]
+        best_pos[p[premier]] = z[premier]
+        best_dist[p[premier]] = d[premier]
+        return best_pos, best_dist
+
+    def classify(self, lat, lon, zone_assignee):
+        """
+        Classe un lot de points GPS.
+        - Si le questionnaire a une zone assignée (via son affectation) : distance à CETTE zone.
+        - Sinon : zone la plus proche trouvée par l'index.
+        Renvoie (zone_id ou -1, distance en mètres ou nan, hors_zone, gps_present).
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        zone_assignee = np.asarray(zone_assignee, dtype=np.int64)
+        n = len(lat)
+        gps = np.isfinite(lat) & np.isfinite(lon)
+
+        pos = np.array([self.position.get(int(z), -1) for z in zone_assignee], dtype=np.int64)
+        dist = np.full(n, np.nan)
+
+        assignee = gps & (pos >= 0)
+        if assignee.any():
+            q = pos[assignee]
+            dist[assignee] = haversine_m_vec(lat[assignee], lon[assignee], self.lat[q], self.lon[q])
+
+        libre = gps & (pos < 0)
+        if libre.any():
+            near_pos, near_dist = self.nearest(lat[libre], lon[libre])
+            pos[libre] = near_pos
+            dist[libre] = near_dist
+
+        connue = pos >= 0
+        rayon = np.where(connue, self.rayons[np.where(connue, pos, 0)] if len(self.rayons) else 0.0, np.nan)
+        hors_zone = gps & ~(dist <= rayon) # distance inf / nan -> hors zone
+        zone_ids = np.where(connue, self.zone_ids[np.where(connue, pos, 0)] if len(self.zone_ids) else -1, -1)
+        return zone_ids, dist, hors_zone, gps
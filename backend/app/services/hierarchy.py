@@ -0,0 +1,68 @@
+# backend/app/services/hierarchy.py
+
+"""
+Résolution de la hiérarchie (directeur > superviseur > contrôleur > agent).
+
+La hiérarchie est une liste d'adjacence (users.chef_id). Parcourir 'user.subordonnes'
+en Python coûte une requête par nœud (N+1) : ici, toute la descendance d'un utilisateur
+est résolue en UNE requête récursive (WITH RECURSIVE) côté PostgreSQL.
+
+- get_subordinates / subordinates_query / subordinate_ids : toute l'équipe (directe et indirecte).
+- is_in_team : "X fait-il partie de l'équipe de Y ?" en remontant les chefs de X
+  (au plus 3 niveaux), une seule requête quelle que soit la taille de l'équipe.
+- team_members : id, code et rôle de toute l'équipe, pour le périmètre mis en cache (services/scoping.py).
+"""
+
+from typing import FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Query, Session
+
+from app.models.users import User, RoleEnum
+
+
+def _subtree_cte(root_id: int):
+    """
+    Ids de toute la descendance de 'root_id' (sans lui-même).
+    UNION (et pas UNION ALL) : si un chef_id formait une boucle par erreur,
+    la requête s'arrête au lieu de tourner indéfiniment.
+    """
+    tree = select(User.id).where(User.chef_id == root_id).cte("equipe", recursive=True)
+    return tree.union(select(User.id).join(tree, User.chef_id == tree.c.id))
+
+def _ancestors_cte(user_id: int):
+    """Ids de tous les chefs de 'user_id' (chef direct, chef du chef, ...)."""
+    chefs = select(User.chef_id.label("id")).where(User.id == user_id, User.chef_id.isnot(None)).cte("chefs", recursive=True)
+    return chefs.union(
+        select(User.chef_id).join(chefs, User.id == chefs.c.id).where(User.chef_id.isnot(None))
+    )
+
+
+def subordinates_query(db: Session, user_id: int) -> Query:
+    """Requête (à compléter : tri, pagination) sur toute la descendance d'un utilisateur."""
+    tree = _subtree_cte(user_id)
+    return db.query(User).filter(User.id.in_(select(tree.c.id)))
+
+def get_subordinates(db: Session, user_id: int) -> List[User]:
+    """Toute la descendance d'un utilisateur (enfants + petits-enfants...), en une requête."""
+    return subordinates_query(db, user_id).order_by(User.id).all()
+
+def subordinate_ids(db: Session, user_id: int) -> FrozenSet[int]:
+    tree = _subtree_cte(user_id)
+    return frozenset(db.execute(select(tree.c.id)).scalars())
+
+def is_in_team(db: Session, chef_id: int, user_id: int) -> bool:
+    """
+    'user_id' est-il un subordonné (direct ou indirect) de 'chef_id' ?
+    On remonte la chaîne des chefs de user_id : au plus la profondeur de la hiérarchie,
+    au lieu de descendre toute l'équipe de chef_id.
+    """
+    chefs = _ancestors_cte(user_id)
+    return bool(db.execute(select(exists().where(chefs.c.id == chef_id))).scalar())
+
+def team_members(db: Session, user_id: int) -> List[Tuple[int, Optional[str], RoleEnum]]:
+    """(id, code CSPro, rôle) de toute la descendance, en une requête (voir services/scoping.py)."""
+    tree = _subtree_cte(user_id)
+    return [tuple(row) for row in db.execute(
+        select(User.id, User.cspro_code, User.role).where(User.id.in_(select(tree.c.id)))
+    )]
@@ -0,0 +1,185 @@
+# backend/app/services/kpi.py
+
+"""
+Indicateurs du tableau de bord (GET /stats/kpi), servis à partir de la table kpi_daily.
+
+- La synchro tient à jour les agrégats journaliers (jour x agent x zone x statut x sexe)
+  par écarts (-1 ancien état, +1 nouvel état), comme pour les compteurs de quotas.
+- L'API ne relit jamais survey_data : elle additionne quelques centaines de lignes
+  de kpi_daily, quel que soit le nombre de questionnaires.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.stats import KpiDaily
+from app.models.survey import GenderEnum, SurveyStatus
+from app.models.zones import Affectation
+from app.services.quotas import lock_counters
+from app.services.scoping import Scope
+
+KpiKey = Tuple[date, str, int, SurveyStatus, GenderEnum] # (jour, agent_code, zone_id, statut, sexe)
+
+# Valeurs "inconnu" des clés (elles font partie de la clé primaire, donc pas de NULL)
+AGENT_INCONNU = ""
+ZONE_INCONNUE = 0
+
+
+def _jour(value: Optional[datetime], fallback: Optional[datetime]) -> Optional[date]:
+    value = value or fallback
+    return value.date() if isinstance(value, datetime) else value
+
+def kpi_key(row: Dict[str, Any]) -> Optional[KpiKey]:
+    """
+    Case de kpi_daily d'un questionnaire. Le jour est celui de l'entretien,
+    à défaut celui de la réception par le serveur.
+    """
+    jour = _jour(row.get("date_entretien"), row.get("date_synchro"))
+    if jour is None:
+        return None
+    return (
+        jour,
+        row.get("agent_code") or AGENT_INCONNU,
+        row.get("zone_id") or ZONE_INCONNUE,
+        SurveyStatus(row.get("status") or SurveyStatus.partiel),
+        GenderEnum(row.get("respondent_sex") or GenderEnum.Inconnu),
+    )
+
+
+# ÉCRITURE DES AGRÉGATS (SYNCHRO)
+
+def kpi_deltas(previous: Dict[str, Dict[str, Any]], rows: Iterable[Dict[str, Any]]) -> Dict[KpiKey, int]:
+    """Écarts à appliquer à kpi_daily : -1 dans l'ancienne case, +1 dans la nouvelle."""
+    deltas: Dict[KpiKey, int] = defaultdict(int)
+    for row in rows:
+        old = previous.get(row["questionnaire_uuid"])
+        if old is not None:
+            old_key = kpi_key(old)
+            if old_key is not None:
+                deltas[old_key] -= 1
+        new_key = kpi_key(row)
+        if new_key is not None:
+            deltas[new_key] += 1
+    return {key: n for key, n in deltas.items() if n != 0}
+
+def apply_kpi_deltas(db: Session, deltas: Dict[KpiKey, int]) -> None:
+    """
+    Un seul INSERT ... ON CONFLICT DO UPDATE SET nombre = nombre + écart,
+    clés triées pour éviter les interblocages (même principe que apply_counter_deltas).
+    Les cases qui retombent à 0 sont gardées : elles ne gênent pas les sommes.
+    """
+    if not deltas:
+        return
+    values = [
+        {"jour": jour, "agent_code": agent, "zone_id": zone, "status": statut, "sexe": sexe, "nombre": n}
+        for (jour, agent, zone, statut, sexe), n in sorted(deltas.items(), key=lambda item: (
+            item[0][0], item[0][1], item[0][2], item[0][3].value, item[0][4].value))
+    ]
+    stmt = pg_insert(KpiDaily).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[KpiDaily.jour, KpiDaily.agent_code, KpiDaily.zone_id, KpiDaily.status, KpiDaily.sexe],
+        set_={"nombre": KpiDaily.nombre + stmt.excluded.nombre},
+    )
+    db.execute(stmt)
+
+def rebuild_kpi(db: Session) -> int:
+    """
+    Reconstruction complète de kpi_daily à partir de survey_data.
+    Renvoie le nombre de lignes écrites.
+    """
+    lock_counters(db, exclusive=True) # Aucun lot de synchro n'applique d'écart pendant la reconstruction
+    db.execute(delete(KpiDaily))
+    result = db.execute(text("""
+        INSERT INTO kpi_daily (jour, agent_code, zone_id, status, sexe, nombre)
+        SELECT CAST(COALESCE(date_entretien, date_synchro) AS date),
+               COALESCE(agent_code, ''),
+               COALESCE(zone_id, 0),
+               COALESCE(status, 'partiel'),
+               COALESCE(respondent_sex, 'Inconnu'),
+               count(*)
+        FROM survey_data
+        WHERE COALESCE(date_entretien, date_synchro) IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+    """))
+    return result.rowcount
+
+
+# LECTURE (API)
+
+def _taux(numerateur: int, denominateur: int) -> Optional[float]:
+    return round(100.0 * numerateur / denominateur, 1) if denominateur else None
+
+def compute_kpi(db: Session, scope: Scope, agent_code: Optional[str] = None,
+                debut: Optional[date] = None, fin: Optional[date] = None,
+                zone_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Calcule les KPI d'un périmètre (services/scoping.py), ou d'un seul agent de ce périmètre.
+    L'objectif ("reste à faire") est la somme des quotas des affectations actives du périmètre.
+    """
+    # 1. Agrégats (jour x statut x sexe) : quelques centaines de lignes au plus
+    query = (
+        select(KpiDaily.jour, KpiDaily.status, KpiDaily.sexe, func.sum(KpiDaily.nombre))
+        .group_by(KpiDaily.jour, KpiDaily.status, KpiDaily.sexe)
+    )
+    if agent_code is not None:
+        query = query.where(KpiDaily.agent_code == agent_code)
+    elif not scope.illimite:
+        query = query.where(scope.agent_filter(KpiDaily.agent_code))
+    if debut is not None:
+        query = query.where(KpiDaily.jour >= debut)
+    if fin is not None:
+        query = query.where(KpiDaily.jour <= fin)
+    if zone_id is not None:
+        query = query.where(KpiDaily.zone_id == zone_id)
+
+    par_statut = {s.value: 0 for s in SurveyStatus}
+    par_sexe = {g.value: {"total": 0, "complets": 0} for g in GenderEnum}
+    par_jour: Dict[date, Dict[str, int]] = defaultdict(lambda: {s.value: 0 for s in SurveyStatus})
+    for jour, statut, sexe, nombre in db.execute(query).all():
+        nombre = int(nombre)
+        par_statut[statut.value] += nombre
+        par_sexe[sexe.value]["total"] += nombre
+        if statut == SurveyStatus.complet:
+            par_sexe[sexe.value]["complets"] += nombre
+        par_jour[jour][statut.value] += nombre
+
+    # 2. Objectif du périmètre
+    objectif_query = select(func.coalesce(func.sum(Affectation.quota_attendu), 0)).where(Affectation.est_actif == True)
+    if scope.controleur_ids is not None:
+        objectif_query = objectif_query.where(scope.controleur_filter(Affectation.controleur_id))
+    if zone_id is not None:
+        objectif_query = objectif_query.where(Affectation.zone_id == zone_id)
+    objectif = int(db.execute(objectif_query).scalar() or 0)
+
+    total = sum(par_statut.values())
+    complets = par_statut[SurveyStatus.complet.value]
+    return {
+        "total": total,
+        "complets": complets,
+        "partiels": par_statut[SurveyStatus.partiel.value],
+        "refus": par_statut[SurveyStatus.refus.value],
+        "taux_completion": _taux(complets, total),
+        "objectif": objectif,
+        "reste_a_faire": max(0, objectif - complets),
+        "taux_realisation": _taux(complets, objectif),
+        "par_sexe": [
+            {"sexe": sexe, "total": v["total"], "complets": v["complets"], "taux_completion": _taux(v["complets"], v["total"])}
+            for sexe, v in par_sexe.items()
+        ],
+        "par_jour": [
+            {
+                "jour": jour,
+                "total": sum(v.values()),
+                "complets": v[SurveyStatus.complet.value],
+                "partiels": v[SurveyStatus.partiel.value],
+                "refus": v[SurveyStatus.refus.value],
+                "taux_completion": _taux(v[SurveyStatus.complet.value], sum(v.values())),
+            }
+            for jour, v in sorted(par_jour.items())
+        ],
+    }
@@ -0,0 +1,218 @@
+# backend/app/services/live.py
+
+"""
+Flux en direct de la synchro (Server-Sent Events, GET /api/v1/live/).
+
+Au lieu que chaque tableau de bord interroge les routes de liste et de KPI toutes les
+quelques secondes, la synchro diffuse UN message par lot, avec seulement ce qui a changé :
+- par agent et par zone : questionnaires nouveaux / modifiés ;
+- par agent : alertes écrites (et la gravité la plus forte) ;
+- par affectation : écarts des compteurs de quotas (mêmes écarts que quota_counters).
+
+1. Côté synchro, publish_batch() envoie ces écarts par NOTIFY sur CANAL_LIVE, dans la
+   transaction du lot : le message part au commit, jamais pour un lot annulé.
+   Un NOTIFY est limité à 8000 octets : un gros lot est découpé en plusieurs messages.
+2. Côté API, chaque worker reçoit le message une fois (core/notifications), le décode une
+   fois, puis le répartit entre ses abonnés (LiveHub) : chacun ne reçoit que ce qui concerne
+   son périmètre (services/scoping.py : agents visibles, affectations de ses contrôleurs).
+   Le Directeur reçoit tout.
+3. Le périmètre d'un abonné est lu à sa connexion. Quand la hiérarchie change (CANAL_HIERARCHIE),
+   chaque flux reçoit 'resync' puis est fermé : le navigateur se reconnecte avec son jeton,
+   et l'utilisateur est relu (supprimé : 401) avec son nouveau périmètre.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.notifications import notify, subscribe
+from app.services.scoping import CANAL_HIERARCHIE, Scope
+
+logger = logging.getLogger(__name__)
+
+CANAL_LIVE = "osm_live"
+TAILLE_MAX_MESSAGE = 7500 # Octets, sous la limite de NOTIFY (8000)
+LIVE_QUEUE_MAX = int(os.getenv("LIVE_QUEUE_MAX", "100")) # Messages en attente par abonné
+
+
+# 1. PUBLICATION (synchro)
+
+def batch_deltas(db: Session, rows: List[Dict[str, Any]], previous: Dict[str, Dict[str, Any]],
+                 counter_deltas: Dict[Tuple[int, str], int], controleur_par_affectation: Dict[int, int]) -> Dict[str, list]:
+    """
+    Écarts d'un lot, au format compact diffusé :
+    z = [agent, zone_id, nouveaux, modifiés], al = [agent, alertes écrites, gravité max],
+    q = [affectation_id, contrôleur_id, regle_hash, écart].
+    """
+    par_zone: Dict[Tuple[str, Optional[int]], List[int]] = defaultdict(lambda: [0, 0])
+    for row in rows:
+        if row.get("agent_code"):
+            compte = par_zone[(row["agent_code"], row.get("zone_id"))]
+            compte[0 if row["questionnaire_uuid"] not in previous else 1] += 1
+
+    # Alertes écrites par ce lot : derniere_maj = début de la transaction (LOCALTIMESTAMP),
+    # lues par l'index (agent_code, survey_id) pour les seuls agents du lot
+    agents = sorted({agent for agent, _ in par_zone})
+    alertes = db.execute(text("""
+        SELECT agent_code, count(*), max(gravite) FROM survey_alerts
+        WHERE agent_code = ANY(:agents) AND derniere_maj = LOCALTIMESTAMP
+        GROUP BY agent_code
+    """), {"agents": agents}).all() if agents else []
+
+    return {
+        "z": [[agent, zone_id, n, m] for (agent, zone_id), (n, m) in par_zone.items()],
+        "al": [[agent, int(n), int(gravite)] for agent, n, gravite in alertes],
+        "q": [[aff_id, controleur_par_affectation.get(aff_id), h, delta] for (aff_id, h), delta in counter_deltas.items()],
+    }
+
+def publish_batch(db: Session, source: str, deltas: Dict[str, list]) -> int:
+    """NOTIFY des écarts d'un lot (découpés sous TAILLE_MAX_MESSAGE). Renvoie le nombre de messages."""
+    messages = 0
+    courant: Dict[str, list] = {"s": source}
+    taille = len(json.dumps(courant))
+    for cle in ("z", "al", "q"):
+        for entree in deltas.get(cle, ()):
+            n = len(json.dumps(entree, separators=(",", ":"))) + 1 # Entrée + virgule
+            if cle not in courant:
+                n += len(cle) + 6 # ,"z":[]
+            if taille + n > TAILLE_MAX_MESSAGE and len(courant) > 1:
+                notify(db, CANAL_LIVE, json.dumps(courant, separators=(",", ":")))
+                messages += 1
+                courant, taille = {"s": source}, len(json.dumps({"s": source}))
+                n = len(json.dumps(entree, separators=(",", ":"))) + len(cle) + 7
+            courant.setdefault(cle, []).append(entree)
+            taille += n
+    if len(courant) > 1:
+        notify(db, CANAL_LIVE, json.dumps(courant, separators=(",", ":")))
+        messages += 1
+    return messages
+
+
+# 2. RÉPARTITION (API)
+
+def scoped_event(message: Dict[str, Any], scope: Scope) -> Optional[Dict[str, Any]]:
+    """Ce que le périmètre 'scope' a le droit de voir d'un message (None si rien)."""
+    agents, controleurs = scope.agent_codes, scope.controleur_ids
+    zones = [z for z in message.get("z", ()) if agents is None or z[0] in agents]
+    alertes = [a for a in message.get("al", ()) if agents is None or a[0] in agents]
+    quotas = [q for q in message.get("q", ()) if controleurs is None or q[1] in controleurs]
+    if not (zones or alertes or quotas):
+        return None
+    return {
+        "source": message.get("s"),
+        "zones": [{"agent_code": a, "zone_id": z, "nouveaux": n, "modifies": m} for a, z, n, m in zones],
+        "alertes": [{"agent_code": a, "nombre": n, "gravite": g} for a, n, g in alertes],
+        "quotas": [{"affectation_id": aff, "regle_hash": h, "delta": d} for aff, _, h, d in quotas],
+    }
+
+
+@dataclass(eq=False)
+class LiveSubscriber:
+    scope: Scope
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=LIVE_QUEUE_MAX))
+    ferme: bool = False # Périmètre périmé : le flux s'arrête après le prochain événement ('resync')
+
+    def _vider(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def push(self, event: Tuple[str, Dict[str, Any]]) -> None:
+        """Dans la boucle d'événements de l'abonné. Client trop lent : on vide et on lui demande de tout relire."""
+        if self.ferme:
+            return
+        if self.queue.full():
+            self._vider()
+            event = ("resync", {})
+        self.queue.put_nowait(event)
+
+    def close(self) -> None:
+        """Dans la boucle d'événements de l'abonné : dernier événement 'resync', puis fin du flux."""
+        if not self.ferme:
+            self._vider()
+            self.queue.put_nowait(("resync", {}))
+            self.ferme = True
+
+
+class LiveHub:
+    """Abonnés SSE de ce worker. L'écoute du canal ne commence qu'au premier abonné."""
+
+    def __init__(self):
+        self._subscribers: List[LiveSubscriber] = []
+        self._lock = threading.Lock()
+        self._ecoute = False
+        self.recus = 0
+        self.envoyes = 0
+
+    def add(self, subscriber: LiveSubscriber) -> None:
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if not self._ecoute:
+                subscribe(CANAL_LIVE, self.dispatch)
+                subscribe(CANAL_HIERARCHIE, self.close_all)
+                self._ecoute = True
+
+    def remove(self, subscriber: LiveSubscriber) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def dispatch(self, payload: str) -> None:
+        """Thread d'écoute : un message décodé une fois, filtré pour chaque abonné."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not payload:
+            # (Re)connexion de l'écouteur : des lots ont pu être manqués
+            events = [(s, ("resync", {})) for s in subscribers]
+        else:
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                logger.warning("Message live illisible ignoré")
+                return
+            self.recus += 1
+            events = []
+            complet = None # Même événement pour tous ceux qui voient tout (Directeur)
+            for s in subscribers:
+                if s.scope.illimite:
+                    complet = complet or scoped_event(message, s.scope)
+                    event = complet
+                else:
+                    event = scoped_event(message, s.scope)
+                if event is not None:
+                    events.append((s, ("lot", event)))
+        for s, event in events:
+            try:
+                s.loop.call_soon_threadsafe(s.push, event)
+                self.envoyes += 1
+            except RuntimeError: # Boucle fermée (arrêt du worker)
+                self.remove(s)
+
+    def close_all(self, _payload: str = "") -> None:
+        """
+        Thread d'écoute : la hiérarchie a changé (ou l'écouteur s'est reconnecté), les périmètres
+        des abonnés ne sont plus sûrs. Chaque flux est fermé, le client se reconnecte.
+        """
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for s in subscribers:
+            try:
+                s.loop.call_soon_threadsafe(s.close)
+            except RuntimeError: # Boucle fermée (arrêt du worker)
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            abonnes = len(self._subscribers)
+        return {"abonnes": abonnes, "messages_recus": self.recus, "evenements_envoyes": self.envoyes}
+
+
+hub = LiveHub()
@@ -0,0 +1,152 @@
+# backend/app/services/map_clusters.py
+
+"""
+Points de la carte (GET /maps/points), regroupés côté serveur.
+
+Envoyer un million de points GeoJSON au navigateur ferait des dizaines de Mo par
+rafraîchissement. On découpe donc la carte en tuiles "XYZ" (le même découpage que les
+fonds de carte OpenStreetMap / Leaflet) et, dans chaque tuile, on regroupe les points
+sur une grille de GRILLE x GRILLE cases directement dans PostgreSQL (GROUP BY).
+Une tuile renvoie au plus GRILLE² groupes, quel que soit le nombre de questionnaires.
+
+À partir du zoom ZOOM_POINTS, on renvoie les points eux-mêmes, dans un budget par requête
+(MAX_POINTS_REQUETE, partagé entre les tuiles, au plus MAX_POINTS_TUILE par tuile) : une tuile
+coupée est signalée (tronquee) pour que le client propose de zoomer.
+Chaque tuile est calculée indépendamment : c'est elle qu'on met en cache.
+"""
+
+import math
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.sync import SyncState
+
+GRILLE = int(os.getenv("CARTE_GRILLE", "16"))              # Cases par côté de tuile (tuile de 256 px -> cases de 16 px)
+ZOOM_POINTS = int(os.getenv("CARTE_ZOOM_POINTS", "16"))    # Zoom à partir duquel on ne regroupe plus
+MAX_POINTS_TUILE = int(os.getenv("CARTE_MAX_POINTS_TUILE", "2000"))
+MAX_POINTS_REQUETE = int(os.getenv("CARTE_MAX_POINTS_REQUETE", "10000")) # Toutes tuiles confondues
+MAX_TUILES = int(os.getenv("CARTE_MAX_TUILES", "64"))       # Par requête
+
+LAT_MAX = 85.05112878 # Limite de la projection Web Mercator
+
+
+# DÉCOUPAGE EN TUILES (projection Web Mercator, comme Leaflet)
+
+def lonlat_to_tile(lon: float, lat: float, zoom: int) -> Tuple[int, int]:
+    n = 2 ** zoom
+    lat = max(-LAT_MAX, min(LAT_MAX, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(ouest, sud, est, nord) d'une tuile, en degrés."""
+    n = 2 ** zoom
+
+    def lat(ty: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+def tile_count(zoom: int, ouest: float, sud: float, est: float, nord: float) -> int:
+    """Nombre de tuiles de la zone, calculé sans les énumérer (à vérifier avant tiles_for_bbox)."""
+    x0, y0 = lonlat_to_tile(ouest, nord, zoom)
+    x1, y1 = lonlat_to_tile(est, sud, zoom)
+    return max(0, x1 - x0 + 1) * max(0, y1 - y0 + 1)
+
+def tiles_for_bbox(zoom: int, ouest: float, sud: float, est: float, nord: float) -> Iterator[Tuple[int, int]]:
+    x0, y0 = lonlat_to_tile(ouest, nord, zoom)
+    x1, y1 = lonlat_to_tile(est, sud, zoom)
+    return ((x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+
+def points_limit(tuiles: int) -> int:
+    """Points par tuile pour une requête de 'tuiles' tuiles (mode points) : le budget est partagé."""
+    return max(1, min(MAX_POINTS_TUILE, MAX_POINTS_REQUETE // max(tuiles, 1)))
+
+
+# DONNÉES
+
+def data_version(db: Session) -> Optional[str]:
+    """
+    Version des données : date du dernier lot écrit par la synchro (toutes sources).
+    Elle fait partie de la clé du cache : chaque nouveau lot invalide les tuiles.
+    """
+    version = db.execute(select(func.max(SyncState.derniere_maj))).scalar()
+    return version.isoformat() if version else None
+
+def _filters(agent_codes: Optional[Sequence[str]], statut: Optional[str], params: Dict[str, Any]) -> str:
+    sql = ""
+    if agent_codes is not None:
+        sql += " AND agent_code = ANY(:codes)"
+        params["codes"] = list(agent_codes)
+    if statut is not None:
+        sql += " AND status = CAST(:statut AS surveystatus)"
+        params["statut"] = statut
+    return sql
+
+def tile_features(db: Session, zoom: int, x: int, y: int, agent_codes: Optional[Sequence[str]],
+                  statut: Optional[str] = None, limite: Optional[int] = None) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Entités GeoJSON d'une tuile : des groupes (cluster) ou, aux grands zooms, au plus 'limite'
+    points (MAX_POINTS_TUILE par défaut).
+    agent_codes = None -> pas de filtre (directeur), sinon les codes du périmètre (Scope.codes).
+    Renvoie (entités, tronquée) : tronquée si la tuile avait plus de 'limite' points.
+    """
+    ouest, sud, est, nord = tile_bounds(zoom, x, y)
+    params: Dict[str, Any] = {"ouest": ouest, "est": est, "sud": sud, "nord": nord}
+    where = """
+        latitude IS NOT NULL AND longitude IS NOT NULL
+        AND longitude >= :ouest AND longitude < :est AND latitude > :sud AND latitude <= :nord
+    """ + _filters(agent_codes, statut, params)
+
+    if zoom >= ZOOM_POINTS:
+        limite = limite or MAX_POINTS_TUILE
+        params["limite"] = limite + 1 # Une ligne de plus : la tuile a-t-elle été coupée ?
+        rows = db.execute(text(f"""
+            SELECT id, latitude, longitude, status, agent_code, hors_zone
+            FROM survey_data WHERE {where}
+            ORDER BY id LIMIT :limite
+        """), params).all()
+        return [_point(*row) for row in rows[:limite]], len(rows) > limite
+
+    # Case de la grille : coordonnées "tuile" fractionnaires (même formule que lonlat_to_tile)
+    params.update({"n": 2 ** zoom, "x": x, "y": y, "g": GRILLE})
+    rows = db.execute(text(f"""
+        SELECT count(*), avg(latitude), avg(longitude),
+               count(*) FILTER (WHERE status = 'complet'),
+               count(*) FILTER (WHERE hors_zone),
+               min(id), min(agent_code), min(status::text), bool_or(hors_zone)
+        FROM survey_data
+        WHERE {where}
+        GROUP BY floor(((longitude + 180) / 360 * :n - :x) * :g),
+                 floor(((1 - asinh(tan(radians(latitude))) / pi()) / 2 * :n - :y) * :g)
+    """), params).all()
+
+    features = []
+    for nombre, lat, lon, complets, hors_zone, id_min, agent, status, hz in rows:
+        if nombre == 1:
+            # Un seul questionnaire dans la case : on l'envoie comme un point normal
+            features.append(_point(id_min, lat, lon, status, agent, hz))
+        else:
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [round(lon, 6), round(lat, 6)]},
+                "properties": {"cluster": True, "nombre": nombre, "complets": complets, "hors_zone": hors_zone},
+            })
+    return features, False
+
+def _point(id_: int, lat: float, lon: float, status: Any, agent_code: Optional[str], hors_zone: Optional[bool]) -> Dict[str, Any]:
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [round(lon, 6), round(lat, 6)]},
+        "properties": {
+            "cluster": False,
+            "id": id_,
+            "status": getattr(status, "value", status),
+            "agent_code": agent_code,
+            "hors_zone": hors_zone,
+        },
+    }
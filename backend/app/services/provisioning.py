@@ -0,0 +1,196 @@
+# backend/app/services/provisioning.py
+
+"""
+Création des comptes en masse, à partir du tableur de début de campagne (CSV ou JSON).
+
+Créer 2 000 comptes un par un (POST /users/) coûte 3 requêtes de vérification et un hash
+bcrypt (~250 ms) par compte. Ici :
+1. Les comptes existants sont chargés en UNE requête ; toute la hiérarchie du fichier
+   (agent -> contrôleur -> superviseur -> directeur, unicité des noms et des codes) est
+   vérifiée en mémoire. Chaque ligne fautive est rapportée avec son numéro de ligne.
+2. S'il y a la moindre erreur (ou en dry_run), rien n'est écrit et aucun hash n'est calculé.
+3. Sinon les mots de passe sont hachés en parallèle (security.hash_passwords), puis les
+   comptes insérés niveau par niveau (directeurs, superviseurs, contrôleurs, agents) :
+   un INSERT multi-lignes par niveau, dont le RETURNING donne les ids des chefs du niveau suivant.
+Le commit reste à la charge de l'appelant (une seule transaction pour tout le fichier).
+
+Par l'API, le hachage tourne dans le thread de la requête : au-delà de IMPORT_API_MAX_COMPTES
+comptes (dry_run excepté), passer par scripts/import_users.py (même traitement, hors HTTP).
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.security import hash_passwords
+from app.models.users import RoleEnum, User
+from app.schemas.users import UserImportError, UserImportReport, UserImportRow
+
+# Rôle que doit avoir le chef de chaque rôle (mêmes règles que POST /users/)
+CHEF_ATTENDU = {
+    RoleEnum.agent: RoleEnum.controleur,
+    RoleEnum.controleur: RoleEnum.superviseur,
+    RoleEnum.superviseur: RoleEnum.directeur,
+}
+# Ordre de création : un chef est toujours inséré avant ses subordonnés
+NIVEAUX = [RoleEnum.directeur, RoleEnum.superviseur, RoleEnum.controleur, RoleEnum.agent]
+
+COLONNES = ("username", "password", "role", "cspro_code", "chef", "chef_id")
+
+# ~250 ms de bcrypt par compte, en parallèle sur PASSWORD_BULK_WORKERS threads : 200 comptes
+# restent sous la minute même sur une petite machine
+IMPORT_API_MAX_COMPTES = int(os.getenv("IMPORT_API_MAX_COMPTES", "200"))
+
+
+def read_rows(contenu: bytes, filename: str) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Lignes du fichier (.json : liste d'objets ; sinon CSV avec en-tête, séparateur ',' ou ';').
+    Renvoie aussi le numéro de la première ligne de données (2 pour un CSV, à cause de l'en-tête).
+    Lève ValueError si le fichier est illisible.
+    """
+    texte = contenu.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        rows = json.loads(texte)
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ValueError("Le JSON doit être une liste d'objets (un par compte).")
+        return rows, 1
+
+    # Excel en français exporte avec ';'
+    premiere = texte.split("\n", 1)[0]
+    delimiter = ";" if premiere.count(";") > premiere.count(",") else ","
+    reader = csv.DictReader(io.StringIO(texte), delimiter=delimiter)
+    inconnues = set(reader.fieldnames or []) - set(COLONNES)
+    if "username" not in (reader.fieldnames or []) or inconnues:
+        raise ValueError(f"Colonnes attendues : {', '.join(COLONNES)}.")
+    # Cellules vides = valeur absente
+    rows = [{k: v.strip() for k, v in row.items() if v and v.strip()} for row in reader]
+    return rows, 2
+
+
+def import_users(db: Session, rows: List[Dict[str, Any]], premiere_ligne: int = 1,
+                 dry_run: bool = False) -> UserImportReport:
+    t0 = time.perf_counter()
+    report = UserImportReport(lignes=len(rows))
+
+    # 1. Comptes existants, en une requête
+    existants = db.execute(select(User.id, User.username, User.cspro_code, User.role)).all()
+    par_id = {u.id: u for u in existants}
+    par_nom = {u.username: u for u in existants}
+    par_code = {u.cspro_code: u for u in existants if u.cspro_code}
+
+    # 2. Validation de chaque ligne (schéma), puis de la hiérarchie niveau par niveau
+    lignes: List[Tuple[int, UserImportRow]] = []
+    erreurs: Dict[int, UserImportError] = {}
+
+    def erreur(ligne: int, username: Optional[str], message: str) -> None:
+        erreurs.setdefault(ligne, UserImportError(ligne=ligne, username=username, erreurs=[])).erreurs.append(message)
+
+    for i, raw in enumerate(rows):
+        ligne = premiere_ligne + i
+        try:
+            lignes.append((ligne, UserImportRow.model_validate(raw)))
+        except ValidationError as exc:
+            for err in exc.errors():
+                champ = ".".join(str(part) for part in err["loc"])
+                erreur(ligne, raw.get("username"), f"{champ} : {err['msg']}")
+
+    # Noms et codes : uniques en base ET dans le fichier
+    vus_noms: Dict[str, int] = {}
+    vus_codes: Dict[str, int] = {}
+    for ligne, row in lignes:
+        if row.username in par_nom:
+            erreur(ligne, row.username, "Ce nom d'utilisateur existe déjà.")
+        elif row.username in vus_noms:
+            erreur(ligne, row.username, f"Nom d'utilisateur en double (déjà ligne {vus_noms[row.username]}).")
+        vus_noms.setdefault(row.username, ligne)
+        if row.cspro_code:
+            if row.cspro_code in par_code:
+                erreur(ligne, row.username, "Ce Code CSPro est déjà utilisé.")
+            elif row.cspro_code in vus_codes:
+                erreur(ligne, row.username, f"Code CSPro en double (déjà ligne {vus_codes[row.cspro_code]}).")
+            vus_codes.setdefault(row.cspro_code, ligne)
+
+    # Chefs pris dans le fichier : désignés par nom ou par code
+    du_fichier: Dict[str, Tuple[int, UserImportRow]] = {}
+    for ligne, row in lignes:
+        du_fichier.setdefault(row.username, (ligne, row))
+        if row.cspro_code:
+            du_fichier.setdefault(row.cspro_code, (ligne, row))
+
+    lignes.sort(key=lambda item: NIVEAUX.index(item[1].role)) # Chefs validés avant leurs subordonnés
+    chefs: Dict[int, Tuple[Optional[int], Optional[int]]] = {} # ligne -> (id du chef existant, ligne du chef)
+    for ligne, row in lignes:
+        chef_role, chef_id, chef_ligne = None, None, None
+        if row.role not in CHEF_ATTENDU and (row.chef_id is not None or row.chef):
+            erreur(ligne, row.username, f"Un {row.role.value} n'a pas de chef.")
+            continue
+        if row.chef_id is not None:
+            existant = par_id.get(row.chef_id)
+            if existant is None:
+                erreur(ligne, row.username, f"Le chef avec l'ID {row.chef_id} n'existe pas.")
+                continue
+            chef_role, chef_id = existant.role, existant.id
+        elif row.chef:
+            existant = par_nom.get(row.chef) or par_code.get(row.chef)
+            if existant is not None:
+                chef_role, chef_id = existant.role, existant.id
+            elif row.chef in du_fichier:
+                chef_ligne, chef_row = du_fichier[row.chef]
+                chef_role = chef_row.role
+            else:
+                erreur(ligne, row.username, f"Chef '{row.chef}' introuvable (ni en base, ni dans le fichier).")
+                continue
+
+        if chef_role is not None and row.role in CHEF_ATTENDU and chef_role != CHEF_ATTENDU[row.role]:
+            erreur(ligne, row.username, f"Hiérarchie invalide : un {row.role.value} doit être sous les ordres "
+                                        f"d'un {CHEF_ATTENDU[row.role].value} (chef indiqué : {chef_role.value}).")
+            continue
+        # Un chef du fichier est inséré dans un paquet précédent : il doit être d'un niveau au-dessus
+        if chef_ligne is not None and NIVEAUX.index(chef_role) >= NIVEAUX.index(row.role):
+            erreur(ligne, row.username, f"Le chef (ligne {chef_ligne}) n'est pas d'un niveau supérieur.")
+            continue
+        if chef_ligne is not None and chef_ligne in erreurs:
+            erreur(ligne, row.username, f"Le chef (ligne {chef_ligne}) est lui-même en erreur.")
+            continue
+        chefs[ligne] = (chef_id, chef_ligne)
+
+    report.erreurs = sorted(erreurs.values(), key=lambda e: e.ligne)
+    if report.erreurs or dry_run:
+        report.duree_ms = round((time.perf_counter() - t0) * 1000, 1)
+        return report
+
+    # 3. Hash en parallèle, puis insertion niveau par niveau
+    t_hash = time.perf_counter()
+    hashes = hash_passwords([row.password for _, row in lignes])
+    report.hachage_ms = round((time.perf_counter() - t_hash) * 1000, 1)
+
+    ids_crees: Dict[int, int] = {} # ligne -> id du compte créé
+    for niveau in NIVEAUX:
+        paquet = [(ligne, row, password_hash) for (ligne, row), password_hash in zip(lignes, hashes) if row.role == niveau]
+        if not paquet:
+            continue
+        valeurs = []
+        for ligne, row, password_hash in paquet:
+            chef_id, chef_ligne = chefs[ligne]
+            valeurs.append({
+                "username": row.username,
+                "password_hash": password_hash,
+                "role": row.role,
+                "cspro_code": row.cspro_code,
+                "chef_id": ids_crees[chef_ligne] if chef_ligne is not None else chef_id,
+            })
+        ids = db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), valeurs).scalars().all()
+        ids_crees.update((ligne, user_id) for (ligne, _, _), user_id in zip(paquet, ids))
+        report.par_role[niveau.value] = len(paquet)
+
+    report.crees = len(ids_crees)
+    report.applique = True
+    report.duree_ms = round((time.perf_counter() - t0) * 1000, 1)
+    return report
@@ -0,0 +1,148 @@
+# backend/app/services/quota_engine.py
+
+"""
+Moteur d'évaluation vectorisé des quotas croisés (QuotaConfig.regles).
+
+Évaluer chaque règle questionnaire par questionnaire en Python (boucle for) devient
+très lent quand on a des centaines de milliers de questionnaires et des dizaines de
+règles par affectation. Ici on travaille "en colonnes", façon NumPy :
+
+1. Chaque variable utilisée dans une condition (ex: SEXE) devient une colonne.
+   On la "factorise" : les valeurs sont remplacées par un petit entier (le n° de la valeur
+   distincte). Une colonne de 1 million de lignes n'a souvent que 2 à 20 valeurs distinctes.
+2. Une condition élémentaire (SEXE == "F") est évaluée UNE fois par valeur distincte,
+   ce qui donne une table de correspondance (lut) ; le masque de la colonne entière
+   s'obtient ensuite par simple indexation : lut[codes].
+3. Une règle = le ET de ses conditions élémentaires (masques partagés entre règles).
+4. Le comptage par affectation se fait d'un coup avec np.bincount.
+
+Toutes les règles de toutes les affectations sont donc calculées en un seul passage.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+CounterKey = Tuple[int, str] # (affectation_id, regle_hash)
+_Atom = Tuple[str, FrozenSet[str]] # (variable, valeurs acceptées)
+
+
+def _accepted(expected: Any) -> FrozenSet[str]:
+    """Valeurs acceptées par une condition, en texte ("2" == 2), comme quotas.matches()."""
+    return frozenset(str(v) for v in expected) if isinstance(expected, list) else frozenset([str(expected)])
+
+
+class QuotaEngine:
+    """
+    Règles de quota de toutes les affectations, compilées une fois pour toutes.
+    'regles_par_affectation' : {affectation_id: [(regle_hash, conditions), ...]}
+    """
+
+    def __init__(self, regles_par_affectation: Dict[int, List[Tuple[str, Dict[str, Any]]]], global_hash: str):
+        self.global_hash = global_hash
+        self.affectation_ids = np.array(sorted(regles_par_affectation), dtype=np.int64)
+
+        # Règles distinctes : une même règle (même hash) peut servir à plusieurs affectations
+        self.rules: Dict[str, List[_Atom]] = {}
+        affectations_par_regle: Dict[str, Set[int]] = defaultdict(set)
+        for aff_id, regles in regles_par_affectation.items():
+            for h, conditions in regles:
+                self.rules[h] = [(var, _accepted(expected)) for var, expected in sorted(conditions.items())]
+                affectations_par_regle[h].add(aff_id)
+
+        # Pour chaque règle : à quelles affectations (par position dans self.affectation_ids) elle s'applique
+        self.rule_affectations: Dict[str, np.ndarray] = {}
+        for h, aff_ids in affectations_par_regle.items():
+            lut = np.zeros(len(self.affectation_ids) + 1, dtype=bool) # +1 : case "pas d'affectation"
+            lut[np.searchsorted(self.affectation_ids, sorted(aff_ids))] = True
+            self.rule_affectations[h] = lut
+
+    def variables(self) -> Set[str]:
+        """Variables CSPro nécessaires à l'évaluation (les seules colonnes à extraire)."""
+        return {var for atoms in self.rules.values() for var, _ in atoms}
+
+    def columns_from_records(self, records: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Passage "lignes -> colonnes" pour un lot de questionnaires de la synchro."""
+        columns = {}
+        for var in self.variables():
+            # Les enregistrements répétés (listes) deviennent des tuples pour pouvoir être factorisés.
+            # np.fromiter garde chaque tuple comme UN objet (np.array en ferait une 2e dimension).
+            values = (tuple(v) if isinstance(v, list) else v for v in (record.get(var) for record in records))
+            columns[var] = np.fromiter(values, dtype=object, count=len(records))
+        return columns
+
+    # ÉVALUATION
+
+    def _positions(self, affectation_ids: np.ndarray) -> np.ndarray:
+        """Position de chaque affectation dans self.affectation_ids (dernière case = inconnue)."""
+        inconnue = len(self.affectation_ids)
+        if inconnue == 0:
+            return np.full(len(affectation_ids), inconnue, dtype=np.int64)
+        pos = np.searchsorted(self.affectation_ids, affectation_ids)
+        pos = np.clip(pos, 0, inconnue - 1)
+        trouve = self.affectation_ids[pos] == affectation_ids
+        return np.where(trouve, pos, inconnue)
+
+    def _rule_masks(self, columns: Dict[str, np.ndarray], n: int):
+        """Renvoie (regle_hash, masque booléen) pour chaque règle, en partageant les conditions élémentaires."""
+        factorized: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        atom_masks: Dict[_Atom, np.ndarray] = {}
+
+        for h, atoms in self.rules.items():
+            mask = np.ones(n, dtype=bool)
+            for atom in atoms:
+                if atom not in atom_masks:
+                    var, accepted = atom
+                    if var not in columns:
+                        atom_masks[atom] = np.zeros(n, dtype=bool)
+                    else:
+                        if var not in factorized:
+                            # codes = n° de valeur distincte par ligne (-1 = vide), uniques = valeurs distinctes
+                            factorized[var] = pd.factorize(columns[var], use_na_sentinel=True)
+                        codes, uniques = factorized[var]
+                        lut = np.zeros(len(uniques) + 1, dtype=bool) # dernière case : valeur vide (code -1)
+                        for i, u in enumerate(uniques):
+                            values = u if isinstance(u, tuple) else (u,)
+                            lut[i] = any(v is not None and str(v) in accepted for v in values)
+                        atom_masks[atom] = lut[codes]
+                mask &= atom_masks[atom]
+            yield h, mask
+
+    def count(self, columns: Dict[str, np.ndarray], affectation_ids: np.ndarray, complet: np.ndarray) -> Dict[CounterKey, int]:
+        """
+        Compteurs de toutes les règles pour toutes les affectations, en un passage.
+        affectation_ids : affectation de chaque questionnaire (-1 si aucune)
+        complet : masque des questionnaires complets (les seuls qui comptent)
+        """
+        n = len(affectation_ids)
+        positions = self._positions(np.asarray(affectation_ids, dtype=np.int64))
+        taille = len(self.affectation_ids) + 1
+        result: Dict[CounterKey, int] = {}
+
+        def add(h: str, mask: np.ndarray):
+            counts = np.bincount(positions[mask], minlength=taille)[:-1]
+            for pos in np.nonzero(counts)[0]:
+                result[(int(self.affectation_ids[pos]), h)] = int(counts[pos])
+
+        add(self.global_hash, complet)
+        for h, mask in self._rule_masks(columns, n):
+            add(h, mask & complet & self.rule_affectations[h][positions])
+        return result
+
+    def row_hits(self, columns: Dict[str, np.ndarray], affectation_ids: np.ndarray, complet: np.ndarray) -> List[List[str]]:
+        """
+        Pour chaque questionnaire, la liste des règles qu'il remplit (pour survey_data.regles_quota).
+        """
+        n = len(affectation_ids)
+        positions = self._positions(np.asarray(affectation_ids, dtype=np.int64))
+        connue = positions < len(self.affectation_ids)
+        hits: List[List[str]] = [[] for _ in range(n)]
+
+        for i in np.nonzero(complet & connue)[0]:
+            hits[i].append(self.global_hash)
+        for h, mask in self._rule_masks(columns, n):
+            for i in np.nonzero(mask & complet & self.rule_affectations[h][positions])[0]:
+                hits[i].append(h)
+        return hits
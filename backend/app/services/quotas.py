@@ -0,0 +1,335 @@
+# backend/app/services/quotas.py
+
+"""
+Compteurs de quotas par affectation.
+
+- La synchro rattache chaque questionnaire à une affectation (contrôleur de l'agent + zone)
+  et calcule la liste des règles de quota qu'il remplit.
+- Les écarts (+1 / -1) sont appliqués à la table quota_counters dans la même transaction.
+- L'API lit ensuite les compteurs en une requête (O(règles) au lieu de O(questionnaires)).
+- Quand les règles d'une affectation changent, ses compteurs sont recalculés en SQL à partir
+  des réponses enregistrées (survey_data.reponses), sans attendre la synchro (recount_affectation).
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, and_, case, cast, delete, false, func, literal, or_, select, text, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.quotas import QuotaCounter
+from app.models.survey import SurveyData, SurveyStatus
+from app.models.users import User
+from app.models.zones import Affectation, Zone
+from app.schemas.maps import QuotaConfig
+from app.services.dictionary import DictionarySnapshot, get_snapshot
+from app.services.geo import haversine_m
+from app.services.quota_engine import QuotaEngine
+
+CounterKey = Tuple[int, str] # (affectation_id, regle_hash)
+
+# Verrou consultatif des compteurs dérivés de survey_data (quota_counters, kpi_daily)
+VERROU_COMPTEURS = "osm_compteurs"
+
+
+def rule_hash(conditions: Dict[str, Any]) -> str:
+    """
+    Empreinte stable d'une règle : même conditions -> même hash, quel que soit l'ordre des clés.
+    """
+    canonical = json.dumps(conditions or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+# Le quota global d'une affectation = la règle "sans condition"
+GLOBAL_HASH = rule_hash({})
+
+
+def matches(conditions: Dict[str, Any], record: Dict[str, Any]) -> bool:
+    """
+    Le questionnaire remplit-il toutes les conditions ?
+    On compare en texte ("2" == 2) car CSPro renvoie indifféremment des codes numériques ou alpha.
+    Une condition peut accepter plusieurs valeurs : {"AGE_GROUPE": ["1", "2"]}.
+    """
+    for variable, expected in conditions.items():
+        value = record.get(variable)
+        if value is None:
+            return False
+        accepted = {str(v) for v in expected} if isinstance(expected, list) else {str(expected)}
+        values = value if isinstance(value, list) else [value]
+        if not any(str(v) in accepted for v in values):
+            return False
+    return True
+
+
+def conditions_clause(conditions: Dict[str, Any], reponses=SurveyData.reponses):
+    """
+    Équivalent SQL de matches() sur survey_data.reponses : pour chaque variable, une des valeurs
+    acceptées, seule ou dans une liste (enregistrements répétés). Uniquement des tests @>,
+    servis par l'index GIN ix_survey_data_reponses.
+    """
+    clauses = []
+    for variable, expected in sorted(conditions.items()):
+        accepted = sorted({str(v) for v in expected}) if isinstance(expected, list) else [str(expected)]
+        clauses.append(or_(false(), *(
+            reponses.contains(forme) for v in accepted for forme in ({variable: v}, {variable: [v]})
+        )))
+    return and_(*clauses) if clauses else true()
+
+def decoded_answers(*where):
+    """
+    Sous-requête (id, status, reponses) pour évaluer plusieurs règles par questionnaire.
+    Les réponses (2 à 3 Ko compressés) sont décompressées une fois par ligne ('|| {}' + OFFSET 0) :
+    sinon chaque test @> les décompresse à nouveau (7 fois plus lent pour 10 règles, bench_reponses.py).
+    """
+    return (
+        select(SurveyData.id, SurveyData.status,
+               SurveyData.reponses.op("||", return_type=JSONB)(cast(literal("{}"), JSONB)).label("reponses"))
+        .where(*where)
+        .offset(0)
+        .subquery("r")
+    )
+
+
+@dataclass
+class _AffectationInfo:
+    id: int
+    zone_id: int
+    zone_lat: float
+    zone_lon: float
+    date_debut: Optional[datetime]
+    date_fin: Optional[datetime]
+
+
+class QuotaResolver:
+    """
+    Rattache les questionnaires aux affectations, sans requête par questionnaire.
+    Chargé une fois par run de synchro : on garde en mémoire le contrôleur de chaque agent
+    et les affectations actives de chaque contrôleur (quelques milliers de lignes au plus).
+    Les règles de quota de ces affectations sont compilées dans un QuotaEngine (évaluation vectorisée).
+    """
+
+    def __init__(self, chef_par_agent: Dict[str, int], affectations_par_controleur: Dict[int, List[_AffectationInfo]],
+                 engine: QuotaEngine):
+        self.chef_par_agent = chef_par_agent
+        self.affectations_par_controleur = affectations_par_controleur
+        self.controleur_par_affectation = {
+            aff.id: controleur_id for controleur_id, affs in affectations_par_controleur.items() for aff in affs
+        }
+        self.engine = engine
+
+    @classmethod
+    def load(cls, db: Session, dictionnaire: Optional[DictionarySnapshot] = None) -> "QuotaResolver":
+        # Les conditions peuvent être écrites avec les libellés du dictionnaire ("Féminin") :
+        # on les compile avec les codes CSPro. Le hash (clé des compteurs) reste celui du texte saisi.
+        dictionnaire = dictionnaire or get_snapshot(db)
+        chefs = db.execute(
+            select(User.cspro_code, User.chef_id).where(User.cspro_code.isnot(None), User.chef_id.isnot(None))
+        ).all()
+
+        rows = db.execute(
+            select(Affectation, Zone.latitude_centrale, Zone.longitude_centrale)
+            .join(Zone, Zone.id == Affectation.zone_id)
+            .where(Affectation.est_actif == True)
+        ).all()
+
+        par_controleur: Dict[int, List[_AffectationInfo]] = defaultdict(list)
+        regles: Dict[int, List[Tuple[str, Dict[str, Any]]]] = {}
+        for aff, lat, lon in rows:
+            par_controleur[aff.controleur_id].append(_AffectationInfo(aff.id, aff.zone_id, lat, lon, aff.date_debut, aff.date_fin))
+            config = QuotaConfig(**aff.objectifs_quota) if aff.objectifs_quota else None
+            regles[aff.id] = [
+                (rule_hash(r.conditions), dictionnaire.normalize_conditions(r.conditions))
+                for r in (config.regles if config else [])
+            ]
+
+        return cls({code: chef for code, chef in chefs}, dict(par_controleur), QuotaEngine(regles, GLOBAL_HASH))
+
+    def resolve(self, row: Dict[str, Any]) -> Optional[_AffectationInfo]:
+        """
+        Affectation d'un questionnaire : celle du contrôleur de l'agent.
+        Si le contrôleur a plusieurs zones en même temps, on garde celles dont la période
+        couvre la date d'entretien, puis la zone la plus proche du point GPS.
+        """
+        controleur_id = self.chef_par_agent.get(row.get("agent_code"))
+        candidats = self.affectations_par_controleur.get(controleur_id, [])
+        if len(candidats) <= 1:
+            return candidats[0] if candidats else None
+
+        jour = row.get("date_entretien")
+        if jour is not None:
+            dans_periode = [
+                a for a in candidats
+                if (a.date_debut is None or a.date_debut <= jour) and (a.date_fin is None or jour <= a.date_fin)
+            ]
+            candidats = dans_periode or candidats
+
+        lat, lon = row.get("latitude"), row.get("longitude")
+        if len(candidats) > 1 and lat is not None and lon is not None:
+            return min(candidats, key=lambda a: haversine_m(lat, lon, a.zone_lat, a.zone_lon))
+        return candidats[0]
+
+    def rule_hits(self, records: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> List[List[str]]:
+        """
+        Règles remplies par chaque questionnaire d'un lot (seuls les questionnaires complets comptent).
+        'rows' doivent déjà porter leur affectation_id.
+        """
+        columns = self.engine.columns_from_records(records)
+        affectation_ids = np.array([row["affectation_id"] if row["affectation_id"] is not None else -1 for row in rows], dtype=np.int64)
+        complet = np.array([row["status"] == SurveyStatus.complet for row in rows], dtype=bool)
+        return self.engine.row_hits(columns, affectation_ids, complet)
+
+
+# ÉCRITURE DES COMPTEURS
+
+def counter_deltas(previous: Dict[str, Dict[str, Any]], rows: Iterable[Dict[str, Any]]) -> Dict[CounterKey, int]:
+    """
+    Écarts à appliquer aux compteurs : -1 pour l'ancien état, +1 pour le nouveau.
+    'previous' : état en base des questionnaires déjà connus (voir sync.fetch_previous).
+    """
+    deltas: Dict[CounterKey, int] = defaultdict(int)
+    for row in rows:
+        old = previous.get(row["questionnaire_uuid"])
+        if old is not None and old["affectation_id"] is not None:
+            for h in old["regles_quota"] or []:
+                deltas[(old["affectation_id"], h)] -= 1
+        if row.get("affectation_id") is not None:
+            for h in row.get("regles_quota") or []:
+                deltas[(row["affectation_id"], h)] += 1
+    return {key: n for key, n in deltas.items() if n != 0}
+
+def lock_counters(db: Session, exclusive: bool = False) -> None:
+    """
+    Verrou consultatif de transaction (libéré au commit) sur les compteurs.
+    Les lots de synchro le prennent partagé (ils s'excluent déjà questionnaire par questionnaire) ;
+    un recomptage ou une reconstruction le prend exclusif : aucun lot ne lit l'état précédent
+    ni n'applique d'écart pendant qu'il réécrit les compteurs.
+    À prendre avant tout autre verrou de la transaction (pas d'interblocage).
+    """
+    fonction = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    db.execute(text(f"SELECT {fonction}(hashtext(:key))"), {"key": VERROU_COMPTEURS})
+
+def apply_counter_deltas(db: Session, deltas: Dict[CounterKey, int]) -> None:
+    """
+    Un seul INSERT ... ON CONFLICT DO UPDATE SET nombre = nombre + écart.
+    Les clés sont triées pour que deux transactions concurrentes verrouillent
+    les lignes dans le même ordre (pas d'interblocage).
+    """
+    if not deltas:
+        return
+    now = datetime.now()
+    values = [
+        {"affectation_id": aff_id, "regle_hash": h, "nombre": n, "derniere_maj": now}
+        for (aff_id, h), n in sorted(deltas.items())
+    ]
+    stmt = pg_insert(QuotaCounter).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QuotaCounter.affectation_id, QuotaCounter.regle_hash],
+        set_={
+            "nombre": QuotaCounter.nombre + stmt.excluded.nombre,
+            "derniere_maj": stmt.excluded.derniere_maj,
+        },
+    )
+    db.execute(stmt)
+
+def rebuild_counters(db: Session) -> int:
+    """
+    Reconstruction complète des compteurs à partir de survey_data
+    (après un rattrapage de données, ou si un compteur a dérivé).
+    Renvoie le nombre de compteurs écrits.
+    """
+    lock_counters(db, exclusive=True) # Aucun lot de synchro n'applique d'écart pendant la reconstruction
+    db.execute(delete(QuotaCounter))
+    result = db.execute(text("""
+        INSERT INTO quota_counters (affectation_id, regle_hash, nombre, derniere_maj)
+        SELECT affectation_id, regle, count(*), now()
+        FROM survey_data, unnest(regles_quota) AS regle
+        WHERE affectation_id IS NOT NULL
+        GROUP BY affectation_id, regle
+    """))
+    return result.rowcount
+
+
+def recount_affectation(db: Session, aff: Affectation, dictionnaire: Optional[DictionarySnapshot] = None) -> int:
+    """
+    Recalcule, à partir des réponses enregistrées, les règles remplies par les questionnaires
+    d'une affectation (regles_quota, mêmes règles que QuotaEngine.row_hits) puis ses compteurs.
+    À appeler quand ses règles changent : une nouvelle règle compte aussitôt l'existant.
+    Les questionnaires sans réponses enregistrées (chargés avant leur stockage) gardent leurs règles.
+    Renvoie le nombre de questionnaires dont les règles ont changé.
+    """
+    # Sinon un lot de synchro lit l'ancien regles_quota, puis réapplique son écart sur les compteurs recalculés
+    lock_counters(db, exclusive=True)
+    dictionnaire = dictionnaire or get_snapshot(db)
+    config = QuotaConfig(**aff.objectifs_quota) if aff.objectifs_quota else None
+    regles = {rule_hash(r.conditions): dictionnaire.normalize_conditions(r.conditions) for r in (config.regles if config else [])}
+
+    # 1. Une seule mise à jour : ARRAY[global, CASE WHEN conditions THEN hash END, ...] sans les NULL.
+    # Seules les lignes dont les règles changent sont réécrites (chaque réécriture met aussi à jour l'index GIN).
+    r = decoded_answers(SurveyData.affectation_id == aff.id, SurveyData.reponses.isnot(None))
+    remplies = array([GLOBAL_HASH] + [case((conditions_clause(c, r.c.reponses), h)) for h, c in regles.items()], type_=String)
+    nouvelles = select(r.c.id, case(
+        (r.c.status == SurveyStatus.complet, func.array_remove(remplies, None)),
+        else_=cast(array([], type_=String), ARRAY(String)),
+    ).label("regles")).subquery("n")
+    result = db.execute(
+        update(SurveyData)
+        .where(SurveyData.id == nouvelles.c.id, SurveyData.regles_quota.is_distinct_from(nouvelles.c.regles))
+        .values(regles_quota=nouvelles.c.regles)
+    )
+
+    # 2. Compteurs de l'affectation, comme rebuild_counters
+    db.execute(delete(QuotaCounter).where(QuotaCounter.affectation_id == aff.id))
+    db.execute(text("""
+        INSERT INTO quota_counters (affectation_id, regle_hash, nombre, derniere_maj)
+        SELECT affectation_id, regle, count(*), now()
+        FROM survey_data, unnest(regles_quota) AS regle
+        WHERE affectation_id = :aff_id
+        GROUP BY affectation_id, regle
+    """), {"aff_id": aff.id})
+    return result.rowcount
+
+def rebuild_quota_hits(db: Session) -> int:
+    """
+    Recalcule regles_quota de tous les questionnaires rattachés, à partir de leurs réponses
+    (puis les compteurs de chaque affectation). Renvoie le nombre de questionnaires modifiés.
+    """
+    dictionnaire = get_snapshot(db)
+    affectations = db.execute(
+        select(Affectation).where(Affectation.id.in_(select(SurveyData.affectation_id).distinct()))
+    ).scalars().all()
+    return sum(recount_affectation(db, aff, dictionnaire) for aff in affectations)
+
+
+# LECTURE (API)
+
+def load_counters(db: Session, affectation_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """Tous les compteurs des affectations demandées, en une requête."""
+    if not affectation_ids:
+        return {}
+    rows = db.execute(
+        select(QuotaCounter.affectation_id, QuotaCounter.regle_hash, QuotaCounter.nombre)
+        .where(QuotaCounter.affectation_id.in_(affectation_ids))
+    ).all()
+    counters: Dict[int, Dict[str, int]] = defaultdict(dict)
+    for aff_id, h, n in rows:
+        counters[aff_id][h] = n
+    return counters
+
+def fill_progress(config: Optional[QuotaConfig], counters: Dict[str, int],
+                  dictionnaire: Optional[DictionarySnapshot] = None) -> None:
+    """
+    Remplit les champs 'actuel' d'une configuration de quotas à partir des compteurs
+    (et, à défaut de description saisie, la décrit avec les libellés du dictionnaire).
+    """
+    if config is None:
+        return
+    config.actuel_global = counters.get(GLOBAL_HASH, 0)
+    for regle in config.regles:
+        regle.actuel = counters.get(rule_hash(regle.conditions), 0)
+        if regle.description is None and dictionnaire is not None:
+            regle.description = dictionnaire.describe(regle.conditions)
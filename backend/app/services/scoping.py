@@ -0,0 +1,113 @@
+# backend/app/services/scoping.py
+
+"""
+Périmètre visible de chaque utilisateur (qui voit quoi), calculé une fois puis gardé en mémoire.
+
+- Agent : ses propres questionnaires (et l'objectif de l'équipe de son contrôleur).
+- Contrôleur : son équipe ; Superviseur : tout son sous-arbre.
+- Directeur : tout (aucun filtre).
+
+Le périmètre (Scope) garde les codes CSPro visibles (ensemble pour les tests d'appartenance,
+tuple trié pour les requêtes), les ids des subordonnés et des contrôleurs du sous-arbre.
+Les routes (points, KPI, alertes, quotas, flux en direct) n'ont plus à parcourir la
+hiérarchie ni à traduire les utilisateurs en codes à chaque appel : get_scope() coûte une
+requête par utilisateur et par SCOPE_CACHE_TTL, et s'injecte en SQL sous forme d'UN
+paramètre tableau (agent_code = ANY(:codes)) au lieu d'une liste IN (...) à N paramètres.
+
+Invalidation : toute modification de la hiérarchie (création, changement de chef,
+suppression, import) appelle publish_hierarchy_change(db) avant son commit ; chaque
+processus vide alors son cache (NOTIFY, voir core/notifications).
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional, Tuple
+
+from sqlalchemy import String, Integer, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.notifications import notify, subscribe
+from app.models.users import RoleEnum, User
+from app.services.hierarchy import team_members
+
+SCOPE_CACHE_TTL = float(os.getenv("SCOPE_CACHE_TTL", "300"))
+SCOPE_CACHE_SIZE = int(os.getenv("SCOPE_CACHE_SIZE", "10000"))
+CANAL_HIERARCHIE = "osm_hierarchie"
+
+_scope_cache = TTLCache(maxsize=SCOPE_CACHE_SIZE, ttl=SCOPE_CACHE_TTL, name="perimetres")
+
+
+@dataclass(frozen=True)
+class Scope:
+    """
+    Périmètre d'un utilisateur. Les ensembles valent None quand il n'y a pas de restriction (directeur).
+    """
+    user_id: int
+    user_ids: Optional[FrozenSet[int]]       # Subordonnés directs et indirects
+    agent_codes: Optional[FrozenSet[str]]    # Codes CSPro visibles
+    controleur_ids: Optional[FrozenSet[int]] # Contrôleurs dont on voit les affectations (quotas, objectifs)
+    codes: Optional[Tuple[str, ...]] = field(default=None, repr=False) # agent_codes triés (paramètre SQL)
+
+    @property
+    def illimite(self) -> bool:
+        return self.agent_codes is None
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.user_ids is None or user_id == self.user_id or user_id in self.user_ids
+
+    def sees_agent(self, agent_code: Optional[str]) -> bool:
+        return self.agent_codes is None or agent_code in self.agent_codes
+
+    def agent_filter(self, column):
+        """Prédicat SQL 'column = ANY(:codes)', ou None si rien à filtrer."""
+        if self.codes is None:
+            return None
+        return column == any_(bindparam("codes_visibles", list(self.codes), type_=ARRAY(String), unique=True))
+
+    def controleur_filter(self, column):
+        if self.controleur_ids is None:
+            return None
+        ids = sorted(self.controleur_ids)
+        return column == any_(bindparam("controleurs_visibles", ids, type_=ARRAY(Integer), unique=True))
+
+
+def _load(db: Session, user: User) -> Scope:
+    if user.role == RoleEnum.agent:
+        codes = frozenset([user.cspro_code] if user.cspro_code else [])
+        return Scope(
+            user_id=user.id,
+            user_ids=frozenset(),
+            agent_codes=codes,
+            controleur_ids=frozenset([user.chef_id] if user.chef_id else []), # L'agent suit l'objectif de son équipe
+            codes=tuple(sorted(codes)),
+        )
+    membres = team_members(db, user.id)
+    codes = frozenset([code for _, code, _ in membres if code] + ([user.cspro_code] if user.cspro_code else []))
+    controleurs = {uid for uid, _, role in membres if role == RoleEnum.controleur}
+    if user.role == RoleEnum.controleur:
+        controleurs.add(user.id)
+    return Scope(
+        user_id=user.id,
+        user_ids=frozenset(uid for uid, _, _ in membres),
+        agent_codes=codes,
+        controleur_ids=frozenset(controleurs),
+        codes=tuple(sorted(codes)),
+    )
+
+def get_scope(db: Session, user: User) -> Scope:
+    if user.role == RoleEnum.directeur:
+        return Scope(user.id, None, None, None)
+    # Clé = (id, rôle, chef) : un utilisateur modifié par un autre chemin ne réutilise pas l'ancien périmètre
+    return _scope_cache.get_or_set((user.id, user.role, user.chef_id), lambda: _load(db, user))
+
+def invalidate_scopes(_payload: str = "") -> None:
+    _scope_cache.clear()
+
+def publish_hierarchy_change(db: Session) -> None:
+    """À appeler dans la transaction qui modifie la hiérarchie : tous les processus oublient les périmètres au commit."""
+    notify(db, CANAL_HIERARCHIE)
+
+
+subscribe(CANAL_HIERARCHIE, invalidate_scopes)
@@ -0,0 +1,81 @@
+# backend/app/services/settings.py
+
+"""
+Photo (snapshot) en mémoire des paramètres globaux (ligne unique de global_settings).
+
+Chaque évaluation des règles, chaque bandeau du tableau de bord (message_du_jour) et chaque
+lot de synchro en a besoin, alors qu'ils changent quelques fois par campagne. On lit donc la
+ligne une fois, on la convertit une fois (jours interdits -> ensemble de jours ISO, plage
+horaire -> AlertRules ; réponse de GET /settings déjà validée), et on la garde en mémoire.
+
+Mise à jour :
+- PUT /settings appelle publish_change(db) avant son commit : NOTIFY sur CANAL_PARAMETRES,
+  que l'écouteur de chaque processus (core/notifications) transforme en invalidation locale ;
+- filet de sécurité sans écouteur (scripts, perte de connexion) : SETTINGS_CACHE_TTL secondes.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import FrozenSet, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.notifications import notify, subscribe
+from app.models.settings import GlobalSettings
+from app.schemas.settings import SettingsOut
+from app.services.alerts import AlertRules
+
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "300"))
+CANAL_PARAMETRES = "osm_parametres"
+
+_settings_cache = TTLCache(maxsize=1, ttl=SETTINGS_CACHE_TTL, name="parametres")
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    out: Optional[SettingsOut] # Réponse de GET /settings (None tant que la ligne n'existe pas)
+    rules: AlertRules          # Règles typées : jours interdits en jours ISO, plage horaire
+
+    @property
+    def jours_interdits(self) -> FrozenSet[int]:
+        return self.rules.jours_interdits
+
+    @property
+    def tolerance_gps_metres(self) -> int:
+        return self.rules.tolerance_gps_metres
+
+    @property
+    def message_du_jour(self) -> Optional[str]:
+        return self.out.message_du_jour if self.out else None
+
+
+def _load(db: Session) -> SettingsSnapshot:
+    settings = db.query(GlobalSettings).first()
+    return SettingsSnapshot(
+        out=SettingsOut.model_validate(settings) if settings else None,
+        rules=AlertRules.from_settings(settings),
+    )
+
+def get_settings(db: Session) -> SettingsSnapshot:
+    return _settings_cache.get_or_set("parametres", lambda: _load(db))
+
+def invalidate_settings(_payload: str = "") -> None:
+    _settings_cache.clear()
+
+def publish_change(db: Session) -> None:
+    """À appeler dans la transaction qui modifie global_settings : les autres processus sont prévenus au commit."""
+    notify(db, CANAL_PARAMETRES)
+
+def record_reevaluation(db: Session, statut: str, erreur: Optional[str] = None) -> None:
+    """Statut de la réévaluation des alertes, affiché par GET /settings (dans la transaction en cours)."""
+    db.execute(update(GlobalSettings).values(
+        reevaluation_statut=statut, reevaluation_erreur=erreur[:2000] if erreur else None,
+        reevaluation_maj=datetime.now(),
+    ))
+    publish_change(db)
+
+
+subscribe(CANAL_PARAMETRES, invalidate_settings)
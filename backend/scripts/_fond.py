@@ -0,0 +1,19 @@
+# backend/scripts/_fond.py
+
+"""
+Préambule commun des scripts de fond (synchro, imports, reconstructions, benchmarks).
+
+À importer AVANT tout module app.* :
+    import _fond  # noqa: F401
+
+- rend le paquet app importable quand le script est lancé par "python scripts/xxx.py" ;
+- lève la limite de durée par requête : DB_STATEMENT_TIMEOUT_MS protège l'API,
+  un traitement de fond peut légitimement tourner plusieurs minutes.
+  Elle est lue à la création du moteur, d'où l'import en premier.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ["DB_STATEMENT_TIMEOUT_MS"] = "0"
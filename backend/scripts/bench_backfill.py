@@ -0,0 +1,142 @@
+# backend/scripts/bench_backfill.py
+
+"""
+Benchmark du chargement de survey_data pour un rattrapage massif (services/backfill.py).
+
+Les mêmes --questionnaires faux questionnaires (uuid "bench-bf-...", --variables réponses
+chacun) sont préparés une fois comme par la synchro (transformation, quotas, GPS), puis
+écrits par chaque méthode, table remise au même état entre deux mesures :
+1. ORM, ligne par ligne (session.add + flush), commit tous les --lot (sur --orm-max lignes au plus) ;
+2. executemany de psycopg2 (un INSERT ... ON CONFLICT par ligne, même connexion) ;
+3. INSERT multi-lignes de la synchro (sync.upsert_surveys), un ordre par --lot lignes ;
+4. COPY binaire en table temporaire + une fusion (backfill), avec les index ;
+5. idem en supprimant puis reconstruisant les index secondaires.
+Seule l'écriture est chronométrée (la préparation est la même pour tous).
+
+    python scripts/bench_backfill.py --questionnaires 100000 --variables 30
+"""
+
+import argparse
+import enum
+import time
+
+from psycopg2.extras import Json
+from sqlalchemy import text
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.models.survey import SurveyData
+from app.models.zones import Affectation # noqa: F401 (relations des modèles)
+from app.services.backfill import (
+    BACKFILL_BATCH_SIZE, create_staging, drop_secondary_indexes,
+    merge_staging, rebuild_indexes, stage_rows,
+)
+from app.services.sync import UPSERT_COLUMNS, SyncContext, SyncReport, _prepare_batch, upsert_surveys
+
+PREFIXE = "bench-bf-"
+
+
+def fake_records(n: int, variables: int) -> list:
+    records = []
+    for i in range(n):
+        record = {
+            "uuid": f"{PREFIXE}{i}", "revision": i + 1,
+            "AGENT_CODE": f"BF{i % 300:04d}", "RESULTAT": str(1 + i % 3), "SEXE": str(1 + i % 2),
+            "GPS_LATITUDE": f"{5.3 + (i % 997) / 1e4:.6f}", "GPS_LONGITUDE": f"{-4.0 + (i % 991) / 1e4:.6f}",
+            "DATE_ENTRETIEN": f"202601{1 + i % 28:02d}", "HEURE_DEBUT": "0930", "HEURE_FIN": f"10{i % 60:02d}",
+        }
+        for k in range(1, variables + 1):
+            record[f"V{k:03d}"] = str(1 + (i * k) % (2 + k % 9))
+        records.append(record)
+    return records
+
+def reset(db):
+    db.execute(text("DELETE FROM survey_data WHERE questionnaire_uuid LIKE :motif"), {"motif": PREFIXE + "%"})
+    db.commit()
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE survey_data"))
+
+def par_orm(db, rows, lot):
+    for debut in range(0, len(rows), lot):
+        for row in rows[debut:debut + lot]:
+            db.add(SurveyData(**row))
+            db.flush()
+        db.commit()
+        db.expunge_all()
+
+def par_executemany(db, rows, lot):
+    colonnes = ["questionnaire_uuid", *UPSERT_COLUMNS]
+    sql = (f"INSERT INTO survey_data ({', '.join(colonnes)}) VALUES ({', '.join('%s' for _ in colonnes)}) "
+           f"ON CONFLICT (questionnaire_uuid) DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in UPSERT_COLUMNS)}")
+
+    def valeur(v):
+        if isinstance(v, enum.Enum): # Stockés sous leur nom, comme le fait l'ORM
+            return v.name
+        return Json(v) if isinstance(v, dict) else v
+
+    cursor = db.connection().connection.cursor()
+    for debut in range(0, len(rows), lot):
+        cursor.executemany(sql, [[valeur(row.get(c)) for c in colonnes] for row in rows[debut:debut + lot]])
+        db.commit()
+        cursor = db.connection().connection.cursor()
+
+def par_insert_multilignes(db, rows, lot):
+    for debut in range(0, len(rows), lot):
+        upsert_surveys(db, rows[debut:debut + lot])
+        db.commit()
+
+def par_copy(db, rows, lot, sans_index=False):
+    create_staging(db)
+    for debut in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        stage_rows(db, rows[debut:debut + BACKFILL_BATCH_SIZE])
+    definitions = drop_secondary_indexes(db) if sans_index else []
+    merge_staging(db)
+    rebuild_indexes(db, definitions)
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chargement massif de survey_data")
+    parser.add_argument("--questionnaires", type=int, default=100_000)
+    parser.add_argument("--variables", type=int, default=30)
+    parser.add_argument("--lot", type=int, default=1000, help="Lignes par transaction (ORM, executemany, multi-lignes)")
+    parser.add_argument("--orm-max", type=int, default=10_000, help="Lignes écrites par l'ORM (le plus lent)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        ctx = SyncContext.load(db)
+        records = fake_records(args.questionnaires, args.variables)
+        rows = []
+        report = SyncReport(source="bench", watermark_debut=0, watermark_fin=0)
+        for debut in range(0, len(records), BACKFILL_BATCH_SIZE):
+            rows += _prepare_batch(records[debut:debut + BACKFILL_BATCH_SIZE], ctx, report)
+        del records
+        print(f"Préparation de {len(rows)} questionnaires : {time.perf_counter() - t0:.1f}s")
+
+        methodes = [
+            ("ORM ligne par ligne", par_orm, rows[:args.orm_max]),
+            ("executemany", par_executemany, rows),
+            ("INSERT multi-lignes (synchro)", par_insert_multilignes, rows),
+            ("COPY binaire + fusion", par_copy, rows),
+            ("COPY binaire + fusion, sans index", lambda d, r, lot: par_copy(d, r, lot, sans_index=True), rows),
+        ]
+        reset(db)
+        print(f"\n{'méthode':<34} | {'lignes':>8} | {'durée (s)':>9} | {'lignes/s':>9}")
+        for nom, methode, lignes in methodes:
+            t0 = time.perf_counter()
+            methode(db, lignes, args.lot)
+            duree = time.perf_counter() - t0
+            ecrites = db.execute(text("SELECT count(*) FROM survey_data WHERE questionnaire_uuid LIKE :motif"),
+                                 {"motif": PREFIXE + "%"}).scalar()
+            assert ecrites == len(lignes), (nom, ecrites)
+            print(f"{nom:<34} | {len(lignes):>8} | {duree:>9.1f} | {len(lignes) / duree:>9.0f}")
+            reset(db)
+    finally:
+        db.rollback()
+        reset(db)
+        db.close()
+
+if __name__ == "__main__":
+    main()
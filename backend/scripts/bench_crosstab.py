@@ -0,0 +1,124 @@
+# backend/scripts/bench_crosstab.py
+
+"""
+Benchmark des tableaux croisés : snapshot Parquet (services/analytics.py) contre PostgreSQL.
+
+1. complète survey_data avec --lignes faux questionnaires (uuid "bench-xt-..."), répartis
+   sur --jours jours et --agents agents ;
+2. reconstruit le snapshot (durée de l'export complet), puis mesure un export incrémental
+   d'un jour (ce que fait la fin d'un run de synchro) ;
+3. pour chaque tableau croisé, médiane de --essais appels sur chaque moteur
+   (les deux doivent donner les mêmes cellules). Le cas "équipe" sert à régler
+   ANALYTICS_AGENTS_POSTGRES : sous ce nombre d'agents, l'API passe par PostgreSQL.
+
+    ANALYTICS_DIR=/tmp/osm_analytique python scripts/bench_crosstab.py --lignes 1000000
+    ANALYTICS_DIR=/tmp/osm_analytique python scripts/bench_crosstab.py --purge
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.models.zones import Affectation # noqa: F401  (relation User.affectations)
+from app.services import analytics
+from app.services.scoping import Scope
+
+PREFIXE_UUID = "bench-xt-"
+
+
+def seed(db, lignes: int, jours: int, agents: int):
+    """Questionnaires bench-xt-1 à bench-xt-<lignes>, statut / sexe / hors zone variés."""
+    db.execute(text("""
+        INSERT INTO survey_data (questionnaire_uuid, agent_code, status, respondent_sex,
+                                 date_entretien, date_synchro, duree_minutes, hors_zone)
+        SELECT :prefixe || g,
+               'BX' || lpad((g % :agents)::text, 4, '0'),
+               (ARRAY['complet', 'complet', 'partiel', 'refus'])[1 + g % 4]::surveystatus,
+               (ARRAY['M', 'F', 'Inconnu'])[1 + (g / 7) % 3]::genderenum,
+               date_trunc('day', now()) - (g % :jours) * interval '1 day' + interval '8 hours',
+               now(), 10 + g % 50, g % 17 = 0
+        FROM generate_series(1, :lignes) AS g
+        ON CONFLICT (questionnaire_uuid) DO NOTHING
+    """), {"prefixe": PREFIXE_UUID, "agents": agents, "jours": jours, "lignes": lignes})
+    db.execute(text("ANALYZE survey_data"))
+    db.commit()
+
+def purge():
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM survey_data WHERE questionnaire_uuid LIKE :motif"), {"motif": PREFIXE_UUID + "%"})
+        db.commit()
+        if analytics.disponible():
+            analytics.refresh_snapshot(db)
+        print("Données de test supprimées" + (", snapshot reconstruit" if analytics.disponible() else ""))
+    finally:
+        db.close()
+
+def mesure(fonction, essais: int):
+    durees, resultat = [], None
+    for _ in range(essais):
+        t0 = time.perf_counter()
+        resultat = fonction()
+        durees.append(time.perf_counter() - t0)
+    return statistics.median(durees), resultat
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des tableaux croisés (snapshot Parquet / PostgreSQL)")
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--jours", type=int, default=90)
+    parser.add_argument("--agents", type=int, default=400)
+    parser.add_argument("--essais", type=int, default=5)
+    parser.add_argument("--purge", action="store_true", help="Supprime les faux questionnaires et quitte")
+    args = parser.parse_args()
+
+    if not analytics.disponible():
+        print("Installer pyarrow et définir ANALYTICS_DIR")
+        sys.exit(1)
+    if args.purge:
+        purge()
+        return
+
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        seed(db, args.lignes, args.jours, args.agents)
+        total = db.execute(text("SELECT count(*) FROM survey_data")).scalar()
+        print(f"survey_data : {total} lignes (insertion {time.perf_counter() - t0:.1f}s)")
+
+        t0 = time.perf_counter()
+        analytics.refresh_snapshot(db)
+        taille = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(analytics.ANALYTICS_DIR) for f in fs)
+        print(f"Export complet : {time.perf_counter() - t0:.1f}s, {taille / 1e6:.1f} Mo sur disque")
+        duree, _ = mesure(lambda: analytics.refresh_snapshot(db, [date.today()]), args.essais)
+        print(f"Export incrémental d'un jour : {duree * 1000:.0f} ms")
+
+        tout = Scope(0, None, None, None)
+        codes = tuple(sorted(f"BX{i:04d}" for i in range(0, args.agents, 20))) # Une équipe de superviseur
+        equipe = Scope(0, frozenset(), frozenset(codes), frozenset(), codes)
+        semaine = {"debut": date.today() - timedelta(days=6), "fin": date.today()}
+        cas = [
+            ("jour x statut, tout", tout, "jour", "statut", {}),
+            ("agent x sexe, tout", tout, "agent", "sexe", {}),
+            ("statut x sexe, 7 jours", tout, "statut", "sexe", semaine),
+            ("agent x statut, équipe", equipe, "agent", "statut", {}),
+            ("jour x hors_zone, équipe, 7 jours", equipe, "jour", "hors_zone", semaine),
+        ]
+        print(f"\n{'tableau croisé':<36} | {'snapshot (ms)':>14} | {'postgres (ms)':>14} | {'gain':>6}")
+        for nom, scope, lignes, colonnes, filtres in cas:
+            d_snap, r_snap = mesure(lambda: analytics.crosstab(db, scope, lignes, colonnes, source="snapshot", **filtres), args.essais)
+            d_pg, r_pg = mesure(lambda: analytics.crosstab(db, scope, lignes, colonnes, source="postgres", **filtres), args.essais)
+            assert r_snap["source"] == "snapshot" and r_snap["cellules"] == r_pg["cellules"], nom
+            print(f"{nom:<36} | {d_snap * 1000:>14.1f} | {d_pg * 1000:>14.1f} | {d_pg / d_snap:>5.1f}x")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# backend/scripts/bench_cspro_reader.py
+
+"""
+Banc d'essai du lecteur CSPro en flux.
+
+Génère (une seule fois) un faux export à largeur fixe de la taille demandée,
+puis le relit en mesurant le débit et la mémoire maximale du processus.
+La mémoire doit rester stable quelle que soit la taille du fichier.
+
+    python scripts/bench_cspro_reader.py --taille-mo 2048
+    python scripts/bench_cspro_reader.py --taille-mo 2048 --format json
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.cspro_dcf import parse_dcf
+from app.services.cspro_reader import FileCaseSource, chunked
+
+# Dictionnaire synthétique : 1 enregistrement ménage + N enregistrements "membre"
+DCF_TEXTE = """[Dictionary]
+Name=BENCH_DICT
+Label=Banc d'essai
+RecordTypeStart=1
+RecordTypeLen=1
+
+[IdItems]
+
+[Item]
+Label=Numéro questionnaire
+Name=QUEST_ID
+Start=2
+Len=9
+
+[Record]
+Label=Ménage
+Name=MENAGE
+RecordTypeValue='1'
+
+[Item]
+Label=Code agent
+Name=AGENT_CODE
+Start=11
+Len=5
+DataType=Alpha
+
+[Item]
+Label=Résultat
+Name=RESULTAT
+Start=16
+Len=1
+
+[Item]
+Label=Sexe
+Name=SEXE
+Start=17
+Len=1
+
+[Item]
+Label=Date
+Name=DATE_ENTRETIEN
+Start=18
+Len=8
+
+[Item]
+Label=Latitude
+Name=GPS_LATITUDE
+Start=26
+Len=10
+Decimal=6
+DecimalChar=Yes
+
+[Item]
+Label=Longitude
+Name=GPS_LONGITUDE
+Start=36
+Len=10
+Decimal=6
+DecimalChar=Yes
+
+[Record]
+Label=Membre
+Name=MEMBRE
+RecordTypeValue='2'
+
+[Item]
+Label=Age
+Name=AGE
+Start=11
+Len=3
+
+[Item]
+Label=Ethnie
+Name=ETHNIE
+Start=14
+Len=2
+"""
+
+
+def generer_dat(path: str, taille_mo: int):
+    cible = taille_mo * 1_048_576
+    ecrit, numero = 0, 0
+    rnd = random.Random(42)
+    with open(path, "w", encoding="utf-8") as fh:
+        while ecrit < cible:
+            numero += 1
+            qid = f"{numero:09d}"
+            lignes = [
+                f"1{qid}AG{rnd.randint(1, 999):03d}{rnd.randint(1, 3)}{rnd.randint(1, 2)}2026{rnd.randint(1, 12):02d}15"
+                f"{rnd.uniform(4, 10):10.6f}{rnd.uniform(-8, -2):10.6f}\n"
+            ]
+            for _ in range(rnd.randint(1, 6)):
+                lignes.append(f"2{qid}{rnd.randint(0, 99):03d}{rnd.randint(1, 12):02d}\n")
+            bloc = "".join(lignes)
+            fh.write(bloc)
+            ecrit += len(bloc)
+
+def generer_json(path: str, taille_mo: int):
+    cible = taille_mo * 1_048_576
+    ecrit, numero = 0, 0
+    rnd = random.Random(42)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("[\n")
+        while ecrit < cible:
+            numero += 1
+            cas = {
+                "uuid": f"bench-{numero}",
+                "MENAGE": {"AGENT_CODE": f"AG{rnd.randint(1, 999):03d}", "RESULTAT": rnd.randint(1, 3), "SEXE": rnd.randint(1, 2)},
+                "MEMBRE": [{"AGE": rnd.randint(0, 99), "ETHNIE": rnd.randint(1, 12)} for _ in range(rnd.randint(1, 6))],
+            }
+            bloc = ("," if numero > 1 else "") + json.dumps(cas) + "\n"
+            fh.write(bloc)
+            ecrit += len(bloc)
+        fh.write("]\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai du lecteur CSPro en flux")
+    parser.add_argument("--taille-mo", type=int, default=2048, help="Taille du fichier synthétique (Mo)")
+    parser.add_argument("--format", choices=["dat", "json"], default="dat")
+    parser.add_argument("--fichier", default=None, help="Chemin du fichier synthétique (réutilisé s'il existe)")
+    parser.add_argument("--lot", type=int, default=1000, help="Taille des lots passés au chargeur")
+    args = parser.parse_args()
+
+    path = args.fichier or f"/tmp/bench_cspro_{args.taille_mo}mo.{args.format}"
+    if not os.path.exists(path):
+        print(f"Génération de {path} ({args.taille_mo} Mo)...")
+        (generer_dat if args.format == "dat" else generer_json)(path, args.taille_mo)
+
+    dcf = parse_dcf(DCF_TEXTE) if args.format == "dat" else None
+    source = FileCaseSource(path, dcf=dcf)
+
+    lots = 0
+    for lot in chunked(source.iter_cases(), args.lot):
+        lots += 1 # Le chargeur recevrait 'lot' ici
+
+    # ru_maxrss est en Ko sous Linux
+    pic_mo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Fichier : {os.path.getsize(path) / 1_048_576:.0f} Mo, {lots} lots de {args.lot}")
+    print(f"Lecture : {source.stats.resume()}")
+    print(f"Mémoire maximale du processus : {pic_mo:.0f} Mo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# backend/scripts/bench_reponses.py
+
+"""
+Benchmark du stockage des réponses (survey_data.reponses, JSONB + index GIN jsonb_path_ops)
+et des conditions de quota évaluées en SQL (quotas.conditions_clause).
+
+1. complète survey_data avec --questionnaires faux questionnaires (uuid "bench-rep-...") de
+   --variables variables chacun (V001, V002... ; V002 a une modalité rare, 1 %), répartis sur
+   --affectations affectations de test (inactives : la synchro ne les voit pas) ;
+2. affiche la place occupée (réponses par questionnaire, table, index GIN) ;
+3. chronomètre des comptages de questionnaires complets (médiane de --essais), avec l'index
+   GIN puis en lecture séquentielle forcée : condition courante, rare, croisée, et 10 règles
+   en un passage (count(*) FILTER (WHERE ...)), avec et sans quotas.decoded_answers ;
+4. chronomètre recount_affectation (10 règles) sur une affectation.
+
+    python scripts/bench_reponses.py --questionnaires 1000000 --variables 200
+    python scripts/bench_reponses.py --purge
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import and_, func, select, text
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.core.security import get_password_hash
+from app.models.survey import SurveyData, SurveyStatus
+from app.models.users import RoleEnum, User
+from app.models.zones import Affectation, Zone
+from app.services.quotas import conditions_clause, decoded_answers, recount_affectation
+
+PREFIXE = "bench-rep-"
+MODELES = 2000 # Questionnaires types : les réponses de chaque ligne en reprennent un, plus V001 et V002 propres
+
+REGLES = [
+    {"V001": "1"},
+    {"V002": "9"},
+    {"V001": "2", "V010": "1"},
+    {"V003": ["1", "2"], "V020": "3"},
+    {"V004": "1", "V005": "2", "V006": "1"},
+    {"V007": ["2", "3"]},
+    {"V008": "1", "V002": ["1", "2", "3"]},
+    {"V009": "4"},
+    {"V011": "2", "V012": "2"},
+    {"V013": ["1", "5"], "V001": "1"},
+]
+
+
+def seed(db, questionnaires: int, variables: int, nb_affectations: int) -> list:
+    controleur = User(username=PREFIXE + "controleur", password_hash=get_password_hash(PREFIXE),
+                      role=RoleEnum.controleur, chef_id=None)
+    zone = Zone(nom_zone=PREFIXE + "zone", latitude_centrale=0.0, longitude_centrale=0.0)
+    db.add_all([controleur, zone])
+    db.flush()
+    affectations = [Affectation(controleur_id=controleur.id, zone_id=zone.id, est_actif=False,
+                                objectifs_quota={"type": "croise", "regles": [{"conditions": c, "cible": 100} for c in REGLES]})
+                    for _ in range(nb_affectations)]
+    db.add_all(affectations)
+    db.flush()
+    ids = [a.id for a in affectations]
+
+    # Questionnaires types : Vk a 2 + k % 9 modalités
+    db.execute(text("""
+        CREATE TEMP TABLE modeles AS
+        SELECT t, jsonb_object_agg('V' || lpad(k::text, 3, '0'), (1 + floor(random() * (2 + k % 9)))::int::text) AS r
+        FROM generate_series(0, :modeles - 1) AS t, generate_series(1, :variables) AS k
+        GROUP BY t
+    """), {"modeles": MODELES, "variables": variables})
+    db.execute(text("CREATE INDEX ON modeles (t)"))
+    lot = 100_000
+    for debut in range(0, questionnaires, lot):
+        db.execute(text("""
+            INSERT INTO survey_data (questionnaire_uuid, agent_code, status, respondent_sex,
+                                     date_entretien, date_synchro, affectation_id, reponses)
+            SELECT :prefixe || g, 'BR' || lpad((g % 500)::text, 4, '0'),
+                   (CASE WHEN g % 5 = 3 THEN 'partiel' ELSE 'complet' END)::surveystatus, 'F'::genderenum,
+                   now(), now(), (:ids)[1 + g % cardinality(:ids)],
+                   m.r || jsonb_build_object('V001', (1 + g % 2)::text,
+                                             'V002', CASE WHEN g % 100 = 1 THEN '9' ELSE (1 + g % 7)::text END)
+            FROM generate_series(:debut + 1, :fin) AS g
+            JOIN modeles m ON m.t = (g::bigint * 7919) % :modeles
+        """), {"prefixe": PREFIXE, "ids": ids, "debut": debut, "fin": min(debut + lot, questionnaires), "modeles": MODELES})
+        db.commit()
+        print(f"  {min(debut + lot, questionnaires)} questionnaires insérés")
+    # VACUUM : vide la liste d'attente de l'index GIN (fastupdate), comme le ferait l'autovacuum
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE survey_data"))
+    return ids
+
+def purge():
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM survey_data WHERE questionnaire_uuid LIKE :motif"), {"motif": PREFIXE + "%"})
+        db.execute(text("DELETE FROM affectations WHERE controleur_id IN (SELECT id FROM users WHERE username = :u)"),
+                   {"u": PREFIXE + "controleur"})
+        db.execute(text("DELETE FROM users WHERE username = :u"), {"u": PREFIXE + "controleur"})
+        db.execute(text("DELETE FROM zones WHERE nom_zone = :z"), {"z": PREFIXE + "zone"})
+        db.commit()
+        print("Données de test supprimées")
+    finally:
+        db.close()
+
+def mesure(db, requete, essais: int, sequentiel: bool = False):
+    durees, resultat = [], None
+    for _ in range(essais):
+        if sequentiel:
+            db.execute(text("SET LOCAL enable_bitmapscan = off"))
+            db.execute(text("SET LOCAL enable_indexscan = off"))
+        t0 = time.perf_counter()
+        resultat = db.execute(requete).one()
+        durees.append(time.perf_counter() - t0)
+        db.rollback()
+    return statistics.median(durees) * 1000, resultat
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du stockage des réponses et des conditions de quota en SQL")
+    parser.add_argument("--questionnaires", type=int, default=1_000_000)
+    parser.add_argument("--variables", type=int, default=200)
+    parser.add_argument("--affectations", type=int, default=100)
+    parser.add_argument("--essais", type=int, default=5)
+    parser.add_argument("--purge", action="store_true", help="Supprime les faux questionnaires et quitte")
+    args = parser.parse_args()
+
+    if args.purge:
+        purge()
+        return
+
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        ids = seed(db, args.questionnaires, args.variables, args.affectations)
+        print(f"Insertion : {time.perf_counter() - t0:.0f}s")
+
+        taille = db.execute(text("""
+            SELECT avg(pg_column_size(reponses)), sum(pg_column_size(reponses)),
+                   pg_relation_size('ix_survey_data_reponses')
+            FROM survey_data WHERE questionnaire_uuid LIKE :motif
+        """), {"motif": PREFIXE + "%"}).one()
+        print(f"Réponses : {taille[0]:.0f} octets par questionnaire (compressés), "
+              f"total : {taille[1] / 1e6:.0f} Mo, index GIN : {taille[2] / 1e6:.0f} Mo")
+
+        complets = SurveyData.status == SurveyStatus.complet
+        cas = [
+            ("1 condition, 50 %", select(func.count()).where(complets, conditions_clause(REGLES[0]))),
+            ("1 condition rare, 1 %", select(func.count()).where(complets, conditions_clause(REGLES[1]))),
+            ("3 variables croisées", select(func.count()).where(complets, conditions_clause(REGLES[4]))),
+            ("10 règles, count FILTER", select(*[func.count().filter(conditions_clause(r)) for r in REGLES]).where(complets)),
+            ("10 règles, 1 affectation", select(*[func.count().filter(conditions_clause(r)) for r in REGLES])
+                .where(complets, SurveyData.affectation_id == ids[0])),
+        ]
+        # Mêmes comptages, réponses décompressées une fois par ligne (comme recount_affectation)
+        for nom, where in (("10 règles, décompressé 1 fois", complets),
+                           ("10 règles, 1 aff., décompr. 1 fois", and_(complets, SurveyData.affectation_id == ids[0]))):
+            r = decoded_answers(where)
+            cas.append((nom, select(*[func.count().filter(conditions_clause(regle, r.c.reponses)) for regle in REGLES])))
+        print(f"\n{'comptage':<34} | {'GIN (ms)':>10} | {'séquentiel (ms)':>16} | résultat")
+        for nom, requete in cas:
+            d_gin, r_gin = mesure(db, requete, args.essais)
+            d_seq, r_seq = mesure(db, requete, args.essais, sequentiel=True)
+            assert tuple(r_gin) == tuple(r_seq), nom
+            print(f"{nom:<34} | {d_gin:>10.1f} | {d_seq:>16.1f} | {tuple(r_gin)[:3]}")
+
+        aff = db.get(Affectation, ids[0])
+        durees = []
+        for _ in range(args.essais):
+            t0 = time.perf_counter()
+            n = recount_affectation(db, aff)
+            durees.append(time.perf_counter() - t0)
+            db.rollback()
+        print(f"\nrecount_affectation (10 règles, {n} questionnaires) : {statistics.median(durees) * 1000:.0f} ms")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
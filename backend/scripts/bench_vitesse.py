@@ -0,0 +1,120 @@
+# backend/scripts/bench_vitesse.py
+
+"""
+Benchmark de la détection vitesse / rafale (alertes) selon la taille de l'historique.
+
+Pour chaque taille d'historique (--tailles) :
+1. complète survey_data avec de faux questionnaires (uuid "bench-...") et reconstruit kpi_daily ;
+2. mesure evaluate_batch sur un lot de --lot nouveaux questionnaires (comme la synchro),
+   règles de vitesse et de rafale actives ; le lot est annulé (rollback) après chaque mesure ;
+3. mesure, pour comparaison, le calcul naïf : GROUP BY agent_code, jour sur toute la table.
+
+Le coût de evaluate_batch doit rester à peu près constant (il ne lit que les journées des
+agents du lot, par l'index (agent_code, date_entretien) et kpi_daily), celui du GROUP BY
+croît avec l'historique.
+
+    python scripts/bench_vitesse.py --tailles 100000,1000000
+    python scripts/bench_vitesse.py --purge
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.services.alerts import AlertRules, agent_days, evaluate_batch
+from app.services.kpi import rebuild_kpi
+
+PREFIXE_UUID = "bench-"
+PAR_JOUR = 15 # Questionnaires par agent et par jour : l'historique s'allonge, les journées restent pareilles
+
+
+def seed(db, debut: int, fin: int, agents: int):
+    """Questionnaires bench-<debut+1> à bench-<fin>, PAR_JOUR par agent et par jour, en remontant le temps."""
+    db.execute(text("""
+        INSERT INTO survey_data (questionnaire_uuid, agent_code, status, respondent_sex,
+                                 latitude, longitude, date_entretien, date_synchro, duree_minutes, hors_zone)
+        SELECT :prefixe || g,
+               'BN' || lpad((g % :agents)::text, 4, '0'),
+               'complet'::surveystatus, 'F'::genderenum,
+               6 + random(), -5 + random(),
+               date_trunc('day', now()) - (g / (:agents * :par_jour)) * interval '1 day'
+                   + interval '7 hours' + ((g / :agents) % :par_jour) * interval '37 minutes',
+               now(), 10 + g % 50, false
+        FROM generate_series(:debut + 1, :fin) AS g
+        ON CONFLICT (questionnaire_uuid) DO NOTHING
+    """), {"prefixe": PREFIXE_UUID, "agents": agents, "par_jour": PAR_JOUR, "debut": debut, "fin": fin})
+    rebuild_kpi(db)
+    db.commit()
+
+def purge():
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM survey_data WHERE questionnaire_uuid LIKE :motif"), {"motif": PREFIXE_UUID + "%"})
+        lignes = rebuild_kpi(db)
+        db.commit()
+        print(f"Données de test supprimées, kpi_daily reconstruit ({lignes} lignes)")
+    finally:
+        db.close()
+
+def bench_lot(db, rules: AlertRules, lot: int, agents: int, essai: int) -> float:
+    """Insère un lot du jour (annulé ensuite) et chronomètre sa détection."""
+    uuids = [f"{PREFIXE_UUID}lot-{essai}-{i}" for i in range(lot)]
+    rows = db.execute(text("""
+        INSERT INTO survey_data (questionnaire_uuid, agent_code, status, respondent_sex,
+                                 date_entretien, date_synchro, duree_minutes, hors_zone)
+        SELECT u, 'BN' || lpad((o % :agents)::text, 4, '0'), 'complet', 'F',
+               date_trunc('day', now()) + interval '8 hours' + o * interval '1 minute', now(), 30, false
+        FROM unnest(CAST(:uuids AS varchar[])) WITH ORDINALITY AS t(u, o)
+        RETURNING agent_code, date_entretien
+    """), {"uuids": uuids, "agents": agents}).mappings().all()
+    t0 = time.perf_counter()
+    evaluate_batch(db, rules, uuids, agent_days(rows))
+    duree = time.perf_counter() - t0
+    db.rollback()
+    return duree
+
+def bench_naif(db, rules: AlertRules) -> float:
+    t0 = time.perf_counter()
+    db.execute(text("""
+        SELECT agent_code, CAST(date_entretien AS date), count(*) FROM survey_data
+        GROUP BY 1, 2 HAVING count(*) > :max_jour
+    """), {"max_jour": rules.max_enquetes_par_jour}).all()
+    return time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la détection vitesse / rafale")
+    parser.add_argument("--tailles", default="100000,1000000", help="Tailles d'historique, croissantes")
+    parser.add_argument("--lot", type=int, default=500, help="Questionnaires par lot de synchro")
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--essais", type=int, default=5)
+    parser.add_argument("--purge", action="store_true", help="Supprime les faux questionnaires et quitte")
+    args = parser.parse_args()
+
+    if args.purge:
+        purge()
+        return
+
+    rules = AlertRules(check_vitesse=True, max_enquetes_par_jour=20, check_rafale=True, rafale_nombre=5, rafale_minutes=30)
+    db = SessionLocal()
+    try:
+        deja = 0
+        print(f"{'historique':>12} | {'evaluate_batch (ms)':>20} | {'GROUP BY naïf (ms)':>20}")
+        for taille in (int(t) for t in args.tailles.split(",")):
+            seed(db, deja, taille, args.agents)
+            deja = taille
+            db.execute(text("ANALYZE survey_data"))
+            db.commit()
+            lots = [bench_lot(db, rules, args.lot, args.agents, i) for i in range(args.essais)]
+            naif = [bench_naif(db, rules) for _ in range(args.essais)]
+            print(f"{taille:>12} | {statistics.median(lots) * 1000:>20.1f} | {statistics.median(naif) * 1000:>20.1f}")
+    finally:
+        db.close()
+    print("Penser à lancer --purge pour supprimer les données de test.")
+
+if __name__ == "__main__":
+    main()
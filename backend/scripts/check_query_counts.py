@@ -0,0 +1,177 @@
+# backend/scripts/check_query_counts.py
+
+"""
+Vérifie que le nombre de requêtes SQL des routes de liste ne dépend pas du nombre de résultats
+(pas de "N+1" : une requête par ligne pour charger une relation oubliée).
+
+1. Crée un petit jeu de données (préfixe "qc-"), appelle chaque route et compte les requêtes
+   SQL envoyées à PostgreSQL pendant l'appel (événement 'before_cursor_execute' du moteur).
+2. Agrandit le jeu de données (--grand lignes par table) et recompte.
+3. Supprime les données de test. Code retour 1 si un compte a changé.
+
+    python scripts/check_query_counts.py
+    python scripts/check_query_counts.py --petit 2 --grand 40
+"""
+
+import argparse
+import os
+import sys
+import threading
+from datetime import datetime
+
+from sqlalchemy import event, text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.database import SessionLocal, engine
+from app.core.security import create_access_token
+from app.models.dictionary import Modalite, Variable
+from app.models.survey import SurveyData, SurveyStatus
+from app.models.users import RoleEnum, User
+from app.models.zones import Affectation, Zone
+from app.services.dictionary import invalidate_snapshot
+from app.services.scoping import invalidate_scopes
+
+PREFIXE = "qc-"
+
+# (route, paramètres, utilisateur qui appelle)
+ROUTES = [
+    ("/api/v1/maps/zones/", {}, "directeur"),
+    ("/api/v1/maps/affectations/", {}, "directeur"),
+    ("/api/v1/maps/affectations/", {"format": "ndjson"}, "directeur"),
+    ("/api/v1/maps/affectations/", {}, "superviseur"),
+    ("/api/v1/dictionary/", {}, "directeur"),
+    ("/api/v1/dictionary/", {"format": "ndjson"}, "directeur"),
+    ("/api/v1/users/", {}, "directeur"),
+    ("/api/v1/users/", {}, "superviseur"),
+    ("/api/v1/users/", {"format": "ndjson"}, "superviseur"),
+    ("/api/v1/alerts/", {}, "directeur"),
+    ("/api/v1/alerts/", {}, "superviseur"),
+]
+
+
+class QueryCounter:
+    """Compte les requêtes SQL envoyées par le moteur, tous threads confondus (routes "def" et flux)."""
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.count += 1
+
+
+def seed(db, debut: int, fin: int) -> None:
+    """Lignes debut..fin-1 de chaque table (complète le jeu de données existant)."""
+    chefs = {u.role: u for u in db.query(User).filter(User.username.in_([PREFIXE + "directeur", PREFIXE + "superviseur"]))}
+    if not chefs:
+        directeur = User(username=PREFIXE + "directeur", password_hash="!", role=RoleEnum.directeur)
+        db.add(directeur)
+        db.flush()
+        superviseur = User(username=PREFIXE + "superviseur", password_hash="!", role=RoleEnum.superviseur, chef_id=directeur.id)
+        db.add(superviseur)
+        db.flush()
+        chefs = {RoleEnum.directeur: directeur, RoleEnum.superviseur: superviseur}
+
+    for i in range(debut, fin):
+        controleur = User(username=f"{PREFIXE}ctl-{i}", password_hash="!", role=RoleEnum.controleur,
+                          chef_id=chefs[RoleEnum.superviseur].id)
+        db.add(controleur)
+        db.flush()
+        agent = User(username=f"{PREFIXE}ag-{i}", password_hash="!", role=RoleEnum.agent,
+                     cspro_code=f"QC{i:04d}", chef_id=controleur.id)
+        zone = Zone(nom_zone=f"{PREFIXE}zone-{i}", latitude_centrale=5.0, longitude_centrale=-4.0)
+        db.add_all([agent, zone])
+        db.flush()
+        db.add(Affectation(controleur_id=controleur.id, zone_id=zone.id,
+                           objectifs_quota={"type": "simple", "cible_globale": 10}))
+        variable = Variable(name=f"{PREFIXE.upper()}VAR{i}", label=f"Variable {i}")
+        db.add(variable)
+        db.flush()
+        db.add_all([Modalite(variable_id=variable.id, code="1", label="Oui"),
+                    Modalite(variable_id=variable.id, code="2", label="Non")])
+        survey = SurveyData(questionnaire_uuid=f"{PREFIXE}{i}", agent_code=agent.cspro_code,
+                            status=SurveyStatus.complet, date_entretien=datetime(2026, 1, 5, 9, 0), duree_minutes=2)
+        db.add(survey)
+        db.flush()
+        db.execute(text("""
+            INSERT INTO survey_alerts (survey_id, agent_code, regles, gravite, derniere_maj)
+            VALUES (:id, :code, 2, 2, now())
+        """), {"id": survey.id, "code": agent.cspro_code})
+    db.commit()
+    invalidate_snapshot() # Variables et utilisateurs écrits sans passer par l'API
+    invalidate_scopes()
+
+def purge(db) -> None:
+    motif = PREFIXE + "%"
+    db.execute(text("DELETE FROM survey_data WHERE questionnaire_uuid LIKE :m"), {"m": motif}) # Alertes : ON DELETE CASCADE
+    db.execute(text("""
+        DELETE FROM affectations WHERE zone_id IN (SELECT id FROM zones WHERE nom_zone LIKE :m)
+    """), {"m": motif})
+    db.execute(text("DELETE FROM zones WHERE nom_zone LIKE :m"), {"m": motif})
+    db.execute(text("""
+        DELETE FROM modalites WHERE variable_id IN (SELECT id FROM variables WHERE name LIKE :m)
+    """), {"m": PREFIXE.upper() + "%"})
+    db.execute(text("DELETE FROM variables WHERE name LIKE :m"), {"m": PREFIXE.upper() + "%"})
+    # Les subordonnés avant leurs chefs
+    for role in ("agent", "controleur", "superviseur", "directeur"):
+        db.execute(text("DELETE FROM users WHERE username LIKE :m AND role = CAST(:r AS roleenum)"), {"m": motif, "r": role})
+    db.commit()
+    invalidate_snapshot()
+    invalidate_scopes()
+
+def measure(client: TestClient, tokens: dict) -> list:
+    counter = QueryCounter()
+    counts = []
+    for route, params, qui in ROUTES:
+        headers = {"Authorization": f"Bearer {tokens[qui]}"}
+        client.get(route, params=params, headers=headers) # Chauffe (cache des utilisateurs...)
+        event.listen(engine, "before_cursor_execute", counter)
+        try:
+            counter.count = 0
+            response = client.get(route, params=params, headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", counter)
+        if response.status_code != 200:
+            raise SystemExit(f"{route} {params} ({qui}) : HTTP {response.status_code} {response.text[:200]}")
+        lignes = len(response.text.splitlines()) if params.get("format") == "ndjson" else len(response.json())
+        counts.append((counter.count, lignes))
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Requêtes SQL par route de liste, petit vs grand jeu de données")
+    parser.add_argument("--petit", type=int, default=2)
+    parser.add_argument("--grand", type=int, default=30)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    client = TestClient(app)
+    tokens = {"directeur": create_access_token(PREFIXE + "directeur"),
+              "superviseur": create_access_token(PREFIXE + "superviseur")}
+    try:
+        purge(db)
+        seed(db, 0, args.petit)
+        petit = measure(client, tokens)
+        seed(db, args.petit, args.grand)
+        grand = measure(client, tokens)
+    finally:
+        purge(db)
+        db.close()
+
+    echecs = 0
+    print(f"{'route':<45} {'qui':<12} {'requêtes (lignes)':>22}")
+    for (route, params, qui), (n1, l1), (n2, l2) in zip(ROUTES, petit, grand):
+        suffixe = "?format=ndjson" if params.get("format") else ""
+        statut = "OK" if n1 == n2 else "ÉCHEC"
+        echecs += n1 != n2
+        print(f"{route + suffixe:<45} {qui:<12} {f'{n1} ({l1}) -> {n2} ({l2})':>22}  {statut}")
+    if echecs:
+        print(f"{echecs} route(s) dont le nombre de requêtes dépend du nombre de résultats")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
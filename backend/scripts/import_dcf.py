@@ -0,0 +1,100 @@
+# backend/scripts/import_dcf.py
+
+"""
+Import en masse du dictionnaire de l'enquête à partir du .dcf CSPro
+(même traitement que POST /api/v1/dictionary/import).
+
+    python scripts/import_dcf.py enquete.dcf --dry-run       # rapport des différences seulement
+    python scripts/import_dcf.py enquete.dcf
+    python scripts/import_dcf.py enquete.dcf --supprimer-absentes
+
+Benchmark : génère un .dcf de N variables (10 modalités chacune), l'importe dans une
+transaction annulée à la fin (la base n'est pas modifiée) et affiche les temps :
+    python scripts/import_dcf.py --bench 1000
+"""
+
+import argparse
+import sys
+import time
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.services.cspro_dcf import parse_dcf, read_dcf
+from app.services.dictionary import import_dcf, variables_from_dcf
+
+MODALITES_BENCH = 10
+
+
+def generate_dcf(n: int) -> str:
+    lignes = ["[Dictionary]", "Name=BENCH_DICT", "Label=Benchmark", "RecordTypeStart=1", "RecordTypeLen=1",
+              "[IdItems]", "[Item]", "Name=BENCH_ID", "Label=Identifiant", "Start=2", "Len=6",
+              "[Record]", "Name=BENCH_REC", "Label=Questionnaire", "RecordTypeValue='1'"]
+    for i in range(n):
+        lignes += ["[Item]", f"Name=BENCH_V{i:04d}", f"Label=Question {i}", f"Start={8 + 2 * i}", "Len=2",
+                   "[ValueSet]", f"Name=BENCH_V{i:04d}_VS1"]
+        lignes += [f"Value={code};Réponse {code}" for code in range(1, MODALITES_BENCH + 1)]
+    return "\n".join(lignes)
+
+def print_report(report) -> None:
+    print(f"Variables : +{len(report.variables_ajoutees)} ajoutées, {len(report.variables_modifiees)} modifiées, "
+          f"{report.variables_inchangees} inchangées, {len(report.variables_absentes)} absentes du .dcf "
+          f"({len(report.variables_supprimees)} supprimées)")
+    print(f"Modalités : +{report.modalites_ajoutees} ajoutées, {report.modalites_modifiees} modifiées, "
+          f"{report.modalites_supprimees} supprimées")
+    if report.variables_modifiees:
+        print("Modifiées :", ", ".join(report.variables_modifiees))
+    if report.variables_absentes:
+        print("Absentes :", ", ".join(report.variables_absentes))
+    print(f"{'Appliqué' if report.applique else 'Rien écrit (--dry-run)'} en {report.duree_ms:.0f} ms")
+
+def bench(n: int) -> None:
+    texte = generate_dcf(n)
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        variables = variables_from_dcf(parse_dcf(texte))
+        t1 = time.perf_counter()
+        premier = import_dcf(db, variables)
+        db.flush()
+        t2 = time.perf_counter()
+        second = import_dcf(db, variables) # Même .dcf : rien à écrire, diff seulement
+        t3 = time.perf_counter()
+    finally:
+        db.rollback()
+        db.close()
+    print(f"{n} variables, {n * MODALITES_BENCH} modalités")
+    print(f"Lecture du .dcf : {(t1 - t0) * 1000:.0f} ms")
+    print(f"Premier import  : {(t2 - t1) * 1000:.0f} ms (+{len(premier.variables_ajoutees)} variables, +{premier.modalites_ajoutees} modalités)")
+    print(f"Réimport        : {(t3 - t2) * 1000:.0f} ms ({second.variables_inchangees} inchangées)")
+    print("Transaction annulée : la base n'a pas été modifiée")
+
+def main():
+    parser = argparse.ArgumentParser(description="Import du dictionnaire CSPro (.dcf)")
+    parser.add_argument("dcf", nargs="?", help="Chemin du .dcf")
+    parser.add_argument("--dry-run", action="store_true", help="Afficher les différences sans rien écrire")
+    parser.add_argument("--supprimer-absentes", action="store_true", help="Supprimer les variables absentes du .dcf")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark sur un .dcf généré de N variables")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench)
+        return
+    if not args.dcf:
+        parser.error("indiquer le chemin du .dcf (ou --bench N)")
+
+    variables = variables_from_dcf(read_dcf(args.dcf))
+    if not variables:
+        print("Aucune variable trouvée dans ce fichier")
+        sys.exit(1)
+    db = SessionLocal()
+    try:
+        report = import_dcf(db, variables, supprimer_absentes=args.supprimer_absentes, dry_run=args.dry_run)
+        # import_dcf a publié le changement (NOTIFY) : les workers de l'API oublient leur photo à ce commit
+        db.commit()
+    finally:
+        db.close()
+    print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# backend/scripts/import_users.py
+
+"""
+Création des comptes de la campagne en masse (même traitement que POST /api/v1/users/import).
+
+    python scripts/import_users.py equipe.csv --dry-run   # vérifier le fichier seulement
+    python scripts/import_users.py equipe.csv
+
+Format CSV (séparateur ',' ou ';') :
+    username;password;role;cspro_code;chef
+    sup.nord;secret;superviseur;;admin
+    ctl.nord1;secret;controleur;C01;sup.nord
+    AG001;secret;agent;AG001;C01
+
+Benchmark : génère N comptes (1 superviseur pour 10 contrôleurs, 1 contrôleur pour 10 agents),
+les importe dans une transaction annulée à la fin (la base n'est pas modifiée) :
+    python scripts/import_users.py --bench 2000 --rounds 4
+'--rounds' fixe le coût bcrypt (BCRYPT_ROUNDS) pour ce processus seulement.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+
+def generate_rows(n: int, directeur: str) -> list:
+    rows = []
+    sup, ctl = None, None
+    for i in range(n):
+        if i % 111 == 0:
+            sup = f"bench-sup-{i}"
+            rows.append({"username": sup, "password": "bench", "role": "superviseur", "chef": directeur})
+        elif i % 11 == 1:
+            ctl = f"bench-ctl-{i}"
+            rows.append({"username": ctl, "password": "bench", "role": "controleur", "chef": sup})
+        else:
+            rows.append({"username": f"bench-ag-{i}", "password": "bench", "role": "agent",
+                         "cspro_code": f"BA{i:05d}", "chef": ctl})
+    return rows
+
+def print_report(report) -> None:
+    for err in report.erreurs:
+        print(f"Ligne {err.ligne} ({err.username or '?'}) : {' ; '.join(err.erreurs)}")
+    if report.erreurs:
+        print(f"{len(report.erreurs)} ligne(s) en erreur sur {report.lignes} : aucun compte créé")
+        return
+    if not report.applique:
+        print(f"{report.lignes} lignes valides (--dry-run : rien écrit)")
+        return
+    detail = ", ".join(f"{n} {role}" for role, n in report.par_role.items())
+    print(f"{report.crees} comptes créés ({detail}) en {report.duree_ms:.0f} ms, dont {report.hachage_ms:.0f} ms de hachage")
+
+def main():
+    parser = argparse.ArgumentParser(description="Import des comptes (CSV / JSON)")
+    parser.add_argument("fichier", nargs="?")
+    parser.add_argument("--dry-run", action="store_true", help="Vérifier le fichier sans rien écrire")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark sur N comptes générés")
+    parser.add_argument("--rounds", type=int, help="Coût bcrypt pour ce processus (BCRYPT_ROUNDS)")
+    args = parser.parse_args()
+    if args.rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+
+    # Après BCRYPT_ROUNDS : lu à l'import de app.core.security
+    from sqlalchemy import select
+
+    from app.core.database import SessionLocal
+    from app.core.security import PASSWORD_BULK_WORKERS
+    from app.models.users import RoleEnum, User
+    from app.models.zones import Affectation # noqa: F401  (relation User.affectations)
+    from app.services.provisioning import import_users, read_rows
+    from app.services.scoping import publish_hierarchy_change
+
+    db = SessionLocal()
+    try:
+        if args.bench:
+            directeur = db.execute(select(User.username).where(User.role == RoleEnum.directeur)).scalars().first()
+            if directeur is None:
+                sys.exit("Il faut au moins un Directeur en base (scripts/initial_data.py)")
+            rows = generate_rows(args.bench, directeur)
+            t0 = time.perf_counter()
+            report = import_users(db, rows)
+            db.flush()
+            duree = time.perf_counter() - t0
+            db.rollback()
+            print(f"{len(rows)} comptes, bcrypt {os.getenv('BCRYPT_ROUNDS', '12')} rounds, {PASSWORD_BULK_WORKERS} threads de hachage")
+            print_report(report)
+            print(f"Total {duree * 1000:.0f} ms, hors hachage {duree * 1000 - report.hachage_ms:.0f} ms")
+            print("Transaction annulée : la base n'a pas été modifiée")
+            return
+
+        if not args.fichier:
+            parser.error("indiquer le fichier (ou --bench N)")
+        with open(args.fichier, "rb") as fh:
+            rows, premiere_ligne = read_rows(fh.read(), args.fichier)
+        report = import_users(db, rows, premiere_ligne=premiere_ligne, dry_run=args.dry_run)
+        if report.applique:
+            publish_hierarchy_change(db) # Les workers de l'API recalculent les périmètres
+            db.commit()
+    finally:
+        db.close()
+    print_report(report)
+    if report.erreurs:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
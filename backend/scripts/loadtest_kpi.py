@@ -0,0 +1,218 @@
+# backend/scripts/loadtest_kpi.py
+
+"""
+Test de charge de GET /api/v1/stats/kpi.
+
+1. (optionnel) --seed N : insère N faux questionnaires dans survey_data
+   (uuid "loadtest-...") puis reconstruit kpi_daily, et crée --comptes comptes
+   "loadtest-..." répartis dans une vraie hiérarchie (directeurs, superviseurs,
+   contrôleurs, agents) : chaque compte a son propre périmètre.
+2. Lance --concurrence utilisateurs simultanés, chacun sous un compte différent.
+   Chaque requête porte une période que ce compte n'a pas encore demandée : elle manque
+   forcément le cache de l'API (mesure "à froid"), puis elle est répétée aussitôt
+   (mesure "à chaud", servie par le cache de 10 s). Les deux sont rapportées séparément.
+3. Code retour 1 si le p95 à froid dépasse --seuil-p95-ms.
+
+Les jetons sont signés localement (même SECRET_KEY que l'API, lue dans le .env) :
+pas de connexion bcrypt par compte avant le test.
+
+Lancer le client sur une autre machine que l'API (ou au moins avec assez de cœurs) :
+sur une même machine, 500 threads Python mesurent surtout leur propre attente CPU.
+Côté serveur, prévoir assez de workers uvicorn et de connexions dans le pool SQLAlchemy.
+
+    python scripts/loadtest_kpi.py --seed 1000000 --comptes 500
+    python scripts/loadtest_kpi.py --url http://localhost:8000 --concurrence 500 --requetes 20000
+    python scripts/loadtest_kpi.py --purge
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from sqlalchemy import text
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.core.security import create_access_token, get_password_hash
+from app.models.users import RoleEnum, User
+from app.models.zones import Affectation # noqa: F401 (relations des modèles)
+from app.services.kpi import rebuild_kpi
+
+PREFIXE_UUID = "loadtest-"
+PREFIXE_COMPTE = "loadtest-"
+JOURS = 60 # Les faux questionnaires sont étalés sur les 60 derniers jours
+
+
+def seed(n: int, agents: int):
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        # generate_series côté serveur : pas d'aller-retour par ligne
+        db.execute(text("""
+            INSERT INTO survey_data (questionnaire_uuid, agent_code, status, respondent_sex,
+                                     latitude, longitude, date_entretien, date_synchro, duree_minutes)
+            SELECT :prefixe || g,
+                   'LT' || lpad((g % :agents)::text, 4, '0'),
+                   (ARRAY['complet', 'complet', 'partiel', 'refus'])[1 + g % 4]::surveystatus,
+                   (ARRAY['M', 'F', 'Inconnu'])[1 + (g / 7) % 3]::genderenum,
+                   6 + random(), -5 + random(),
+                   now() - (g % :jours) * interval '1 day',
+                   now(),
+                   10 + g % 50
+            FROM generate_series(1, :n) AS g
+            ON CONFLICT (questionnaire_uuid) DO NOTHING
+        """), {"prefixe": PREFIXE_UUID, "agents": agents, "jours": JOURS, "n": n})
+        lignes = rebuild_kpi(db)
+        db.commit()
+        print(f"{n} questionnaires insérés, {lignes} lignes kpi_daily, en {time.perf_counter() - t0:.1f}s")
+    finally:
+        db.close()
+
+def seed_accounts(n: int, agents: int):
+    """
+    n comptes : 1 % de directeurs, 2 % de superviseurs, 10 % de contrôleurs, le reste agents
+    (codes CSPro des faux questionnaires). Un seul hash pour tous : le test ne se connecte pas.
+    """
+    db = SessionLocal()
+    try:
+        hash_commun = get_password_hash(PREFIXE_COMPTE)
+
+        def comptes(role, nombre, chefs=None, code=False):
+            users = [User(username=f"{PREFIXE_COMPTE}{role.value}-{i}", password_hash=hash_commun, role=role,
+                          chef_id=chefs[i % len(chefs)].id if chefs else None,
+                          cspro_code=f"LT{i % agents:04d}" if code else None)
+                     for i in range(nombre)]
+            db.add_all(users)
+            db.flush()
+            return users
+
+        directeurs = comptes(RoleEnum.directeur, max(1, n // 100))
+        superviseurs = comptes(RoleEnum.superviseur, max(1, n // 50))
+        controleurs = comptes(RoleEnum.controleur, max(1, n // 10), chefs=superviseurs)
+        nb_agents = min(agents, max(1, n - len(directeurs) - len(superviseurs) - len(controleurs)))
+        comptes(RoleEnum.agent, nb_agents, chefs=controleurs, code=True)
+        db.commit()
+        print(f"{len(directeurs)} directeurs, {len(superviseurs)} superviseurs, "
+              f"{len(controleurs)} contrôleurs, {nb_agents} agents créés")
+    finally:
+        db.close()
+
+def purge():
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM survey_data WHERE questionnaire_uuid LIKE :motif"), {"motif": PREFIXE_UUID + "%"})
+        for role in ("agent", "controleur", "superviseur", "directeur"): # Les subordonnés avant leurs chefs
+            db.execute(text("DELETE FROM users WHERE username LIKE :motif"), {"motif": f"{PREFIXE_COMPTE}{role}-%"})
+        lignes = rebuild_kpi(db)
+        db.commit()
+        print(f"Données de test supprimées, kpi_daily reconstruit ({lignes} lignes)")
+    finally:
+        db.close()
+
+def account_tokens() -> list:
+    db = SessionLocal()
+    try:
+        noms = db.execute(text("SELECT username FROM users WHERE username LIKE :motif ORDER BY id"),
+                          {"motif": PREFIXE_COMPTE + "%"}).scalars().all()
+    finally:
+        db.close()
+    return [create_access_token(nom) for nom in noms]
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))
+    return values[k]
+
+def run(url: str, tokens: list, requetes: int, concurrence: int):
+    """
+    Requête i : compte tokens[i % N], période [aujourd'hui - (i // N + 1) jours, aujourd'hui],
+    donc un couple (compte, filtres) jamais demandé (à froid), puis la même aussitôt (à chaud).
+    """
+    today = date.today()
+    local = threading.local()
+    froid, chaud, erreurs = [], [], []
+    lock = threading.Lock()
+
+    def get(session, params):
+        t0 = time.perf_counter()
+        try:
+            code = session.get(f"{url}/api/v1/stats/kpi", params=params, timeout=30).status_code
+        except requests.RequestException as exc:
+            code = type(exc).__name__
+        return code, (time.perf_counter() - t0) * 1000
+
+    def une_requete(i: int):
+        if not hasattr(local, "sessions"):
+            local.sessions = {}
+        token = tokens[i % len(tokens)]
+        session = local.sessions.get(token)
+        if session is None:
+            session = local.sessions[token] = requests.Session()
+            session.headers["Authorization"] = f"Bearer {token}"
+        params = {"debut": (today - timedelta(days=i // len(tokens) + 1)).isoformat(), "fin": today.isoformat()}
+        for mesures in (froid, chaud):
+            code, duree = get(session, params)
+            with lock:
+                if code == 200:
+                    mesures.append(duree)
+                else:
+                    erreurs.append(code)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrence) as pool:
+        list(pool.map(une_requete, range(requetes)))
+    total = time.perf_counter() - t0
+    return froid, chaud, erreurs, total
+
+def resume(nom: str, durees: list) -> str:
+    return (f"{nom} : {len(durees)} réponses, p50 = {statistics.median(durees):.1f} ms, "
+            f"p95 = {percentile(durees, 95):.1f} ms, p99 = {percentile(durees, 99):.1f} ms, max = {max(durees):.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de GET /stats/kpi")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requetes", type=int, default=10000, help="Requêtes à froid (chacune suivie d'une à chaud)")
+    parser.add_argument("--concurrence", type=int, default=500, help="Utilisateurs simultanés")
+    parser.add_argument("--seuil-p95-ms", type=float, default=50.0, help="Seuil du p95 à froid")
+    parser.add_argument("--seed", type=int, default=0, help="Insère N faux questionnaires avant le test")
+    parser.add_argument("--agents", type=int, default=2000, help="Nombre d'agents pour --seed")
+    parser.add_argument("--comptes", type=int, default=500, help="Comptes de test créés par --seed")
+    parser.add_argument("--purge", action="store_true", help="Supprime les faux questionnaires et comptes, et quitte")
+    args = parser.parse_args()
+
+    if args.purge:
+        purge()
+        return
+    if args.seed:
+        seed(args.seed, args.agents)
+        seed_accounts(args.comptes, args.agents)
+
+    tokens = account_tokens()
+    if not tokens:
+        print("Aucun compte de test : lancer d'abord avec --seed")
+        sys.exit(1)
+    froid, chaud, erreurs, total = run(args.url, tokens, args.requetes, args.concurrence)
+    if not froid or not chaud:
+        print(f"Aucune réponse valide ({len(erreurs)} erreurs)")
+        sys.exit(1)
+
+    print(f"{len(tokens)} comptes, {len(froid) + len(chaud)} réponses, {len(erreurs)} erreurs, "
+          f"en {total:.1f}s ({(len(froid) + len(chaud)) / total:.0f} req/s)")
+    if erreurs:
+        print(f"Erreurs : {dict(Counter(erreurs))}")
+    print(resume("À froid (hors cache)", froid))
+    print(resume("À chaud (cache)     ", chaud))
+    if percentile(froid, 95) > args.seuil_p95_ms or erreurs:
+        print(f"ÉCHEC : p95 à froid au-dessus de {args.seuil_p95_ms:.0f} ms ou erreurs")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# backend/scripts/rebuild_counters.py
+
+"""
+Reconstruction complète des compteurs précalculés à partir de survey_data.
+À lancer après un rattrapage de données (backfill) ou si un compteur semble faux :
+    python scripts/rebuild_counters.py regles quotas kpi alertes analytique
+(les alertes dépendent de kpi : les cibles sont traitées dans cet ordre ;
+'regles' = règles remplies par chaque questionnaire, recalculées à partir de ses réponses ;
+'analytique' = snapshot Parquet des tableaux croisés, si ANALYTICS_DIR est défini)
+"""
+
+import argparse
+import time
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.services import analytics
+from app.services.alerts import rebuild_alerts
+from app.services.kpi import rebuild_kpi
+from app.services.quotas import rebuild_counters, rebuild_quota_hits
+from app.services.settings import record_reevaluation
+
+def rebuild_alertes(db) -> int:
+    nombre = rebuild_alerts(db)
+    # Les alertes suivent de nouveau les règles en vigueur (voir GlobalSettings.reevaluation_statut)
+    record_reevaluation(db, "ok")
+    return nombre
+
+CIBLES = {
+    "regles": rebuild_quota_hits, # Avant quotas : les compteurs se relisent dans regles_quota
+    "quotas": rebuild_counters,
+    "kpi": rebuild_kpi,
+    "alertes": rebuild_alertes, # Après kpi : la règle de vitesse lit kpi_daily
+    "analytique": analytics.refresh_snapshot, # Fichiers hors base, écrits au fur et à mesure
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruction des compteurs précalculés")
+    parser.add_argument("cibles", nargs="*", help=f"Compteurs à reconstruire parmi {sorted(CIBLES)} (tous par défaut)")
+    args = parser.parse_args()
+    inconnues = set(args.cibles) - set(CIBLES)
+    if inconnues:
+        parser.error(f"Cibles inconnues : {sorted(inconnues)}")
+
+    cibles = [c for c in CIBLES if not args.cibles or c in args.cibles]
+    if not analytics.disponible():
+        if "analytique" in args.cibles:
+            parser.error("Snapshot analytique indisponible : installer pyarrow et définir ANALYTICS_DIR.")
+        cibles = [c for c in cibles if c != "analytique"]
+
+    db = SessionLocal()
+    try:
+        for cible in cibles:
+            t0 = time.perf_counter()
+            # Une transaction par cible : les lecteurs voient l'ancien état jusqu'au commit
+            nombre = CIBLES[cible](db)
+            db.commit()
+            print(f"{cible} : {nombre} lignes reconstruites en {time.perf_counter() - t0:.1f}s")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# backend/scripts/sync_cspro.py
+
+"""
+Script ETL lancé par le CRON toutes les 15 minutes :
+    python scripts/sync_cspro.py
+
+Il ne charge que les questionnaires modifiés depuis le dernier run (watermark)
+et peut être relancé sans risque après un crash.
+
+Plusieurs serveurs CSPro (variable CSPRO_SOURCES) sont synchronisés en parallèle ;
+l'échec de l'un n'empêche pas les autres d'avancer :
+    python scripts/sync_cspro.py --workers 4
+    python scripts/sync_cspro.py --source nord --source sud
+
+Import d'un export de tablettes (lu en flux, sans tout charger en mémoire) :
+    python scripts/sync_cspro.py --fichier export.dat --dcf enquete.dcf
+    python scripts/sync_cspro.py --fichier export.json
+
+Rattrapage de l'historique d'une campagne déjà commencée (COPY binaire puis une seule fusion,
+voir services/backfill.py ; --sans-index verrouille survey_data jusqu'à la fin) :
+    python scripts/sync_cspro.py --fichier historique.json --backfill --sans-index
+    python scripts/sync_cspro.py --source nord --backfill
+"""
+
+import argparse
+import logging
+import sys
+
+import _fond  # noqa: F401  (avant app.* : voir scripts/_fond.py)
+
+from app.core.database import SessionLocal
+from app.core.notifications import start_listener
+from app.services.cspro_dcf import read_dcf
+from app.services.cspro_reader import FileCaseSource
+from app.services.backfill import BACKFILL_BATCH_SIZE, run_backfill
+from app.services.dictionary import get_snapshot
+from app.services.sync import (
+    CSPRO_SOURCE_TABLE, SYNC_BATCH_SIZE, SYNC_WORKERS,
+    SyncAlreadyRunning, SyncReport, configured_sources, run_sources, run_sync,
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronisation CSPro -> Dashboard")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"Questionnaires par lot ({SYNC_BATCH_SIZE}, {BACKFILL_BATCH_SIZE} en --backfill)")
+    parser.add_argument("--max-batches", type=int, default=None, help="Arrêter après N lots (tests)")
+    parser.add_argument("--table", default=CSPRO_SOURCE_TABLE, help="Table ou vue source côté MySQL")
+    parser.add_argument("--source", action="append", help="Ne synchroniser que cette source (répétable)")
+    parser.add_argument("--workers", type=int, default=SYNC_WORKERS, help="Sources synchronisées en même temps")
+    parser.add_argument("--fichier", help="Importer un export CSPro (.dat largeur fixe ou .json) au lieu de MySQL")
+    parser.add_argument("--dcf", help="Dictionnaire CSPro (.dcf), obligatoire pour les fichiers à largeur fixe")
+    parser.add_argument("--backfill", action="store_true", help="Rattrapage massif : COPY puis une seule fusion")
+    parser.add_argument("--sans-index", action="store_true",
+                        help="Avec --backfill : supprimer puis reconstruire les index secondaires")
+    args = parser.parse_args()
+    if args.sans_index and not args.backfill:
+        parser.error("--sans-index ne s'utilise qu'avec --backfill")
+    batch_size = args.batch_size or (BACKFILL_BATCH_SIZE if args.backfill else SYNC_BATCH_SIZE)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # Un changement des paramètres pendant un long import est appliqué dès le lot suivant
+    start_listener()
+
+    if not args.fichier:
+        sources = configured_sources(args.table)
+        if not sources:
+            print("Ni CSPRO_SOURCES ni CSPRO_DATABASE_URL ne sont définies dans le .env")
+            sys.exit(1)
+        if args.source:
+            inconnues = set(args.source) - {source.name for source in sources}
+            if inconnues:
+                print(f"Sources inconnues : {', '.join(sorted(inconnues))}")
+                sys.exit(1)
+            sources = [source for source in sources if source.name in args.source]
+        if args.backfill:
+            # Une source après l'autre : chacune tient survey_data pendant sa fusion
+            db = SessionLocal()
+            try:
+                for source in sources:
+                    rapport = run_backfill(db, source, batch_size=batch_size, drop_indexes=args.sans_index,
+                                           max_batches=args.max_batches)
+                    print(rapport.resume())
+            finally:
+                db.close()
+            return
+        resultats = run_sources(SessionLocal, sources, workers=args.workers,
+                                batch_size=batch_size, max_batches=args.max_batches)
+        for nom, resultat in resultats.items():
+            print(resultat.resume() if isinstance(resultat, SyncReport) else f"[{nom}] {resultat}")
+        # Un run précédent pas fini n'est pas une erreur : le CRON réessaiera dans 15 min
+        if any(not isinstance(r, (SyncReport, SyncAlreadyRunning)) for r in resultats.values()):
+            sys.exit(1)
+        return
+
+    db = SessionLocal()
+    try:
+        # Les valeurs lues sont typées d'après le dictionnaire du dashboard (entier / texte)
+        types = get_snapshot(db).types() or None
+        source = FileCaseSource(args.fichier, dcf=read_dcf(args.dcf) if args.dcf else None, types=types)
+        if args.backfill:
+            run_backfill(db, source, batch_size=batch_size, drop_indexes=args.sans_index, max_batches=args.max_batches)
+        else:
+            run_sync(db, source, batch_size=batch_size, max_batches=args.max_batches)
+        print(f"Lecture : {source.stats.resume()}")
+    except SyncAlreadyRunning as exc:
+        # Le run précédent n'est pas fini : on laisse la main, le CRON réessaiera dans 15 min.
+        print(exc)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()